@@ -0,0 +1,89 @@
+"""
+Benchmark - Formatos Tabulares (Excel x CSV x Parquet x Feather)
+================================================================
+Compara o tempo de escrita, o tempo de leitura e o tamanho do arquivo de um
+DataFrame nos formatos de download das páginas: Excel (xlsxwriter /
+openpyxl, o caminho atual), CSV e os formatos Arrow de
+config.dataframe_para_parquet / config.dataframe_para_feather.
+
+Uso:
+    python benchmarks/bench_formatos_tabulares.py [--linhas 1000000] [--sem-excel]
+
+Ler um Excel de 1 milhão de linhas com openpyxl leva minutos; use --sem-excel
+para medir só os demais formatos.
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config import dataframe_para_feather, dataframe_para_parquet, ler_arquivo_arrow
+
+
+def gerar_dados(linhas: int) -> pd.DataFrame:
+    """Gera uma tabela parecida com um export de vendas."""
+    rng = np.random.default_rng(42)
+    return pd.DataFrame({
+        'data': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 1500, linhas), unit='D'),
+        'loja': rng.choice([f'Loja {i:03d}' for i in range(200)], linhas),
+        'sku': rng.integers(100000, 999999, linhas),
+        'quantidade': rng.integers(1, 50, linhas),
+        'valor': rng.normal(250, 80, linhas).round(2),
+    })
+
+
+def escrever_excel(df: pd.DataFrame) -> bytes:
+    saida = io.BytesIO()
+    with pd.ExcelWriter(saida, engine='xlsxwriter') as writer:
+        df.to_excel(writer, index=False, sheet_name='Dados')
+    return saida.getvalue()
+
+
+def ler_upload(nome: str):
+    """Leitor de upload: recebe os bytes e devolve o DataFrame."""
+    def ler(dados: bytes) -> pd.DataFrame:
+        arquivo = io.BytesIO(dados)
+        arquivo.name = nome
+        return ler_arquivo_arrow(arquivo)
+    return ler
+
+
+def medir(funcao, argumento):
+    inicio = time.perf_counter()
+    resultado = funcao(argumento)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--sem-excel', action='store_true')
+    args = parser.parse_args()
+
+    df = gerar_dados(args.linhas)
+    formatos = [
+        ('CSV', lambda d: d.to_csv(index=False).encode('utf-8'),
+         lambda b: pd.read_csv(io.BytesIO(b), parse_dates=['data'])),
+        ('Parquet', dataframe_para_parquet, ler_upload('dados.parquet')),
+        ('Feather', dataframe_para_feather, ler_upload('dados.feather')),
+    ]
+    if not args.sem_excel:
+        formatos.insert(0, ('Excel', escrever_excel, lambda b: pd.read_excel(io.BytesIO(b))))
+
+    print(f"Linhas: {args.linhas:,}")
+    print(f"{'Formato':<10}{'Escrita (s)':>14}{'Leitura (s)':>14}{'Tamanho (MB)':>15}{'Iguais':>9}")
+    for nome, escrever, ler in formatos:
+        dados, t_escrita = medir(escrever, df)
+        lido, t_leitura = medir(ler, dados)
+        iguais = lido.astype({'loja': object}).equals(df)
+        print(f"{nome:<10}{t_escrita:>14.2f}{t_leitura:>14.2f}{len(dados) / 1024 ** 2:>15.1f}{str(iguais):>9}")
+
+
+if __name__ == '__main__':
+    main()
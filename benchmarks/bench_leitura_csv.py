@@ -0,0 +1,94 @@
+"""
+Benchmark - Leitura de CSV
+==========================
+Compara a leitura por força bruta (encodings x separadores, usada antes em
+read_data_flexible) com a leitura usada pelas páginas, config.ler_csv_em_blocos
+(dialeto detectado em uma amostra e tipos reduzidos bloco a bloco).
+
+Uso:
+    python benchmarks/bench_leitura_csv.py [--linhas 2000000]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config import ler_csv_em_blocos
+
+
+def leitura_forca_bruta(arquivo):
+    """Reproduz o laço antigo de read_data_flexible (sem as mensagens do Streamlit)."""
+    df = None
+    separators = [',', ';', '\\t', '|']
+    encodings = ['utf-8', 'latin1', 'iso-8859-1', 'cp1252']
+
+    for encoding in encodings:
+        for sep in separators:
+            try:
+                arquivo.seek(0)
+                df = pd.read_csv(arquivo, sep=sep, encoding=encoding)
+                if len(df.columns) > 1:
+                    break
+            except Exception:
+                continue
+        if df is not None and len(df.columns) > 1:
+            break
+
+    if df is None or len(df.columns) <= 1:
+        arquivo.seek(0)
+        df = pd.read_csv(arquivo, encoding='utf-8', sep=None, engine='python')
+    return df
+
+
+def gerar_csv(linhas: int, sep: str, encoding: str) -> bytes:
+    """Gera um CSV sintético no formato brasileiro (decimal com vírgula)."""
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame({
+        'Data': pd.date_range('2000-01-01', periods=linhas, freq='h').strftime('%d/%m/%Y %H:%M'),
+        'Descrição': rng.choice(['Pão de queijo', 'Café', 'Açúcar', 'Feijão'], linhas),
+        'Quantidade': rng.integers(0, 1000, linhas),
+        'Valor': rng.normal(1000, 250, linhas).round(2),
+    })
+    return df.to_csv(index=False, sep=sep, decimal=',').encode(encoding)
+
+
+def medir(funcao, dados: bytes, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(io.BytesIO(dados))
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    cenarios = [
+        ("utf-8, ','", ',', 'utf-8'),
+        ("utf-8, ';'", ';', 'utf-8'),
+        ("cp1252, ';'", ';', 'cp1252'),
+        ("cp1252, '|'", '|', 'cp1252'),
+    ]
+
+    print(f"{'Cenário':<16}{'MB':>8}{'Força bruta (s)':>18}{'Em blocos (s)':>15}{'Speedup':>10}")
+    for nome, sep, encoding in cenarios:
+        dados = gerar_csv(args.linhas, sep, encoding)
+        t_antigo = medir(leitura_forca_bruta, dados, args.repeticoes)
+        t_novo = medir(lambda arquivo: ler_csv_em_blocos(arquivo), dados, args.repeticoes)
+        dialeto = ler_csv_em_blocos(io.BytesIO(dados))[1]['dialeto']
+        print(f"{nome:<16}{len(dados) / 1024 ** 2:>8.1f}{t_antigo:>18.3f}{t_novo:>15.3f}{t_antigo / t_novo:>9.1f}x"
+              f"   (detecção: {dialeto['tempo'] * 1000:.2f} ms)")
+
+
+if __name__ == '__main__':
+    main()
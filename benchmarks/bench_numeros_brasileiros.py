@@ -0,0 +1,74 @@
+"""
+Benchmark - Conversão de Números Brasileiros
+============================================
+Compara Series.apply(convert_brazilian_number), a versão escalar usada antes,
+com o conversor vetorizado config.converter_serie_numeros_brasileiros.
+
+Uso:
+    python benchmarks/bench_numeros_brasileiros.py [--linhas 1000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config import converter_serie_numeros_brasileiros
+
+
+def convert_brazilian_number(value):
+    """Versão escalar original da página de Machine Learning."""
+    if pd.isna(value):
+        return np.nan
+
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    value = str(value).strip()
+    value = value.replace('.', '').replace(',', '.')
+
+    try:
+        return float(value)
+    except Exception:
+        return np.nan
+
+
+def gerar_serie(linhas: int) -> pd.Series:
+    """Gera uma coluna de razão contábil com valores no formato brasileiro."""
+    rng = np.random.default_rng(42)
+    valores = rng.normal(5000, 20000, linhas).round(2)
+    texto = pd.Series(valores).map(lambda v: f"{v:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.'))
+    texto[rng.random(linhas) < 0.01] = None
+    return texto
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    serie = gerar_serie(args.linhas)
+
+    inicio = time.perf_counter()
+    escalar = serie.apply(convert_brazilian_number).to_numpy(dtype='float64')
+    t_escalar = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    vetorizado, falhas = converter_serie_numeros_brasileiros(serie)
+    t_vetorizado = time.perf_counter() - inicio
+
+    iguais = np.allclose(escalar, vetorizado, equal_nan=True)
+    print(f"Linhas:            {args.linhas:,}")
+    print(f"Series.apply:      {t_escalar:.3f} s")
+    print(f"Vetorizado:        {t_vetorizado:.3f} s")
+    print(f"Speedup:           {t_escalar / t_vetorizado:.1f}x")
+    print(f"Células com falha: {int(falhas.sum())}")
+    print(f"Resultados iguais: {iguais}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark - Previsão Recursiva
+==============================
+Compara o laço antigo da aba de previsões (uma linha de DataFrame atualizada
+coluna a coluna a cada mês) com forecasting.RecursiveForecaster, para um
+modelo e para vários modelos na mesma passada.
+
+Uso:
+    python benchmarks/bench_previsao_recursiva.py [--passos 24 120 1000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from forecasting import RecursiveForecaster, create_features, make_model
+
+
+def previsao_laco_antigo(processed_data, model, date_column, target_column, passos):
+    """Reproduz o laço antigo da aba '🔮 Previsões Futuras'."""
+    last_date = processed_data[date_column].max()
+    future_dates = pd.date_range(start=last_date + pd.DateOffset(months=1), periods=passos, freq='MS')
+
+    last_row = processed_data.iloc[-1:].copy()
+    future_predictions = []
+
+    for i in range(passos):
+        current_date = future_dates[i]
+        last_row['ano'] = current_date.year
+        last_row['mes'] = current_date.month
+        last_row['dia'] = current_date.day
+        last_row['dia_semana'] = current_date.dayofweek
+        last_row['dia_ano'] = current_date.dayofyear
+        last_row['trimestre'] = current_date.quarter
+        last_row['semana_mes'] = current_date.day // 7 + 1
+        last_row['fim_semana'] = int(current_date.dayofweek >= 5)
+
+        last_row['mes_sin'] = np.sin(2 * np.pi * current_date.month / 12)
+        last_row['mes_cos'] = np.cos(2 * np.pi * current_date.month / 12)
+        last_row['dia_semana_sin'] = np.sin(2 * np.pi * current_date.dayofweek / 7)
+        last_row['dia_semana_cos'] = np.cos(2 * np.pi * current_date.dayofweek / 7)
+
+        for lag in [1, 2, 3, 6, 12]:
+            if i < lag:
+                idx = len(processed_data) - lag + i
+                if idx >= 0:
+                    last_row[f'lag_{lag}'] = processed_data[target_column].iloc[idx]
+            else:
+                last_row[f'lag_{lag}'] = future_predictions[i - lag]
+
+        X_future = last_row.drop(columns=[date_column, target_column])
+        pred = model.predict(X_future)[0]
+        future_predictions.append(max(pred, 0))
+
+    return np.array(future_predictions)
+
+
+def gerar_serie(meses: int) -> pd.DataFrame:
+    """Série mensal com tendência, sazonalidade anual e ruído."""
+    rng = np.random.default_rng(42)
+    t = np.arange(meses)
+    valores = 50_000 + 150 * t + 8_000 * np.sin(2 * np.pi * t / 12) + rng.normal(0, 2_000, meses)
+    return pd.DataFrame({
+        'data': pd.date_range('2000-01-01', periods=meses, freq='MS'),
+        'valor': valores,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--meses', type=int, default=240)
+    parser.add_argument('--passos', type=int, nargs='+', default=[24, 120, 1000])
+    parser.add_argument('--modelos', nargs='+', default=['Linear Regression', 'Random Forest', 'XGBoost'])
+    args = parser.parse_args()
+
+    df = gerar_serie(args.meses)
+    processed = create_features(df.copy(), 'data', 'valor')
+    feature_columns = [col for col in processed.columns if col not in ('data', 'valor')]
+
+    models = {}
+    for name in args.modelos:
+        models[name] = make_model(name).fit(processed[feature_columns], processed['valor'])
+
+    engine = RecursiveForecaster(df, feature_columns, 'data', 'valor')
+    principal = args.modelos[-1]
+
+    print(f"Modelo: {principal} | Histórico: {args.meses} meses | {len(feature_columns)} features")
+    print(f"{'Passos':>8}{'Laço antigo (s)':>18}{'Recursivo (s)':>16}{'Speedup':>10}"
+          f"{f'{len(models)} modelos (s)':>18}")
+    for passos in args.passos:
+        inicio = time.perf_counter()
+        previsao_laco_antigo(processed, models[principal], 'data', 'valor', passos)
+        t_antigo = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        engine.forecast({principal: models[principal]}, passos)
+        t_novo = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        engine.forecast(models, passos)
+        t_todos = time.perf_counter() - inicio
+
+        print(f"{passos:>8}{t_antigo:>18.3f}{t_novo:>16.3f}{t_antigo / t_novo:>9.1f}x{t_todos:>18.3f}")
+
+
+if __name__ == '__main__':
+    main()
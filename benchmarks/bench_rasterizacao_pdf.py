@@ -0,0 +1,77 @@
+"""
+Benchmark - Rasterização de PDF (sequencial x pool de processos)
+================================================================
+Mede páginas por segundo ao converter um PDF em imagens: o laço original
+do Conversor (page.get_pixmap() página a página, em um único núcleo) e
+rasterizacao.rasterizar_pdf com 1, 4 e N workers (N = CPUs disponíveis).
+
+Uso:
+    python benchmarks/bench_rasterizacao_pdf.py [--paginas 500] [--dpi 150] [--formato png]
+
+O ganho com mais workers depende dos núcleos livres: em uma máquina com
+uma CPU, 4 workers só acrescentam o custo de iniciar o pool.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import fitz  # PyMuPDF
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from paralelismo import cpus_disponiveis
+from rasterizacao import rasterizar_pdf
+
+
+def gerar_pdf(paginas: int) -> bytes:
+    """Gera um relatório com texto e gráficos vetoriais em cada página."""
+    documento = fitz.open()
+    for pagina in range(paginas):
+        folha = documento.new_page()
+        folha.insert_text((72, 72), f"Relatório mensal - página {pagina + 1}\n" + "Linha de texto do relatório. " * 3 * 30,
+                          fontsize=9)
+        for barra in range(40):
+            altura = 20 + (pagina * 7 + barra * 13) % 200
+            folha.draw_rect(fitz.Rect(72 + barra * 11, 760 - altura, 80 + barra * 11, 760),
+                            color=(0.2, 0.3, 0.8), fill=(0.4, 0.5, 0.9))
+        folha.draw_circle((450, 550), 60 + pagina % 30, color=(0.8, 0.2, 0.2), fill=(1, 0.8, 0.8))
+    return documento.tobytes()
+
+
+def rasterizar_sequencial(dados: bytes, dpi: int, formato: str) -> int:
+    """Laço original do Conversor, com a resolução do benchmark."""
+    paginas = 0
+    with fitz.open(stream=dados, filetype="pdf") as documento:
+        for page in documento:
+            page.get_pixmap(dpi=dpi).tobytes(output=formato)
+            paginas += 1
+    return paginas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--paginas', type=int, default=500)
+    parser.add_argument('--dpi', type=int, default=150)
+    parser.add_argument('--formato', choices=['png', 'jpeg'], default='png')
+    args = parser.parse_args()
+
+    dados = gerar_pdf(args.paginas)
+    cpus = cpus_disponiveis()
+    print(f"Páginas: {args.paginas}  DPI: {args.dpi}  Formato: {args.formato}  CPUs: {cpus}")
+    print(f"{'Caminho':<28}{'Tempo (s)':>11}{'Páginas/s':>12}")
+
+    inicio = time.perf_counter()
+    paginas = rasterizar_sequencial(dados, args.dpi, args.formato)
+    segundos = time.perf_counter() - inicio
+    print(f"{'Laço original':<28}{segundos:>11.2f}{paginas / segundos:>12.1f}")
+
+    for workers in dict.fromkeys([1, 4, cpus]):
+        inicio = time.perf_counter()
+        paginas = sum(1 for _ in rasterizar_pdf(dados, dpi=args.dpi, formato=args.formato, max_workers=workers))
+        segundos = time.perf_counter() - inicio
+        print(f"{f'rasterizar_pdf, {workers} worker(s)':<28}{segundos:>11.2f}{paginas / segundos:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
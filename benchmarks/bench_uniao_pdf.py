@@ -0,0 +1,141 @@
+"""
+Benchmark - União de PDFs (PdfMerger com arquivos temporários x em memória)
+===========================================================================
+Compara o caminho antigo da página Unir Arquivos (cada upload gravado em um
+diretório temporário a cada reexecução, PdfMerger lendo dos caminhos, PDF
+final gravado em disco e lido de volta) com pdfs.unir_pdfs, que lê os
+buffers do upload e guarda os documentos interpretados em cache, nos dois
+motores (PyPDF2 e PyMuPDF).
+
+Mede a reexecução da página sem unir (o que acontece a cada arraste da
+lista), a primeira união (cache vazio) e uma nova união depois de
+reordenar os arquivos (cache cheio).
+
+Uso:
+    python benchmarks/bench_uniao_pdf.py [--arquivos 100] [--paginas 5000] [--digitalizados]
+
+A primeira união de cada motor inclui a abertura dos documentos (o PyPDF2
+só é aberto na primeira união por esse motor).
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+import numpy as np
+import PyPDF2
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from pdfs import CACHE_PDFS, abrir_pdf, unir_pdfs
+
+
+def gerar_pdfs(arquivos: int, paginas: int, digitalizados: bool = False) -> list:
+    """
+    Gera PDFs com o total de páginas dividido entre os arquivos.
+
+    Páginas de texto, ou uma imagem por página (como um documento
+    digitalizado) com digitalizados=True.
+    """
+    rng = np.random.default_rng(42)
+    uploads = []
+    for i in range(arquivos):
+        documento = fitz.open()
+        for pagina in range(paginas // arquivos):
+            folha = documento.new_page()
+            if digitalizados:
+                ruido = rng.integers(0, 256, (1100, 850), dtype=np.uint8)
+                imagem = fitz.Pixmap(fitz.csGRAY, 850, 1100, ruido.tobytes(), False)
+                folha.insert_image(folha.rect, stream=imagem.tobytes('jpg', jpg_quality=60))
+            else:
+                folha.insert_text((72, 72), f"Relatório {i:03d} - página {pagina + 1}\n" * 20)
+        upload = io.BytesIO(documento.tobytes())
+        upload.name = f"relatorio_{i:03d}.pdf"
+        upload.file_id = upload.name  # como nos uploads do Streamlit
+        uploads.append(upload)
+    return uploads
+
+
+def gravar_temporarios(uploads: list, diretorio: str) -> dict:
+    """Reexecução do caminho antigo: todos os uploads vão para o disco."""
+    caminhos = {}
+    for upload in uploads:
+        caminho = os.path.join(diretorio, upload.name)
+        with open(caminho, "wb") as f:
+            f.write(upload.getvalue())
+        caminhos[upload.name] = caminho
+    return caminhos
+
+
+def unir_com_merger(uploads: list, ordem: list) -> bytes:
+    """Caminho antigo completo: temporários, PdfMerger, arquivo final lido de volta."""
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminhos = gravar_temporarios(uploads, diretorio)
+        merger = PyPDF2.PdfMerger()
+        for nome in ordem:
+            merger.append(caminhos[nome])
+        saida = os.path.join(diretorio, "pdf_unificado.pdf")
+        merger.write(saida)
+        merger.close()
+        with open(saida, "rb") as f:
+            return f.read()
+
+
+def unir_em_memoria(uploads: list, ordem: list, motor: str) -> bytes:
+    documentos = {upload.name: abrir_pdf(upload) for upload in uploads}
+    return unir_pdfs([documentos[nome] for nome in ordem], motor)[0]
+
+
+def medir(funcao, *argumentos):
+    inicio = time.perf_counter()
+    resultado = funcao(*argumentos)
+    return resultado, time.perf_counter() - inicio
+
+
+def contar_paginas(dados: bytes) -> int:
+    return len(PyPDF2.PdfReader(io.BytesIO(dados)).pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--arquivos', type=int, default=100)
+    parser.add_argument('--paginas', type=int, default=5000)
+    parser.add_argument('--digitalizados', action='store_true', help="Uma imagem por página")
+    args = parser.parse_args()
+
+    uploads = gerar_pdfs(args.arquivos, args.paginas, args.digitalizados)
+    ordem = [upload.name for upload in uploads]
+    reordenada = random.Random(42).sample(ordem, len(ordem))
+    tamanho = sum(len(upload.getbuffer()) for upload in uploads) / 1024 ** 2
+    print(f"Arquivos: {args.arquivos}  Páginas: {args.paginas:,}  Tamanho: {tamanho:.1f} MB")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        _, t_reexec_antigo = medir(gravar_temporarios, uploads, diretorio)
+    antigo, t_antigo = medir(unir_com_merger, uploads, ordem)
+    antigo_reordenado, t_antigo_reordenado = medir(unir_com_merger, uploads, reordenada)
+
+    linhas = {'Reexecução sem unir': [t_reexec_antigo], 'Primeira união': [t_antigo],
+              'União após reordenar': [t_antigo_reordenado]}
+    paginas = [contar_paginas(antigo), contar_paginas(antigo_reordenado)]
+    for motor in ('pypdf2', 'pymupdf'):
+        CACHE_PDFS.clear()
+        novo, t_novo = medir(unir_em_memoria, uploads, ordem, motor)
+        _, t_reexec_novo = medir(lambda: [abrir_pdf(upload) for upload in uploads])
+        novo_reordenado, t_novo_reordenado = medir(unir_em_memoria, uploads, reordenada, motor)
+        linhas['Reexecução sem unir'].append(t_reexec_novo)
+        linhas['Primeira união'].append(t_novo)
+        linhas['União após reordenar'].append(t_novo_reordenado)
+        paginas += [contar_paginas(novo), contar_paginas(novo_reordenado)]
+
+    print(f"{'Etapa':<26}{'PdfMerger (s)':>15}{'PyPDF2 (s)':>13}{'PyMuPDF (s)':>14}")
+    for etapa, tempos in linhas.items():
+        print(f"{etapa:<26}{tempos[0]:>15.3f}{tempos[1]:>13.3f}{tempos[2]:>14.3f}")
+    print(f"Páginas nos resultados: {', '.join(f'{total:,}' for total in paginas)}")
+
+
+if __name__ == '__main__':
+    main()
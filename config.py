@@ -7,9 +7,27 @@ para todas as páginas do projeto Streamlit.
 
 import streamlit as st
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as pa_feather
+import pyarrow.parquet as pq
+import codecs
+import csv
+import hashlib
 import io
+import itertools
+import json
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import as_completed
 from typing import Tuple, Optional
 
+from paralelismo import cpus_disponiveis, criar_pool_processos
+
 # ==============================
 # CONFIGURAÇÕES GLOBAIS
 # ==============================
@@ -26,15 +44,36 @@ COLORS = {
     'dark': '#343a40'
 }
 
-# Configurações de upload
-MAX_FILE_SIZE_MB = 5
+# Configurações de upload (limite ajustável pela variável de ambiente)
+MAX_FILE_SIZE_MB = int(os.environ.get('FERRAMENTAS_MAX_UPLOAD_MB', 200))
 SUPPORTED_FORMATS = {
     'excel': ['xlsx', 'xls'],
     'pdf': ['pdf'],
     'image': ['png', 'jpg', 'jpeg'],
-    'text': ['txt', 'csv']
+    'text': ['txt', 'csv'],
+    'arrow': ['parquet', 'feather']
 }
 
+# Configurações de leitura de CSV
+TAMANHO_AMOSTRA_CSV = 64 * 1024
+SEPARADORES_CSV = [',', ';', '\t', '|']
+ENCODINGS_CSV = ['utf-8', 'cp1252', 'latin1']
+LINHAS_POR_BLOCO_CSV = 100_000
+LIMITE_CARDINALIDADE_CATEGORIA = 0.5
+
+# Exportação para Excel
+LIMITE_LINHAS_EXCEL = 1_048_576
+LIMITE_NOME_PLANILHA = 31
+TAMANHO_SPOOL_EXCEL_MB = 32
+MIME_EXCEL = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Formatos colunares (Apache Arrow)
+MIME_PARQUET = 'application/vnd.apache.parquet'
+MIME_FEATHER = 'application/vnd.apache.arrow.file'
+
+# Configurações de gráficos
+PONTOS_MAXIMOS_GRAFICO = 5000
+
 
 # ==============================
 # CONFIGURAÇÃO DE PÁGINA
@@ -272,6 +311,545 @@ def validar_colunas_df(df: pd.DataFrame, colunas_obrigatorias: list) -> Tuple[bo
     return len(colunas_faltantes) == 0, colunas_faltantes
 
 
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """Hash do conteúdo de um DataFrame (valores, colunas e tipos, sem o índice)."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+# ==============================
+# FUNÇÕES DE LEITURA
+# ==============================
+
+_BOMS_CSV = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+_REGEX_DECIMAL_VIRGULA = re.compile(r'^[-+]?(R\$\s*)?(\d{1,3}(\.\d{3})+|\d+),\d+$')
+_REGEX_DECIMAL_PONTO = re.compile(r'^[-+]?(\$\s*)?(\d{1,3}(,\d{3})+|\d+)\.\d+$')
+_REGEX_MILHAR_PONTO = re.compile(r'^[-+]?(R\$\s*)?\d{1,3}(\.\d{3})+(,\d+)?$')
+
+
+def _detectar_encoding(amostra: bytes, truncada: bool) -> Tuple[str, str]:
+    """
+    Detecta o encoding de uma amostra de bytes (BOM ou tentativa de decodificação).
+    
+    Args:
+        amostra: Bytes iniciais do arquivo
+        truncada: Se a amostra pode terminar no meio de uma linha
+        
+    Returns:
+        Tuple[str, str]: (encoding, texto decodificado da amostra)
+    """
+    for bom, encoding in _BOMS_CSV:
+        if amostra.startswith(bom):
+            return encoding, amostra.decode(encoding, errors='ignore').lstrip('\ufeff')
+    
+    # Descarta a última linha incompleta para não cortar um caractere multibyte
+    if truncada and b'\n' in amostra:
+        amostra = amostra[:amostra.rfind(b'\n')]
+    
+    for encoding in ENCODINGS_CSV:
+        try:
+            return encoding, amostra.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return 'latin1', amostra.decode('latin1', errors='replace')
+
+
+def _encodings_candidatos(encoding: str) -> list:
+    """
+    Encodings a tentar na leitura completa, começando pelo detectado.
+    
+    A detecção vê só a amostra: um acento que aparece depois dela pode não
+    existir no encoding escolhido. Nesse caso a leitura é refeita com os
+    encodings seguintes de ENCODINGS_CSV (o último, latin1, aceita qualquer byte).
+    """
+    if encoding in ENCODINGS_CSV:
+        return ENCODINGS_CSV[ENCODINGS_CSV.index(encoding):]
+    return [encoding] + ENCODINGS_CSV[1:]
+
+
+def _detectar_separador(linhas: list, quotechar: str) -> str:
+    """
+    Escolhe o separador que produz o número de campos mais consistente entre as linhas.
+    
+    Args:
+        linhas: Linhas de texto da amostra
+        quotechar: Caractere de aspas
+        
+    Returns:
+        str: Separador detectado
+    """
+    melhor_sep, melhor_score = SEPARADORES_CSV[0], (0.0, 0)
+    
+    for sep in SEPARADORES_CSV:
+        contagens = [len(campos) for campos in csv.reader(linhas, delimiter=sep, quotechar=quotechar)]
+        if not contagens:
+            continue
+        campos_mais_comum, frequencia = Counter(contagens).most_common(1)[0]
+        if campos_mais_comum <= 1:
+            continue
+        score = (frequencia / len(contagens), campos_mais_comum)
+        if score > melhor_score:
+            melhor_sep, melhor_score = sep, score
+    
+    return melhor_sep
+
+
+def detectar_dialeto_csv(amostra: bytes, truncada: bool = True) -> dict:
+    """
+    Detecta encoding, separador, aspas e formato decimal a partir de uma amostra do CSV.
+    
+    Args:
+        amostra: Primeiros bytes do arquivo (alguns KB bastam)
+        truncada: Se a amostra não contém o arquivo inteiro
+        
+    Returns:
+        dict: encoding, sep, quotechar, decimal, thousands e tempo (segundos) da detecção
+    """
+    inicio = time.perf_counter()
+    
+    encoding, texto = _detectar_encoding(amostra, truncada)
+    linhas = texto.splitlines()
+    if truncada and len(linhas) > 1:
+        linhas = linhas[:-1]
+    linhas = [linha for linha in linhas if linha.strip()]
+    
+    # Aspas: o caractere que mais aparece colado a um separador
+    pares_duplas = len(re.findall(r'(^|[,;\t|])"', texto, flags=re.MULTILINE))
+    pares_simples = len(re.findall(r"(^|[,;\t|])'", texto, flags=re.MULTILINE))
+    quotechar = "'" if pares_simples > pares_duplas else '"'
+    
+    sep = _detectar_separador(linhas, quotechar)
+    
+    # Formato numérico: conta células no padrão brasileiro (1.234,56) e no padrão ponto (1,234.56)
+    virgula = ponto = milhar_ponto = 0
+    for campos in csv.reader(linhas[1:], delimiter=sep, quotechar=quotechar):
+        for campo in campos:
+            campo = campo.strip()
+            if _REGEX_DECIMAL_VIRGULA.match(campo):
+                virgula += 1
+            elif _REGEX_DECIMAL_PONTO.match(campo):
+                ponto += 1
+            if _REGEX_MILHAR_PONTO.match(campo):
+                milhar_ponto += 1
+    
+    decimal = ',' if virgula > ponto else '.'
+    thousands = '.' if decimal == ',' and milhar_ponto > 0 else None
+    
+    return {
+        'encoding': encoding,
+        'sep': sep,
+        'quotechar': quotechar,
+        'decimal': decimal,
+        'thousands': thousands,
+        'tempo': time.perf_counter() - inicio
+    }
+
+
+def estimar_memoria_csv(arquivo, tamanho_amostra: int = TAMANHO_AMOSTRA_CSV) -> dict:
+    """
+    Estima, a partir de uma amostra, quantas linhas o CSV tem e quanta memória
+    uma leitura completa sem otimização ocuparia.
+    
+    Args:
+        arquivo: Arquivo do Streamlit file_uploader (ou qualquer buffer binário)
+        tamanho_amostra: Quantidade de bytes lidos para a estimativa
+        
+    Returns:
+        dict: dialeto detectado, linhas_estimadas e memoria_estimada (bytes)
+    """
+    arquivo.seek(0, io.SEEK_END)
+    tamanho = arquivo.tell()
+    arquivo.seek(0)
+    amostra = arquivo.read(tamanho_amostra)
+    arquivo.seek(0)
+    truncada = len(amostra) < tamanho
+    dialeto = detectar_dialeto_csv(amostra, truncada=truncada)
+    
+    # Descarta a última linha, que pode estar cortada
+    if truncada and b'\n' in amostra:
+        amostra = amostra[:amostra.rfind(b'\n') + 1]
+    try:
+        df = pd.read_csv(io.BytesIO(amostra), sep=dialeto['sep'], encoding=dialeto['encoding'],
+                         quotechar=dialeto['quotechar'], decimal=dialeto['decimal'],
+                         thousands=dialeto['thousands'])
+    except (ValueError, UnicodeDecodeError, csv.Error):
+        df = pd.DataFrame()
+    
+    if len(df) == 0:
+        return {'dialeto': dialeto, 'linhas_estimadas': 0, 'memoria_estimada': tamanho}
+    
+    bytes_por_linha = len(amostra) / len(df)
+    memoria_por_linha = df.memory_usage(deep=True, index=False).sum() / len(df)
+    linhas = int(tamanho / bytes_por_linha)
+    return {
+        'dialeto': dialeto,
+        'linhas_estimadas': linhas,
+        'memoria_estimada': int(linhas * memoria_por_linha),
+    }
+
+
+def _memoria_residente() -> int:
+    """Memória residente do processo em bytes (0 se o sistema não informar)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def _reduzir_tipos_bloco(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduz os tipos de um bloco lido: inteiros no menor tipo que os comporta,
+    floats em float32 apenas quando a conversão é exata e textos repetidos
+    em categorias.
+    """
+    for col in df.columns:
+        serie = df[col]
+        if pd.api.types.is_integer_dtype(serie):
+            df[col] = pd.to_numeric(serie, downcast='integer')
+        elif pd.api.types.is_float_dtype(serie):
+            reduzida = serie.astype('float32')
+            if np.array_equal(reduzida.to_numpy(dtype='float64'), serie.to_numpy(), equal_nan=True):
+                df[col] = reduzida
+        elif pd.api.types.is_object_dtype(serie) and len(serie):
+            if serie.nunique() <= LIMITE_CARDINALIDADE_CATEGORIA * len(serie):
+                df[col] = serie.astype('category')
+    return df
+
+
+def _converter_datas_texto(serie: pd.Series) -> pd.Series:
+    """
+    Converte para datetime uma coluna de texto (ou categoria) que contenha só datas.
+    
+    Colunas categóricas convertem apenas as categorias, uma vez cada. Colunas
+    que não são de datas voltam inalteradas.
+    """
+    formato_data = inferir_formato_data(serie)
+    if formato_data is None:
+        return serie
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = converter_coluna_data(pd.Series(serie.cat.categories.astype(object)), formato_data)
+        valores = np.append(categorias.to_numpy(), np.datetime64('NaT', 'ns'))
+        return pd.Series(valores[serie.cat.codes.to_numpy()], index=serie.index, name=serie.name)
+    return converter_coluna_data(serie, formato_data)
+
+
+def compactar_dataframe(df: pd.DataFrame, converter_datas: bool = True) -> Tuple[pd.DataFrame, dict]:
+    """
+    Reduz a memória de um DataFrame antes de guardá-lo na sessão.
+    
+    Todas as conversões são sem perda: inteiros vão para o menor tipo que
+    comporta o intervalo da coluna, floats só viram float32 quando todos os
+    valores voltam idênticos para float64 e textos repetidos viram
+    categorias. Quem faz contas deve converter as colunas para float64
+    (como os detectores e os modelos fazem), obtendo exatamente os valores
+    originais.
+    
+    Args:
+        df: DataFrame original (não é alterado)
+        converter_datas: Se colunas de texto com datas devem virar datetime64
+        
+    Returns:
+        Tuple[pd.DataFrame, dict]: (DataFrame compactado, informações com
+        memoria_antes, memoria_depois (bytes) e tipos {coluna: (antes, depois)})
+    """
+    memoria_antes = int(df.memory_usage(deep=True).sum())
+    tipos_antes = df.dtypes
+    compacto = _reduzir_tipos_bloco(df.copy(deep=False))
+    
+    if converter_datas:
+        for col in compacto.columns:
+            serie = compacto[col]
+            if pd.api.types.is_object_dtype(serie) or isinstance(serie.dtype, pd.CategoricalDtype):
+                compacto[col] = _converter_datas_texto(serie)
+    
+    return compacto, {
+        'memoria_antes': memoria_antes,
+        'memoria_depois': int(compacto.memory_usage(deep=True).sum()),
+        'tipos': {
+            col: (str(tipos_antes[col]), str(compacto[col].dtype))
+            for col in compacto.columns if str(tipos_antes[col]) != str(compacto[col].dtype)
+        },
+    }
+
+
+def _concatenar_blocos(blocos: list) -> pd.DataFrame:
+    """
+    Junta os blocos lidos coluna a coluna, unindo as categorias de cada bloco.
+    
+    Colunas que só viraram categoria em parte dos blocos, ou cuja união passa
+    do limite de cardinalidade, voltam a ser texto.
+    """
+    if len(blocos) == 1:
+        return blocos[0]
+    
+    colunas = {}
+    total = sum(len(bloco) for bloco in blocos)
+    for col in blocos[0].columns:
+        partes = [bloco[col] for bloco in blocos]
+        if all(isinstance(parte.dtype, pd.CategoricalDtype) for parte in partes):
+            unida = pd.api.types.union_categoricals(partes, ignore_order=True)
+            serie = pd.Series(unida, name=col)
+            if len(unida.categories) > LIMITE_CARDINALIDADE_CATEGORIA * total:
+                serie = serie.astype(object)
+        else:
+            partes = [parte.astype(object) if isinstance(parte.dtype, pd.CategoricalDtype) else parte
+                      for parte in partes]
+            serie = pd.concat(partes, ignore_index=True)
+        colunas[col] = serie.reset_index(drop=True)
+    return pd.DataFrame(colunas)
+
+
+def ler_csv_em_blocos(
+    arquivo,
+    linhas_por_bloco: int = LINHAS_POR_BLOCO_CSV,
+    dialeto: Optional[dict] = None,
+    ao_progredir=None
+) -> Tuple[pd.DataFrame, dict]:
+    """
+    Lê um CSV grande em blocos, reduzindo os tipos de cada bloco antes de ler o próximo.
+    
+    O texto bruto de um bloco é descartado assim que ele é compactado, então o
+    pico de memória fica perto do tamanho final do DataFrame, não do tamanho
+    de uma leitura completa em float64/object.
+    
+    Args:
+        arquivo: Arquivo do Streamlit file_uploader (ou qualquer buffer binário)
+        linhas_por_bloco: Linhas lidas por bloco
+        dialeto: Dialeto já detectado (ex.: por estimar_memoria_csv)
+        ao_progredir: Função chamada após cada bloco com (linhas lidas, fração do arquivo lida)
+        
+    Returns:
+        Tuple[pd.DataFrame, dict]: (DataFrame lido, informações da leitura: dialeto,
+        linhas, blocos, tempo, linhas_por_segundo, pico_memoria e memoria em bytes)
+    """
+    arquivo.seek(0, io.SEEK_END)
+    tamanho = arquivo.tell() or 1
+    arquivo.seek(0)
+    if dialeto is None:
+        amostra = arquivo.read(TAMANHO_AMOSTRA_CSV)
+        dialeto = detectar_dialeto_csv(amostra, truncada=len(amostra) >= TAMANHO_AMOSTRA_CSV)
+        arquivo.seek(0)
+    
+    # Pico medido pela memória residente amostrada a cada bloco (o tracemalloc
+    # dobraria o tempo de leitura de colunas de texto)
+    inicio = time.perf_counter()
+    base = pico = _memoria_residente()
+    
+    # Um bloco que não decodifica (acento depois da amostra) recomeça a
+    # leitura desde o início com o próximo encoding
+    candidatos = _encodings_candidatos(dialeto['encoding'])
+    for encoding in candidatos:
+        arquivo.seek(0)
+        blocos = []
+        linhas = 0
+        try:
+            with pd.read_csv(
+                arquivo,
+                sep=dialeto['sep'],
+                encoding=encoding,
+                quotechar=dialeto['quotechar'],
+                decimal=dialeto['decimal'],
+                thousands=dialeto['thousands'],
+                chunksize=linhas_por_bloco
+            ) as leitor:
+                for bloco in leitor:
+                    # Último recurso: deixa o parser Python inferir o separador
+                    if not blocos and len(bloco.columns) <= 1:
+                        break
+                    pico = max(pico, _memoria_residente())
+                    blocos.append(_reduzir_tipos_bloco(bloco))
+                    linhas += len(bloco)
+                    if ao_progredir is not None:
+                        ao_progredir(linhas, min(arquivo.tell() / tamanho, 1.0))
+            break
+        except UnicodeDecodeError:
+            if encoding == candidatos[-1]:
+                raise
+    dialeto = dict(dialeto, encoding=encoding)
+    
+    if not blocos:
+        arquivo.seek(0)
+        with pd.read_csv(arquivo, encoding=dialeto['encoding'], sep=None, engine='python',
+                         chunksize=linhas_por_bloco) as leitor:
+            for bloco in leitor:
+                pico = max(pico, _memoria_residente())
+                blocos.append(_reduzir_tipos_bloco(bloco))
+    
+    df = _concatenar_blocos(blocos) if blocos else pd.DataFrame()
+    pico = max(pico, _memoria_residente()) - base
+    
+    tempo = time.perf_counter() - inicio
+    return df, {
+        'dialeto': dialeto,
+        'linhas': len(df),
+        'blocos': len(blocos),
+        'tempo': tempo,
+        'linhas_por_segundo': len(df) / tempo if tempo > 0 else float('inf'),
+        'pico_memoria': pico,
+        'memoria': int(df.memory_usage(deep=True).sum()),
+    }
+
+
+def ler_arquivo_arrow(arquivo) -> pd.DataFrame:
+    """
+    Lê um arquivo Parquet ou Feather enviado pelo usuário.
+    
+    O Arrow lê direto do buffer do upload, sem copiar os bytes; a única cópia
+    é a conversão para o DataFrame (que precisa ser gravável, pois as páginas
+    alteram colunas). Colunas de dicionário viram categorias.
+    
+    Args:
+        arquivo: Arquivo .parquet ou .feather do Streamlit file_uploader
+        
+    Returns:
+        pd.DataFrame: Dados do arquivo
+    """
+    buffer = pa.py_buffer(arquivo.getbuffer())
+    if arquivo.name.lower().endswith('.parquet'):
+        tabela = pq.read_table(pa.BufferReader(buffer))
+    else:
+        tabela = pa_feather.read_table(pa.BufferReader(buffer), memory_map=False)
+    return tabela.to_pandas()
+
+
+def _ler_cabecalho_csv(arquivo) -> pd.Index:
+    """Colunas de um CSV, com o mesmo dialeto usado na leitura completa."""
+    arquivo.seek(0)
+    amostra = arquivo.read(TAMANHO_AMOSTRA_CSV)
+    dialeto = detectar_dialeto_csv(amostra, truncada=len(amostra) >= TAMANHO_AMOSTRA_CSV)
+    arquivo.seek(0)
+    colunas = pd.read_csv(arquivo, sep=dialeto['sep'], encoding=dialeto['encoding'],
+                          quotechar=dialeto['quotechar'], nrows=0).columns
+    if len(colunas) <= 1:
+        # Mesmo último recurso da leitura completa: o parser Python infere o separador
+        arquivo.seek(0)
+        colunas = pd.read_csv(arquivo, encoding=dialeto['encoding'], sep=None, engine='python', nrows=0).columns
+    arquivo.seek(0)
+    return colunas
+
+
+def ler_cabecalhos_tabela(arquivo, todas_planilhas: bool = False) -> dict:
+    """
+    Lê apenas os nomes das colunas de um upload tabular, sem ler os dados.
+    
+    A leitura completa (principalmente a do openpyxl) é lenta; comparar os
+    cabeçalhos antes permite decidir o que consolidar sem carregar nada.
+    Parquet e Feather têm o esquema nos metadados; CSV e Excel leem só a
+    primeira linha.
+    
+    Args:
+        arquivo: Arquivo do Streamlit file_uploader
+        todas_planilhas: Se um Excel deve informar as colunas de todas as planilhas
+        
+    Returns:
+        dict: Nome da planilha -> pd.Index com as colunas (os mesmos nomes da
+        leitura completa); a chave é None para tabelas únicas (CSV, Parquet,
+        Feather e a primeira planilha de um Excel)
+    """
+    extensao = arquivo.name.lower().rsplit('.', 1)[-1]
+    if extensao == 'csv':
+        return {None: _ler_cabecalho_csv(arquivo)}
+    if extensao in SUPPORTED_FORMATS['arrow']:
+        buffer = pa.BufferReader(pa.py_buffer(arquivo.getvalue()))
+        esquema = pq.read_schema(buffer) if extensao == 'parquet' else pa.ipc.open_file(buffer).schema
+        # Uma tabela vazia com o esquema dá as colunas exatamente como o to_pandas
+        return {None: esquema.empty_table().to_pandas().columns}
+    
+    cabecalhos = pd.read_excel(io.BytesIO(arquivo.getvalue()), sheet_name=None if todas_planilhas else 0, nrows=0)
+    if isinstance(cabecalhos, dict):
+        return {nome: df.columns for nome, df in cabecalhos.items()}
+    return {None: cabecalhos.columns}
+
+
+def _ler_excel_cronometrado(dados: bytes, planilhas=0) -> Tuple[object, float, Optional[str]]:
+    """Lê um Excel a partir dos bytes (executado nos workers); erros voltam como texto."""
+    inicio = time.perf_counter()
+    try:
+        resultado = pd.read_excel(io.BytesIO(dados), sheet_name=planilhas)
+    except Exception as e:
+        return None, time.perf_counter() - inicio, str(e)
+    return resultado, time.perf_counter() - inicio, None
+
+
+def iterar_excels_em_paralelo(conteudos: list, max_workers: Optional[int] = None, planilhas=0):
+    """
+    Lê vários arquivos Excel em um pool de processos, entregando cada um assim que fica pronto.
+    
+    O openpyxl usa uma única thread; com um processo por arquivo, dezenas
+    de planilhas são lidas ao mesmo tempo. Com um único worker a leitura é
+    feita no próprio processo, sem o custo de iniciar o pool. Cada arquivo
+    é aberto uma única vez, mesmo quando todas as planilhas são lidas.
+    
+    Args:
+        conteudos: Bytes de cada arquivo
+        max_workers: Processos em paralelo (padrão: um por CPU, até o número de arquivos)
+        planilhas: Como o sheet_name do pandas: 0 para a primeira planilha,
+            None para todas (cada resultado vira um dict nome -> DataFrame)
+        
+    Yields:
+        Tuple: (posição em `conteudos`; DataFrame ou dict de DataFrames, None
+        em caso de erro; segundos de leitura; erro ou None), na ordem em que
+        as leituras terminam
+    """
+    workers = min(len(conteudos), max_workers or cpus_disponiveis())
+    if workers <= 1:
+        for posicao, dados in enumerate(conteudos):
+            yield (posicao, *_ler_excel_cronometrado(dados, planilhas))
+        return
+    with criar_pool_processos(workers) as pool:
+        futuros = {pool.submit(_ler_excel_cronometrado, dados, planilhas): posicao
+                   for posicao, dados in enumerate(conteudos)}
+        # Cada futuro sai do dicionário ao ser entregue: quem consome pode
+        # descartar o DataFrame antes de as demais leituras terminarem
+        for futuro in as_completed(futuros):
+            yield (futuros.pop(futuro), *futuro.result())
+
+
+def ler_excels_em_paralelo(conteudos: list, max_workers: Optional[int] = None, planilhas=0) -> list:
+    """
+    Lê vários arquivos Excel em um pool de processos (ver iterar_excels_em_paralelo).
+    
+    Returns:
+        list: (DataFrame ou dict de DataFrames, None em caso de erro;
+        segundos de leitura; erro ou None) de cada arquivo, na mesma ordem
+        de `conteudos`
+    """
+    resultados = [None] * len(conteudos)
+    for posicao, *resultado in iterar_excels_em_paralelo(conteudos, max_workers, planilhas):
+        resultados[posicao] = tuple(resultado)
+    return resultados
+
+
+def carregar_tabela(arquivo, tamanho_maximo_mb: int = MAX_FILE_SIZE_MB) -> Tuple[Optional[pd.DataFrame], Optional[dict]]:
+    """
+    Lê um upload tabular escolhendo o leitor pela extensão (CSV, Excel, Parquet ou Feather).
+    
+    Args:
+        arquivo: Arquivo do Streamlit file_uploader
+        tamanho_maximo_mb: Tamanho máximo aceito em MB
+        
+    Returns:
+        Tuple: (DataFrame lido, informações da leitura em blocos para CSVs ou None);
+        (None, None) se o arquivo exceder o limite
+    """
+    extensao = arquivo.name.lower().rsplit('.', 1)[-1]
+    if extensao == 'csv':
+        return carregar_csv_grande(arquivo, tamanho_maximo_mb)
+    if not validar_tamanho_arquivo(arquivo, tamanho_maximo_mb):
+        return None, None
+    if extensao in SUPPORTED_FORMATS['arrow']:
+        return ler_arquivo_arrow(arquivo), None
+    return pd.read_excel(arquivo), None
+
+
 # ==============================
 # FUNÇÕES DE VISUALIZAÇÃO
 # ==============================
@@ -304,34 +882,293 @@ def exibir_preview(df: pd.DataFrame, titulo: str = "Prévia do Arquivo", linhas:
     st.dataframe(df.head(linhas), use_container_width=True)
 
 
+def exibir_resumo_leitura(info: dict) -> None:
+    """
+    Mostra a velocidade e a memória de uma leitura feita por ler_csv_em_blocos.
+    
+    Args:
+        info: Informações devolvidas por ler_csv_em_blocos
+    """
+    st.caption(
+        f"⚡ {info['linhas']:,} linhas lidas em {info['tempo']:.2f} s "
+        f"({info['linhas_por_segundo']:,.0f} linhas/s, {info['blocos']} bloco(s)) — "
+        f"memória final {info['memoria'] / 1024 ** 2:.1f} MB, pico da leitura {info['pico_memoria'] / 1024 ** 2:.1f} MB"
+    )
+
+
+def exibir_compactacao(info: dict) -> None:
+    """
+    Mostra a memória antes e depois de compactar_dataframe.
+    
+    Args:
+        info: Informações devolvidas por compactar_dataframe
+    """
+    antes, depois = info['memoria_antes'], info['memoria_depois']
+    reducao = (1 - depois / antes) * 100 if antes else 0.0
+    st.caption(
+        f"🗜️ Memória na sessão: {antes / 1024 ** 2:.2f} MB → {depois / 1024 ** 2:.2f} MB "
+        f"(-{reducao:.0f}%, {len(info['tipos'])} coluna(s) com tipo reduzido)"
+    )
+
+
+def _eixo_numerico(valores) -> np.ndarray:
+    """Converte um eixo (números ou datas) para float64."""
+    valores = np.asarray(valores)
+    if np.issubdtype(valores.dtype, np.datetime64):
+        return valores.astype('datetime64[ns]').astype('int64').astype('float64')
+    return valores.astype('float64')
+
+
+def _indices_lttb(x: np.ndarray, y: np.ndarray, limite: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: escolhe o ponto de maior área em cada balde."""
+    n = len(x)
+    bordas = np.linspace(1, n - 1, limite - 1).astype(int)
+
+    # Médias de cada balde calculadas de uma vez; o último "balde" é o ponto final
+    inicios = np.append(bordas[:-1], n - 1)
+    contagens = np.diff(np.append(inicios, n))
+    validos = ~np.isnan(y)
+    media_x = np.add.reduceat(x, inicios) / contagens
+    media_y = np.add.reduceat(np.where(validos, y, 0.0), inicios) / np.maximum(
+        np.add.reduceat(validos.astype(int), inicios), 1)
+
+    selecionados = np.empty(limite, dtype=np.int64)
+    selecionados[0], selecionados[-1] = 0, n - 1
+    anterior = 0
+    for i in range(limite - 2):
+        inicio, fim = bordas[i], bordas[i + 1]
+        area = np.abs(
+            (x[anterior] - media_x[i + 1]) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (media_y[i + 1] - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        selecionados[i + 1] = anterior
+    return selecionados
+
+
+def _indices_min_max(y: np.ndarray, limite: int) -> np.ndarray:
+    """Mínimo e máximo de cada balde (preserva picos e vales)."""
+    n = len(y)
+    baldes = np.arange(n) * (limite // 2) // n
+    ordem = np.lexsort((np.nan_to_num(y, nan=np.inf), baldes))
+    primeiros = np.flatnonzero(np.r_[True, baldes[ordem][1:] != baldes[ordem][:-1]])
+    ultimos = np.r_[primeiros[1:] - 1, n - 1]
+    return np.union1d(ordem[primeiros], ordem[ultimos])
+
+
+def reduzir_pontos(
+    x,
+    y,
+    limite: int = PONTOS_MAXIMOS_GRAFICO,
+    manter=None,
+    metodo: str = 'lttb'
+) -> np.ndarray:
+    """
+    Escolhe os pontos de uma série a enviar ao gráfico.
+
+    Args:
+        x: Eixo X ordenado (números ou datas)
+        y: Valores da série
+        limite: Número máximo de pontos escolhidos pelo método
+        manter: Máscara booleana ou índices que sempre aparecem (ex.: anomalias),
+            somados ao limite
+        metodo: 'lttb' (forma da curva), 'minmax' (picos e vales por balde)
+            ou 'aleatorio' (nuvens de pontos sem ordem em X)
+
+    Returns:
+        np.ndarray: Índices ordenados dos pontos a exibir
+    """
+    y = np.asarray(y, dtype='float64')
+    n = len(y)
+
+    if n <= limite or limite < 3:
+        indices = np.arange(n)
+    elif metodo == 'lttb':
+        indices = _indices_lttb(_eixo_numerico(x), y, limite)
+    elif metodo == 'minmax':
+        indices = _indices_min_max(y, limite)
+    elif metodo == 'aleatorio':
+        indices = np.sort(np.random.default_rng(42).choice(n, size=limite, replace=False))
+    else:
+        raise ValueError(f"Método de redução desconhecido: {metodo}")
+
+    if manter is not None:
+        manter = np.asarray(manter)
+        extras = np.flatnonzero(manter) if manter.dtype == bool else manter.astype(np.int64)
+        indices = np.union1d(indices, extras)
+    return indices
+
+
+def medir_payload_grafico(fig, pontos_exibidos: int, pontos_originais: int) -> Tuple[int, int]:
+    """
+    Tamanho do JSON enviado ao navegador, antes e depois da redução.
+
+    O tamanho sem redução é estimado a partir dos bytes por ponto da figura
+    reduzida, sem serializar os dados completos.
+
+    Args:
+        fig: Figura Plotly já reduzida
+        pontos_exibidos: Pontos presentes na figura
+        pontos_originais: Pontos que a figura teria sem redução
+
+    Returns:
+        Tuple[int, int]: (bytes estimados sem redução, bytes com redução)
+    """
+    import plotly.io as pio
+
+    depois = len(pio.to_json(fig, validate=False))
+    layout = len(pio.to_json({'layout': fig.layout}, validate=False))
+    por_ponto = max(depois - layout, 0) / max(pontos_exibidos, 1)
+    antes = int(depois + por_ponto * max(pontos_originais - pontos_exibidos, 0))
+    return antes, depois
+
+
+def exibir_reducao_grafico(fig, pontos_exibidos: int, pontos_originais: int) -> None:
+    """
+    Mostra quantos pontos foram enviados ao gráfico e o tamanho do payload.
+
+    Args:
+        fig: Figura Plotly já reduzida
+        pontos_exibidos: Pontos presentes na figura
+        pontos_originais: Pontos que a figura teria sem redução
+    """
+    if pontos_exibidos >= pontos_originais:
+        return
+    antes, depois = medir_payload_grafico(fig, pontos_exibidos, pontos_originais)
+    st.caption(
+        f"📉 Exibindo {pontos_exibidos:,} de {pontos_originais:,} pontos — "
+        f"payload ≈ {antes / 1024 ** 2:.2f} MB → {depois / 1024:.0f} KB"
+    )
+
+
 # ==============================
 # FUNÇÕES DE DOWNLOAD
 # ==============================
 
-def criar_botao_download_excel(
-    df: pd.DataFrame,
-    nome_arquivo: str = "resultado.xlsx",
-    sheet_name: str = "Dados"
-) -> None:
+def _valores_excel(serie: pd.Series) -> list:
+    """
+    Converte uma coluna para valores que o xlsxwriter grava diretamente.
+    
+    Nulos viram None (célula vazia, como no pandas.to_excel), datas viram
+    datetime e tipos sem equivalente no Excel viram texto.
     """
-    Cria botão de download para arquivo Excel.
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype(object)
+    if pd.api.types.is_bool_dtype(serie) or (
+        pd.api.types.is_integer_dtype(serie) and not pd.api.types.is_extension_array_dtype(serie)
+    ):
+        return serie.tolist()
+    if pd.api.types.is_timedelta64_dtype(serie):
+        valores = serie.astype(str).astype(object)
+    else:
+        valores = serie.astype(object)
+    valores = valores.where(serie.notna().to_numpy(), None).tolist()
+    
+    if pd.api.types.is_object_dtype(serie):
+        basicos = (str, int, float, bool, type(None), pd.Timestamp)
+        valores = [v if isinstance(v, basicos) else str(v) for v in valores]
+    return valores
+
+
+def _nome_parte_planilha(nome: str, parte: int) -> str:
+    """Nome da parte de uma tabela dividida: 'Dados', 'Dados (2)', 'Dados (3)'..."""
+    nome = re.sub(r'[\[\]:*?/\\]', '_', nome) or 'Dados'
+    if parte == 1:
+        return nome[:LIMITE_NOME_PLANILHA]
+    sufixo = f" ({parte})"
+    return nome[:LIMITE_NOME_PLANILHA - len(sufixo)] + sufixo
+
+
+def escrever_excel_streaming(planilhas: dict, destino) -> dict:
+    """
+    Grava DataFrames em um .xlsx linha a linha, no modo constant_memory do xlsxwriter.
+    
+    Nesse modo cada linha vai para um arquivo temporário assim que é escrita,
+    então a memória não cresce com o tamanho da planilha. Tabelas acima do
+    limite do Excel (1.048.576 linhas com o cabeçalho) são divididas em
+    várias planilhas. Uma planilha também pode vir em blocos (ex.: lotes
+    lidos de um Parquet), para que a tabela inteira nunca fique na memória.
     
     Args:
-        df: DataFrame para download
-        nome_arquivo: Nome do arquivo de saída
-        sheet_name: Nome da planilha
+        planilhas: Nome da planilha -> DataFrame ou iterável de DataFrames
+            com as mesmas colunas (o índice não é exportado)
+        destino: Caminho ou arquivo binário gravável e posicionável
+        
+    Returns:
+        dict: planilhas (nomes gravados), linhas e tempo (segundos)
     """
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name=sheet_name)
-    output.seek(0)
+    import xlsxwriter
     
-    st.download_button(
-        label="📥 Baixar Arquivo Excel",
-        data=output,
-        file_name=nome_arquivo,
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+    inicio = time.perf_counter()
+    workbook = xlsxwriter.Workbook(destino, {
+        'constant_memory': True,
+        'tmpdir': tempfile.gettempdir(),
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+        'remove_timezone': True,
+        'nan_inf_to_errors': True,
+        'strings_to_formulas': False,
+        'strings_to_urls': False,
+    })
+    cabecalho = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    linhas_por_planilha = LIMITE_LINHAS_EXCEL - 1
+    gravadas = []
+    total = 0
+    
+    try:
+        for nome, tabela in planilhas.items():
+            if isinstance(tabela, pd.DataFrame):
+                # Convertida em partes: no máximo uma planilha de valores Python por vez
+                blocos = (tabela.iloc[k:k + linhas_por_planilha]
+                          for k in range(0, max(len(tabela), 1), linhas_por_planilha))
+            else:
+                blocos = tabela
+
+            parte = 0
+            worksheet = None
+            linha = 0
+            for bloco in blocos:
+                colunas = [_valores_excel(bloco[col]) for col in bloco.columns]
+                valores_linhas = zip(*colunas) if colunas else iter([()] * len(bloco))
+                escritas = 0
+                # Um bloco vazio ainda gera a planilha com o cabeçalho
+                while worksheet is None or escritas < len(bloco):
+                    if worksheet is None or linha > linhas_por_planilha:
+                        parte += 1
+                        worksheet = workbook.add_worksheet(_nome_parte_planilha(str(nome), parte))
+                        worksheet.write_row(0, 0, [str(col) for col in bloco.columns], cabecalho)
+                        gravadas.append(worksheet.name)
+                        linha = 1
+                    for valores in itertools.islice(valores_linhas, linhas_por_planilha - linha + 1):
+                        worksheet.write_row(linha, 0, valores)
+                        linha += 1
+                        escritas += 1
+                total += len(bloco)
+    finally:
+        workbook.close()
+    
+    return {'planilhas': gravadas, 'linhas': total, 'tempo': time.perf_counter() - inicio}
+
+
+def gerar_excel(planilhas: dict) -> Tuple[tempfile.SpooledTemporaryFile, dict]:
+    """
+    Gera o .xlsx em um arquivo temporário que fica na memória até
+    TAMANHO_SPOOL_EXCEL_MB e passa para o disco acima disso.
+    
+    Args:
+        planilhas: Nome da planilha -> DataFrame
+        
+    Returns:
+        Tuple: (arquivo temporário posicionado no início, informações de escrever_excel_streaming)
+    """
+    arquivo = tempfile.SpooledTemporaryFile(max_size=TAMANHO_SPOOL_EXCEL_MB * 1024 ** 2, suffix='.xlsx')
+    try:
+        info = escrever_excel_streaming(planilhas, arquivo)
+    except BaseException:
+        arquivo.close()
+        raise
+    info['tamanho'] = arquivo.tell()
+    arquivo.seek(0)
+    return arquivo, info
 
 
 def criar_botao_download_csv(
@@ -355,6 +1192,54 @@ def criar_botao_download_csv(
     )
 
 
+def tabela_arrow(df: pd.DataFrame, schema: Optional[pa.Schema] = None) -> pa.Table:
+    """
+    Converte um DataFrame para Arrow; colunas de tipos mistos viram texto.
+    
+    Args:
+        df: DataFrame a converter (o índice não é incluído)
+        schema: Esquema Arrow de destino (ex.: o de um arquivo sendo gravado em partes)
+    """
+    try:
+        return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        mistas = {
+            col: df[col].map(lambda v: v if pd.isna(v) else str(v))
+            for col in df.columns if pd.api.types.is_object_dtype(df[col])
+        }
+        return pa.Table.from_pandas(df.assign(**mistas), schema=schema, preserve_index=False)
+
+
+def dataframe_para_parquet(df: pd.DataFrame) -> bytes:
+    """
+    Serializa um DataFrame em Parquet (compressão zstd).
+    
+    Args:
+        df: DataFrame a serializar
+        
+    Returns:
+        bytes: Conteúdo do arquivo .parquet
+    """
+    saida = pa.BufferOutputStream()
+    pq.write_table(tabela_arrow(df), saida, compression='zstd')
+    return saida.getvalue().to_pybytes()
+
+
+def dataframe_para_feather(df: pd.DataFrame) -> bytes:
+    """
+    Serializa um DataFrame em Feather v2 / Arrow IPC (compressão lz4).
+    
+    Args:
+        df: DataFrame a serializar
+        
+    Returns:
+        bytes: Conteúdo do arquivo .feather
+    """
+    saida = pa.BufferOutputStream()
+    pa_feather.write_feather(tabela_arrow(df), saida, compression='lz4')
+    return saida.getvalue().to_pybytes()
+
+
 def criar_botao_download_pdf(
     pdf_bytes: bytes,
     nome_arquivo: str = "resultado.pdf"
@@ -421,6 +1306,93 @@ def criar_colunas(num_colunas: int = 2, espacamento: str = "medium") -> Tuple:
 # UTILITÁRIOS DE CONVERSÃO
 # ==============================
 
+_TIPOS_NUMERICOS_INFERIDOS = {'integer', 'floating', 'mixed-integer-float', 'decimal', 'boolean', 'empty'}
+_REGEX_FLOAT = r'^[-+]?(\d+(\.\d*)?|\.\d+)([eE][-+]?\d+)?$'
+
+
+def _texto_brasileiro_para_float(texto: pa.Array) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converte um array Arrow de textos no formato brasileiro para float64.
+    
+    Args:
+        texto: Array Arrow de strings (nulos permitidos)
+        
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (valores float64, máscara das células que falharam)
+    """
+    sem_moeda = pc.utf8_trim(texto, characters=' \t\u00a0R$')
+    # Sinal antes do símbolo da moeda (-R$ 1.234,56): lido como os parênteses
+    menos = pc.starts_with(sem_moeda, '-')
+    sem_moeda = pc.utf8_trim(pc.replace_substring_regex(sem_moeda, '^-', '', max_replacements=1),
+                             characters=' \t\u00a0R$')
+    negativo = pc.or_(menos, pc.and_(pc.starts_with(sem_moeda, '('), pc.ends_with(sem_moeda, ')')))
+    limpo = pc.utf8_trim(sem_moeda, characters=' \t\u00a0R$()')
+    limpo = pc.replace_substring(pc.replace_substring(limpo, '.', ''), ',', '.')
+    
+    try:
+        numeros = pc.cast(limpo, pa.float64())
+    except pa.ArrowInvalid:
+        # Só paga o custo da regex quando existe alguma célula inválida
+        validos = pc.match_substring_regex(limpo, _REGEX_FLOAT)
+        numeros = pc.cast(pc.if_else(validos, limpo, pa.scalar(None, pa.string())), pa.float64())
+    
+    numeros = pc.if_else(negativo, pc.negate(numeros), numeros)
+    valores = numeros.to_numpy(zero_copy_only=False).astype('float64', copy=False)
+    
+    # Um "-" sozinho não é célula vazia: continua contando como falha
+    vazio = pc.or_kleene(pc.is_null(limpo), pc.and_(pc.equal(limpo, ''), pc.invert(menos)))
+    vazio = vazio.to_numpy(zero_copy_only=False)
+    falhas = np.isnan(valores) & ~vazio.astype(bool)
+    return valores, falhas
+
+
+def converter_serie_numeros_brasileiros(serie: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converte uma coluna inteira no formato brasileiro (R$ 47.764,00) para float64.
+    
+    Usa kernels vetorizados do Arrow em vez de um laço Python por célula. Trata
+    separador de milhar, vírgula decimal, símbolo "R$" e negativos entre parênteses
+    ou com o sinal antes do símbolo (-R$ 1,00).
+    
+    Args:
+        serie: Série com valores numéricos, textos ou nulos
+        
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (valores float64, máscara das células que falharam)
+    """
+    serie = pd.Series(serie)
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype(object)
+    
+    if pd.api.types.is_numeric_dtype(serie):
+        valores = serie.to_numpy(dtype='float64', na_value=np.nan)
+        return valores, np.zeros(len(valores), dtype=bool)
+    
+    tipo = pd.api.types.infer_dtype(serie, skipna=True)
+    if tipo in _TIPOS_NUMERICOS_INFERIDOS:
+        valores = pd.to_numeric(serie, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        return valores, np.zeros(len(valores), dtype=bool)
+    
+    if tipo == 'string':
+        return _texto_brasileiro_para_float(pa.array(serie, type=pa.string(), from_pandas=True))
+    
+    # Colunas mistas: números já prontos passam direto, o resto segue como texto
+    valores = np.full(len(serie), np.nan)
+    falhas = np.zeros(len(serie), dtype=bool)
+    eh_texto = serie.map(type).eq(str).to_numpy()
+    
+    outros = serie[~eh_texto]
+    numeros = pd.to_numeric(outros, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    valores[~eh_texto] = numeros
+    falhas[~eh_texto] = np.isnan(numeros) & outros.notna().to_numpy()
+    
+    if eh_texto.any():
+        texto = pa.array(serie[eh_texto], type=pa.string(), from_pandas=True)
+        valores[eh_texto], falhas[eh_texto] = _texto_brasileiro_para_float(texto)
+    
+    return valores, falhas
+
+
 def converter_numero_brasileiro(valor) -> Optional[float]:
     """
     Converte números no formato brasileiro (47.764,00) para float.
@@ -431,18 +1403,112 @@ def converter_numero_brasileiro(valor) -> Optional[float]:
     Returns:
         float ou None se conversão falhar
     """
-    if pd.isna(valor):
+    valores, _ = converter_serie_numeros_brasileiros(pd.Series([valor], dtype=object))
+    return None if np.isnan(valores[0]) else float(valores[0])
+
+
+FORMATOS_DATA = [
+    '%Y-%m-%d', 'ISO8601', '%Y/%m/%d',
+    '%d/%m/%Y', '%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S', '%d-%m-%Y', '%d.%m.%Y', '%d/%m/%y',
+    '%m/%d/%Y', '%Y-%m', '%m/%Y', '%Y%m%d'
+]
+FORMATOS_DATA_MESES_PT = ['%d/%m/%Y', '%m/%Y', '%m/%y']
+TAMANHO_AMOSTRA_DATA = 200
+
+_MESES_PT = {
+    'janeiro': '01', 'fevereiro': '02', 'março': '03', 'marco': '03', 'abril': '04',
+    'maio': '05', 'junho': '06', 'julho': '07', 'agosto': '08', 'setembro': '09',
+    'outubro': '10', 'novembro': '11', 'dezembro': '12',
+    'jan': '01', 'fev': '02', 'mar': '03', 'abr': '04', 'mai': '05', 'jun': '06',
+    'jul': '07', 'ago': '08', 'set': '09', 'out': '10', 'nov': '11', 'dez': '12'
+}
+_REGEX_MESES_PT = re.compile(r'\b(?:' + '|'.join(sorted(_MESES_PT, key=len, reverse=True)) + r')\b')
+
+
+def _normalizar_meses_pt(texto: pd.Series) -> pd.Series:
+    """Troca nomes de meses em português por números ("15 de março de 2023" -> "15/03/2023")."""
+    texto = texto.str.lower().str.strip()
+    texto = texto.str.replace(_REGEX_MESES_PT, lambda m: _MESES_PT[m.group(0)], regex=True)
+    return texto.str.replace(r'\s+de\s+|[\s.\-/]+', '/', regex=True)
+
+
+def _parsear_datas(texto: pd.Series, formato_data: dict) -> pd.Series:
+    """Aplica um formato de data inferido a uma série de textos."""
+    if formato_data['meses_pt']:
+        texto = _normalizar_meses_pt(texto)
+    return pd.to_datetime(texto, format=formato_data['formato'], errors='coerce')
+
+
+def inferir_formato_data(
+    serie: pd.Series,
+    tamanho_amostra: int = TAMANHO_AMOSTRA_DATA,
+    confirmar: bool = True
+) -> Optional[dict]:
+    """
+    Verifica se uma coluna contém datas e descobre um formato explícito para ela.
+    
+    Testa os formatos candidatos numa amostra aleatória limitada e só então
+    confirma o formato escolhido na coluna inteira.
+    
+    Args:
+        serie: Coluna a analisar
+        tamanho_amostra: Máximo de valores testados por formato
+        confirmar: Se o formato deve ser validado na coluna completa
+        
+    Returns:
+        dict com 'formato' e 'meses_pt', ou None se a coluna não for de datas
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return {'formato': 'ISO8601', 'meses_pt': False}
+    
+    valores = serie.dropna()
+    if len(valores) == 0 or pd.api.types.is_numeric_dtype(valores):
         return None
     
-    if isinstance(valor, (int, float)):
-        return float(valor)
+    amostra = valores.sample(min(tamanho_amostra, len(valores)), random_state=42).astype(str).str.strip()
     
-    try:
-        valor = str(valor).strip()
-        valor = valor.replace('.', '').replace(',', '.')
-        return float(valor)
-    except:
+    # Texto sem dígitos nunca é data (nem "março de 2023")
+    if not amostra.str.contains(r'\d', regex=True).all():
         return None
+    
+    candidatos = [{'formato': f, 'meses_pt': False} for f in FORMATOS_DATA]
+    if amostra.str.lower().str.contains(_REGEX_MESES_PT).any():
+        candidatos = [{'formato': f, 'meses_pt': True} for f in FORMATOS_DATA_MESES_PT]
+    
+    for formato_data in candidatos:
+        if _parsear_datas(amostra, formato_data).notna().all():
+            if not confirmar:
+                return formato_data
+            if _parsear_datas(valores.astype(str).str.strip(), formato_data).notna().all():
+                return formato_data
+    
+    return None
+
+
+def converter_coluna_data(serie: pd.Series, formato_data: Optional[dict] = None) -> pd.Series:
+    """
+    Converte uma coluna para datetime reaproveitando o formato já inferido.
+    
+    Args:
+        serie: Coluna a converter
+        formato_data: Resultado de inferir_formato_data (None para inferir agora)
+        
+    Returns:
+        pd.Series: Coluna convertida para datetime64
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    
+    if formato_data is None:
+        formato_data = inferir_formato_data(serie, confirmar=False)
+    if formato_data is None:
+        return pd.to_datetime(serie)
+    
+    convertida = _parsear_datas(serie.astype('string').str.strip(), formato_data)
+    invalidas = int((convertida.isna() & serie.notna()).sum())
+    if invalidas:
+        raise ValueError(f"{invalidas} valores não correspondem ao formato de data {formato_data['formato']}")
+    return convertida
 
 
 # ==============================
@@ -488,4 +1554,38 @@ def limpar_progresso(progress_bar, status_text):
         status_text: Objeto de texto de status
     """
     progress_bar.empty()
-    status_text.empty()
\ No newline at end of file
+    status_text.empty()
+
+
+def carregar_csv_grande(arquivo, tamanho_maximo_mb: int = MAX_FILE_SIZE_MB) -> Tuple[Optional[pd.DataFrame], Optional[dict]]:
+    """
+    Valida o tamanho, mostra a memória estimada e lê o CSV em blocos com barra de progresso.
+    
+    Args:
+        arquivo: Arquivo CSV do Streamlit file_uploader
+        tamanho_maximo_mb: Tamanho máximo aceito em MB
+        
+    Returns:
+        Tuple: (DataFrame lido, informações de ler_csv_em_blocos) ou (None, None)
+        se o arquivo exceder o limite
+    """
+    if not validar_tamanho_arquivo(arquivo, tamanho_maximo_mb):
+        return None, None
+    
+    estimativa = estimar_memoria_csv(arquivo)
+    st.info(
+        f"📐 **{arquivo.name}**: {arquivo.size / 1024 ** 2:.1f} MB em disco, "
+        f"~{estimativa['linhas_estimadas']:,} linhas — uma leitura sem otimização "
+        f"ocuparia ~{estimativa['memoria_estimada'] / 1024 ** 2:.1f} MB de memória"
+    )
+    
+    progress_bar, status_text = criar_barra_progresso(f"Lendo {arquivo.name}...")
+    df, info = ler_csv_em_blocos(
+        arquivo,
+        dialeto=estimativa['dialeto'],
+        ao_progredir=lambda linhas, fracao: atualizar_progresso(
+            progress_bar, status_text, fracao, f"Lendo {arquivo.name}: {linhas:,} linhas"
+        )
+    )
+    limpar_progresso(progress_bar, status_text)
+    return df, info
@@ -0,0 +1,392 @@
+"""
+CONSOLIDACAO.PY - Consolidação de Tabelas com Esquemas Diferentes
+=================================================================
+Junta tabelas de vários arquivos (e de várias planilhas de um mesmo
+arquivo) alinhando as colunas pelo nome:
+
+    estrita     -> todas as tabelas com as mesmas colunas, na mesma ordem
+    uniao       -> todas as colunas; as que faltam numa tabela ficam vazias
+    intersecao  -> apenas as colunas presentes em todas as tabelas
+
+Opcionalmente os nomes são comparados sem diferenciar maiúsculas, acentos
+e espaços ("Preço Unitário" = "preco  unitario"). O plano de colunas é
+feito só com os cabeçalhos, antes da leitura completa, e os tipos são
+conciliados uma única vez, coluna a coluna, ao juntar as tabelas.
+"""
+
+import os
+import unicodedata
+from typing import Callable, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config import (
+    LIMITE_CARDINALIDADE_CATEGORIA, converter_coluna_data, converter_serie_numeros_brasileiros,
+    escrever_excel_streaming, inferir_formato_data, tabela_arrow
+)
+
+MODOS_CONSOLIDACAO = {
+    'estrita': "Estrita: colunas idênticas, na mesma ordem",
+    'uniao': "União: todas as colunas (as ausentes ficam vazias)",
+    'intersecao': "Interseção: apenas as colunas comuns a todos",
+}
+
+
+def normalizar_nome_coluna(nome) -> str:
+    """Nome de coluna sem acentos, em minúsculas e com espaços simples."""
+    texto = unicodedata.normalize('NFKD', str(nome))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.casefold().split())
+
+
+# ==============================
+# PLANO DE COLUNAS
+# ==============================
+
+def planejar_colunas(cabecalhos: dict, modo: str = 'estrita', normalizar: bool = False) -> dict:
+    """
+    Decide as colunas do consolidado usando apenas os cabeçalhos.
+
+    A primeira grafia encontrada de cada coluna dá o nome final. No modo
+    estrito, tabelas com colunas diferentes das da primeira são rejeitadas
+    (e não precisam ser lidas por inteiro).
+
+    Args:
+        cabecalhos: Rótulo da tabela -> colunas, na ordem do upload
+        modo: Chave de MODOS_CONSOLIDACAO
+        normalizar: Se os nomes são comparados sem maiúsculas, acentos e espaços
+
+    Returns:
+        dict: 'colunas' (nomes finais, na ordem da primeira aparição),
+        'renomear' (rótulo -> {coluna original: nome final}) e
+        'rejeitadas' (rótulo -> motivo)
+    """
+    chave = normalizar_nome_coluna if normalizar else (lambda nome: nome)
+    nomes = {}
+    renomear = {}
+    rejeitadas = {}
+    aceitas = []
+    referencia = None
+
+    for rotulo, colunas in cabecalhos.items():
+        chaves = [chave(coluna) for coluna in colunas]
+        if len(set(chaves)) < len(chaves):
+            rejeitadas[rotulo] = "nomes de colunas repetidos" + (" após a normalização" if normalizar else "")
+            continue
+        if modo == 'estrita':
+            if referencia is None:
+                referencia = chaves
+            elif chaves != referencia:
+                rejeitadas[rotulo] = "colunas diferentes das da primeira tabela"
+                continue
+
+        for coluna, k in zip(colunas, chaves):
+            nomes.setdefault(k, coluna)
+        renomear[rotulo] = {coluna: nomes[k] for coluna, k in zip(colunas, chaves)}
+        aceitas.append(set(chaves))
+
+    finais = list(nomes)
+    if modo == 'intersecao' and aceitas:
+        comuns = set.intersection(*aceitas)
+        finais = [k for k in finais if k in comuns]
+
+    return {'colunas': [nomes[k] for k in finais], 'renomear': renomear, 'rejeitadas': rejeitadas}
+
+
+# ==============================
+# CONCILIAÇÃO DE TIPOS
+# ==============================
+
+def _tipo_parte(serie: pd.Series) -> np.dtype:
+    """Tipo de uma parte para a conciliação (categorias contam como texto)."""
+    return np.dtype(object) if isinstance(serie.dtype, pd.CategoricalDtype) else serie.dtype
+
+
+def _texto_converte(serie: pd.Series, alvo) -> bool:
+    """Se todos os valores de uma parte de texto viram números (alvo float) ou datas."""
+    if alvo == np.dtype('float64'):
+        return not converter_serie_numeros_brasileiros(serie)[1].any()
+    return inferir_formato_data(serie) is not None
+
+
+def _tipo_final(tipos: list, faltantes: bool, partes_texto: Callable[[], list]):
+    """
+    Decide o tipo de uma coluna a partir dos tipos das partes com valores.
+
+    Números vão para o tipo que comporta todos (float se houver vazios);
+    booleanos ficam booleanos (o tipo 'boolean' do pandas se houver vazios)
+    e não se misturam com números; texto misturado com números ou datas é
+    convertido se todos os valores servirem; o resto vira texto.
+
+    Args:
+        tipos: Tipos (numpy) das partes que têm algum valor
+        faltantes: Se alguma tabela não tem a coluna ou só tem nulos nela
+        partes_texto: Devolve as partes de texto, lidas só se for preciso
+            testar a conversão
+
+    Returns:
+        Tipo final: numpy (object para texto) ou pd.BooleanDtype
+    """
+    booleanos = [pd.api.types.is_bool_dtype(tipo) for tipo in tipos]
+    numericos = [pd.api.types.is_numeric_dtype(tipo) and not booleano for tipo, booleano in zip(tipos, booleanos)]
+    datas = [pd.api.types.is_datetime64_dtype(tipo) for tipo in tipos]
+
+    if all(booleanos):
+        return pd.BooleanDtype() if faltantes else np.dtype(bool)
+    if all(numericos):
+        tipo = np.result_type(*tipos)
+        return np.dtype('float64') if faltantes and not np.issubdtype(tipo, np.floating) else tipo
+    if all(datas):
+        return np.dtype('datetime64[ns]')
+
+    textos = [tipo == np.dtype(object) for tipo in tipos]
+    for candidatos, alvo in ((numericos, np.dtype('float64')), (datas, np.dtype('datetime64[ns]'))):
+        if any(candidatos) and all(c or t for c, t in zip(candidatos, textos)):
+            if all(_texto_converte(parte, alvo) for parte in partes_texto()):
+                return alvo
+    return np.dtype(object)
+
+
+def _converter_parte(serie: pd.Series, tipo) -> pd.Series:
+    """
+    Converte uma parte de coluna para o tipo decidido em _tipo_final.
+
+    Colunas de texto guardam só textos (números e datas misturados viram
+    texto), como o Parquet da consolidação em disco exige: os dois modos
+    dão os mesmos valores.
+    """
+    if tipo == np.dtype(object):
+        serie = serie.astype(object)
+        return serie.where(serie.isna(), serie.astype(str))
+    if pd.api.types.is_object_dtype(serie) or isinstance(serie.dtype, pd.CategoricalDtype):
+        if tipo == np.dtype('float64'):
+            return pd.Series(converter_serie_numeros_brasileiros(serie)[0], index=serie.index, name=serie.name)
+        return converter_coluna_data(serie.astype(object))
+    return serie.astype(tipo)
+
+
+def _tipo_arrow(tipo) -> pa.DataType:
+    """Tipo Arrow de uma coluna do consolidado em disco."""
+    if tipo == np.dtype(object):
+        return pa.string()
+    if isinstance(tipo, pd.BooleanDtype):
+        return pa.bool_()
+    return pa.from_numpy_dtype(tipo)
+
+
+def _vazia(linhas: int, tipo) -> pd.Series:
+    """Coluna só com nulos (NaN, NaT ou None) do tipo indicado."""
+    return pd.Series(np.full(linhas, np.nan), dtype=tipo)
+
+
+def _conciliar_coluna(partes: list, tamanhos: list) -> pd.Series:
+    """
+    Junta as partes de uma coluna (None = tabela sem a coluna) com um único tipo.
+
+    Categorias em todas as tabelas são unidas; os demais tipos seguem
+    _tipo_final.
+    """
+    presentes = [parte for parte in partes if parte is not None and parte.notna().any()]
+    if not presentes:
+        return _vazia(sum(tamanhos), object)
+    faltantes = len(presentes) < len(partes)
+
+    if all(isinstance(parte.dtype, pd.CategoricalDtype) for parte in presentes):
+        try:
+            unida = pd.api.types.union_categoricals(
+                [parte if parte is not None and parte.notna().any()
+                 else pd.Categorical.from_codes(np.full(n, -1), dtype=presentes[0].dtype)
+                 for parte, n in zip(partes, tamanhos)],
+                ignore_order=True
+            )
+            if len(unida.categories) <= LIMITE_CARDINALIDADE_CATEGORIA * len(unida):
+                return pd.Series(unida)
+        except TypeError:
+            # Categorias de tipos diferentes (ex.: números e textos)
+            pass
+
+    tipo = _tipo_final(
+        [_tipo_parte(parte) for parte in presentes], faltantes,
+        lambda: [parte for parte in presentes if _tipo_parte(parte) == np.dtype(object)]
+    )
+    convertidas = iter(_converter_parte(parte, tipo) for parte in presentes)
+    # Partes vazias (sem a coluna ou só com nulos) viram nulos do tipo final
+    blocos = [
+        next(convertidas) if parte is not None and parte.notna().any() else _vazia(n, tipo)
+        for parte, n in zip(partes, tamanhos)
+    ]
+    return pd.concat([bloco.reset_index(drop=True) for bloco in blocos], ignore_index=True)
+
+
+def consolidar_tabelas(tabelas: dict, plano: dict) -> Tuple[pd.DataFrame, dict]:
+    """
+    Junta as tabelas aceitas pelo plano, com as colunas alinhadas e os tipos conciliados.
+
+    Args:
+        tabelas: Rótulo -> DataFrame (mesmos rótulos dos cabeçalhos do plano)
+        plano: Resultado de planejar_colunas
+
+    Returns:
+        Tuple[pd.DataFrame, dict]: (consolidado, informações com 'tabelas',
+        'linhas', 'conciliacoes' {coluna: "tipos de origem → tipo final"},
+        só das colunas cujos tipos diferiam entre as tabelas, e 'ausentes'
+        {coluna: número de tabelas sem a coluna})
+    """
+    alinhadas = [df.rename(columns=plano['renomear'][rotulo])
+                 for rotulo, df in tabelas.items() if rotulo in plano['renomear']]
+    tamanhos = [len(df) for df in alinhadas]
+
+    colunas = {}
+    conciliacoes = {}
+    ausentes = {}
+    for coluna in plano['colunas']:
+        partes = [df[coluna] if coluna in df.columns else None for df in alinhadas]
+        colunas[coluna] = _conciliar_coluna(partes, tamanhos)
+        tipos = sorted({str(parte.dtype) for parte in partes if parte is not None})
+        if len(tipos) > 1:
+            conciliacoes[coluna] = f"{' + '.join(tipos)} → {colunas[coluna].dtype}"
+        if any(parte is None for parte in partes):
+            ausentes[coluna] = sum(parte is None for parte in partes)
+
+    consolidado = pd.DataFrame(colunas) if colunas else pd.DataFrame(index=range(sum(tamanhos)))
+    return consolidado, {
+        'tabelas': len(alinhadas),
+        'linhas': sum(tamanhos),
+        'conciliacoes': conciliacoes,
+        'ausentes': ausentes,
+    }
+
+
+# ==============================
+# CONSOLIDAÇÃO EM DISCO
+# ==============================
+
+class ConsolidacaoEmDisco:
+    """
+    Consolida tabelas gravando cada uma em disco assim que é lida.
+
+    Cada tabela vira uma parte Parquet no diretório de trabalho e sai da
+    memória. No fim, os tipos são conciliados com os esquemas das partes (só
+    as colunas de texto misturadas com números ou datas são relidas, uma
+    coluna por vez) e as partes são copiadas, uma por vez, para um único
+    Parquet na ordem do upload. O pico de memória fica limitado à maior
+    tabela, não à soma de todas.
+    """
+
+    def __init__(self, plano: dict, diretorio: str):
+        self.plano = plano
+        self.diretorio = diretorio
+        self.partes = {}
+        self.maior_tabela = 0
+        self.soma_tabelas = 0
+
+    def adicionar(self, posicao: int, rotulo: str, df: pd.DataFrame) -> None:
+        """
+        Grava uma tabela lida como parte do consolidado.
+
+        Args:
+            posicao: Ordem da tabela no consolidado (a do upload)
+            rotulo: Rótulo da tabela no plano
+            df: Tabela lida (pode ser descartada depois da chamada)
+        """
+        memoria = int(df.memory_usage(deep=True).sum())
+        self.maior_tabela = max(self.maior_tabela, memoria)
+        self.soma_tabelas += memoria
+
+        # O Parquet só guarda nomes de coluna como texto
+        df = df.rename(columns=self.plano['renomear'][rotulo])
+        df = df[[coluna for coluna in self.plano['colunas'] if coluna in df.columns]]
+        df.columns = [str(coluna) for coluna in df.columns]
+        caminho = os.path.join(self.diretorio, f"parte_{posicao:05d}.parquet")
+        pq.write_table(tabela_arrow(df), caminho)
+        self.partes[posicao] = {
+            'caminho': caminho,
+            'linhas': len(df),
+            'tipos': {coluna: (str(df[coluna].dtype), _tipo_parte(df[coluna])) for coluna in df.columns},
+            'com_valores': {coluna for coluna in df.columns if df[coluna].notna().any()},
+        }
+
+    def _ler_parte(self, parte: dict, colunas=None) -> pd.DataFrame:
+        return pq.read_table(parte['caminho'], columns=colunas).to_pandas()
+
+    def finalizar(self, destino: str) -> dict:
+        """
+        Concilia os tipos e grava o consolidado em um único Parquet (um row group por tabela).
+
+        Args:
+            destino: Caminho do Parquet consolidado
+
+        Returns:
+            dict: 'tabelas', 'linhas', 'conciliacoes', 'ausentes' (como em
+            consolidar_tabelas), 'maior_tabela' e 'soma_tabelas' (bytes em
+            memória de cada tabela lida) e 'tamanho' do arquivo
+        """
+        partes = [self.partes[posicao] for posicao in sorted(self.partes)]
+
+        tipos_finais = {}
+        conciliacoes = {}
+        ausentes = {}
+        for coluna in map(str, self.plano['colunas']):
+            com_valores = [parte for parte in partes if coluna in parte['com_valores']]
+            if not com_valores:
+                tipos_finais[coluna] = np.dtype(object)
+            else:
+                tipos_finais[coluna] = _tipo_final(
+                    [parte['tipos'][coluna][1] for parte in com_valores],
+                    len(com_valores) < len(partes),
+                    lambda coluna=coluna, com_valores=com_valores: [
+                        self._ler_parte(parte, [coluna])[coluna] for parte in com_valores
+                        if parte['tipos'][coluna][1] == np.dtype(object)
+                    ]
+                )
+            tipos = sorted({parte['tipos'][coluna][0] for parte in partes if coluna in parte['tipos']})
+            if len(tipos) > 1:
+                conciliacoes[coluna] = f"{' + '.join(tipos)} → {tipos_finais[coluna]}"
+            sem_coluna = sum(coluna not in parte['tipos'] for parte in partes)
+            if sem_coluna:
+                ausentes[coluna] = sem_coluna
+
+        esquema = pa.schema([(coluna, _tipo_arrow(tipo)) for coluna, tipo in tipos_finais.items()])
+        with pq.ParquetWriter(destino, esquema, compression='zstd') as writer:
+            for parte in partes:
+                df = self._ler_parte(parte)
+                alinhado = pd.DataFrame({
+                    coluna: (_converter_parte(df[coluna], tipo).reset_index(drop=True)
+                             if coluna in parte['com_valores'] else _vazia(parte['linhas'], tipo))
+                    for coluna, tipo in tipos_finais.items()
+                }, index=range(parte['linhas']))
+                writer.write_table(tabela_arrow(alinhado, esquema))
+                os.remove(parte['caminho'])
+
+        return {
+            'tabelas': len(partes),
+            'linhas': sum(parte['linhas'] for parte in partes),
+            'conciliacoes': conciliacoes,
+            'ausentes': ausentes,
+            'maior_tabela': self.maior_tabela,
+            'soma_tabelas': self.soma_tabelas,
+            'tamanho': os.path.getsize(destino),
+        }
+
+
+def exportar_excel_de_parquet(origem: str, destino, nome_planilha: str = "Consolidado",
+                              linhas_por_lote: int = 100_000) -> dict:
+    """
+    Gera o Excel a partir de um Parquet, lendo um lote de linhas por vez.
+
+    Args:
+        origem: Caminho do Parquet
+        destino: Caminho ou arquivo binário do .xlsx
+        nome_planilha: Nome da planilha (partes extras recebem sufixo)
+        linhas_por_lote: Linhas lidas do Parquet por vez
+
+    Returns:
+        dict: Informações de escrever_excel_streaming
+    """
+    arquivo = pq.ParquetFile(origem)
+    lotes = (pa.Table.from_batches([lote]).to_pandas()
+             for lote in arquivo.iter_batches(batch_size=linhas_por_lote))
+    return escrever_excel_streaming({nome_planilha: lotes}, destino)
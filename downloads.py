@@ -0,0 +1,372 @@
+"""
+DOWNLOADS.PY - Cache dos Arquivos para Download
+===============================================
+O Streamlit reexecuta a página inteira a cada interação, e cada
+st.download_button recebe o arquivo já pronto. Este módulo gera cada
+arquivo (CSV, Excel, Parquet, Feather) no máximo uma vez por impressão
+digital dos dados e formato, e o reaproveita nas reexecuções seguintes.
+Dados alterados têm outra impressão digital e nunca recebem um arquivo
+antigo.
+
+O cache é compartilhado entre as sessões do servidor e remove os arquivos
+usados há mais tempo quando passa do limite de memória. O painel de
+instrumentação mostra o tempo de CPU economizado em cada reexecução.
+
+Resultados com muitos arquivos (ex.: uma imagem por página de um PDF) são
+gravados um a um em um único ZIP e oferecidos em um único botão. O
+st.download_button recebe o arquivo inteiro, então o ZIP pronto ocupa a
+memória no download; enquanto é montado, ele passa para o disco ao crescer,
+sem uma segunda cópia de todos os resultados.
+"""
+
+import os
+import tempfile
+import time
+import zipfile
+from typing import Callable, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from config import (
+    LIMITE_LINHAS_EXCEL, MIME_EXCEL, MIME_FEATHER, MIME_PARQUET,
+    dataframe_para_feather, dataframe_para_parquet, gerar_excel
+)
+from eda_cache import EDACache
+
+LIMITE_CACHE_DOWNLOADS_MB = int(os.environ.get('FERRAMENTAS_CACHE_DOWNLOADS_MB', 256))
+LIMITE_ZIP_MEMORIA_MB = int(os.environ.get('FERRAMENTAS_ZIP_MEMORIA_MB', 64))
+
+# Acima destes limites o resultado é oferecido só como ZIP, sem um botão por arquivo
+LIMITE_DOWNLOADS_INDIVIDUAIS = 10
+LIMITE_DOWNLOADS_INDIVIDUAIS_MB = 20
+
+# Formatos já comprimidos: guardados no ZIP sem nova compressão
+_EXTENSOES_COMPRIMIDAS = ('.png', '.jpg', '.jpeg', '.zip', '.xlsx', '.parquet')
+
+
+class CacheDownloads(EDACache):
+    """
+    Cache LRU de arquivos prontos para download.
+
+    Cada entrada guarda os bytes do arquivo, o tempo de CPU gasto para
+    gerá-lo e informações extras do gerador (ex.: planilhas do Excel). A
+    chave é a tupla (impressões digitais dos DataFrames, formato).
+    """
+
+    def chave(self, frames: dict, formato: str) -> tuple:
+        """
+        Chave de um arquivo: nomes e impressões digitais dos DataFrames + formato.
+
+        Args:
+            frames: Nome -> DataFrame (ex.: planilhas de um Excel)
+            formato: Identificador do formato (ex.: 'csv', 'xlsx')
+        """
+        return (tuple((nome, self.fingerprint(df)) for nome, df in frames.items()), formato)
+
+    def obter(self, chave: tuple, gerar: Callable[[], Tuple[bytes, dict]]) -> Tuple[bytes, dict, bool]:
+        """
+        Devolve o arquivo da chave, gerando-o apenas se ainda não estiver no cache.
+
+        Args:
+            chave: Chave criada por chave()
+            gerar: Função sem argumentos que devolve (bytes, informações)
+
+        Returns:
+            Tuple: (bytes, informações, se foi reaproveitado)
+        """
+        gerado = []
+
+        def medir():
+            inicio = time.process_time()
+            dados, info = gerar()
+            gerado.append(True)
+            return dados, info, time.process_time() - inicio
+
+        dados, info, cpu = self.get_or_compute(chave, medir)
+        _registrar_uso(len(dados), cpu, reaproveitado=not gerado)
+        return dados, info, not gerado
+
+
+CACHE_DOWNLOADS = CacheDownloads(max_mb=LIMITE_CACHE_DOWNLOADS_MB)
+
+
+# ==============================
+# INSTRUMENTAÇÃO
+# ==============================
+
+def _contadores(chave_sessao: str) -> dict:
+    return st.session_state.setdefault(chave_sessao, {
+        'gerados': 0, 'reaproveitados': 0, 'cpu_gasto': 0.0, 'cpu_economizado': 0.0, 'bytes': 0
+    })
+
+
+def _registrar_uso(tamanho: int, cpu: float, reaproveitado: bool) -> None:
+    """Soma o uso do cache nos contadores desta execução e da sessão."""
+    for chave_sessao in ('_downloads_execucao', '_downloads_sessao'):
+        contadores = _contadores(chave_sessao)
+        contadores['bytes'] += tamanho
+        if reaproveitado:
+            contadores['reaproveitados'] += 1
+            contadores['cpu_economizado'] += cpu
+        else:
+            contadores['gerados'] += 1
+            contadores['cpu_gasto'] += cpu
+
+
+def exibir_painel_downloads() -> None:
+    """
+    Painel com o uso do cache de downloads.
+
+    Deve ser chamado no fim da página: mostra o que foi gerado e
+    reaproveitado desde o painel anterior (a execução atual) e zera esses
+    contadores para a próxima.
+    """
+    execucao = _contadores('_downloads_execucao')
+    sessao = _contadores('_downloads_sessao')
+
+    with st.expander("⚡ Cache de downloads"):
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Reaproveitados nesta execução", f"{execucao['reaproveitados']:,}")
+        col2.metric("CPU economizada nesta execução", f"{execucao['cpu_economizado']:.3f} s")
+        col3.metric("Gerados nesta execução", f"{execucao['gerados']:,}",
+                    help=f"{execucao['cpu_gasto']:.3f} s de CPU gerando arquivos")
+        col4.metric("Arquivos em cache", f"{len(CACHE_DOWNLOADS):,}",
+                    help="Compartilhado entre as sessões do servidor")
+        st.caption(
+            f"Memória do cache: {CACHE_DOWNLOADS.size / 1024 ** 2:,.1f} de "
+            f"{CACHE_DOWNLOADS.max_bytes / 1024 ** 2:,.0f} MB · "
+            f"Na sessão: {sessao['reaproveitados']:,} arquivos reaproveitados, "
+            f"{sessao['cpu_economizado']:.2f} s de CPU economizados"
+        )
+
+    st.session_state.pop('_downloads_execucao', None)
+
+
+# ==============================
+# BOTÕES DE DOWNLOAD
+# ==============================
+
+def _csv(df: pd.DataFrame) -> Tuple[bytes, dict]:
+    return df.to_csv(index=False).encode('utf-8'), {}
+
+
+def _excel(planilhas: dict) -> Tuple[bytes, dict]:
+    arquivo, info = gerar_excel(planilhas)
+    with arquivo:
+        return arquivo.read(), info
+
+
+def criar_botao_download_csv_cache(
+    df: pd.DataFrame,
+    nome_arquivo: str = "resultado.csv",
+    rotulo: str = "📥 Baixar CSV",
+    **kwargs
+) -> None:
+    """
+    Cria o botão de download de um CSV (UTF-8) gerado uma vez por conjunto de dados.
+
+    Args:
+        df: DataFrame para download
+        nome_arquivo: Nome do arquivo de saída
+        rotulo: Texto do botão
+        **kwargs: Demais argumentos de st.download_button (ex.: type, use_container_width)
+    """
+    dados, _, _ = CACHE_DOWNLOADS.obter(CACHE_DOWNLOADS.chave({'': df}, 'csv'), lambda: _csv(df))
+    st.download_button(label=rotulo, data=dados, file_name=nome_arquivo, mime='text/csv', **kwargs)
+
+
+def criar_botoes_download_arrow(
+    df: pd.DataFrame,
+    nome_base: str = "resultado",
+    sob_demanda: bool = True,
+    use_container_width: bool = True
+) -> None:
+    """
+    Cria botões de download em Parquet e Feather lado a lado.
+
+    Como no Excel, sob demanda cada formato só é gerado quando o usuário
+    clica em "Gerar"; resultados exibidos apenas na execução de um botão
+    devem usar sob_demanda=False.
+
+    Args:
+        df: DataFrame para download
+        nome_base: Nome do arquivo de saída, sem extensão
+        sob_demanda: Se cada arquivo só é gerado após um clique
+        use_container_width: Se os botões ocupam a largura da coluna
+    """
+    formatos = [
+        ('parquet', "📥 Baixar Parquet", MIME_PARQUET, dataframe_para_parquet),
+        ('feather', "📥 Baixar Feather", MIME_FEATHER, dataframe_para_feather),
+    ]
+    for coluna, (formato, rotulo, mime, serializar) in zip(st.columns(2), formatos):
+        chave = CACHE_DOWNLOADS.chave({'': df}, formato)
+        with coluna:
+            if (sob_demanda and CACHE_DOWNLOADS.get(chave) is None
+                    and not st.button(rotulo.replace("📥 Baixar", "⚙️ Gerar"), key=f"gerar_{formato}_{nome_base}",
+                                      use_container_width=use_container_width)):
+                continue
+            dados, _, _ = CACHE_DOWNLOADS.obter(chave, lambda serializar=serializar: (serializar(df), {}))
+            st.download_button(
+                label=rotulo,
+                data=dados,
+                file_name=f"{nome_base}.{formato}",
+                mime=mime,
+                key=f"download_{formato}_{nome_base}",
+                use_container_width=use_container_width
+            )
+
+
+def criar_botao_download_excel_planilhas(
+    planilhas: dict,
+    nome_arquivo: str = "resultado.xlsx",
+    rotulo: str = "📥 Baixar Excel",
+    sob_demanda: bool = True,
+    use_container_width: bool = True
+) -> None:
+    """
+    Cria o botão de download de um Excel com uma ou mais planilhas.
+
+    Sob demanda, o arquivo só é gerado quando o usuário clica em "Gerar";
+    depois fica no cache enquanto os dados forem os mesmos, e dados novos
+    (outra consulta, outra detecção) pedem nova geração. Resultados exibidos
+    apenas na execução de um botão (que somem na reexecução) devem usar
+    sob_demanda=False, que gera o arquivo na hora.
+
+    Args:
+        planilhas: Nome da planilha -> DataFrame
+        nome_arquivo: Nome do arquivo de saída (também identifica o botão)
+        rotulo: Texto do botão de download
+        sob_demanda: Se o arquivo só é gerado após um clique
+        use_container_width: Se os botões ocupam a largura da coluna
+    """
+    chave = CACHE_DOWNLOADS.chave(planilhas, 'xlsx')
+    if (sob_demanda and CACHE_DOWNLOADS.get(chave) is None
+            and not st.button(rotulo.replace("📥 Baixar", "⚙️ Gerar"), key=f"gerar_{nome_arquivo}",
+                              use_container_width=use_container_width)):
+        return
+
+    with st.spinner("Gerando planilha..."):
+        dados, info, _ = CACHE_DOWNLOADS.obter(chave, lambda: _excel(planilhas))
+
+    st.download_button(
+        label=rotulo,
+        data=dados,
+        file_name=nome_arquivo,
+        mime=MIME_EXCEL,
+        key=f"download_{nome_arquivo}",
+        use_container_width=use_container_width
+    )
+    if len(info['planilhas']) > len(planilhas):
+        st.caption(f"📑 Dividido em {len(info['planilhas'])} planilhas (limite de {LIMITE_LINHAS_EXCEL:,} linhas do Excel)")
+
+
+# ==============================
+# PACOTE ZIP
+# ==============================
+
+class PacoteZip:
+    """
+    ZIP montado arquivo a arquivo, à medida que os resultados ficam prontos.
+
+    O ZIP fica em memória até LIMITE_ZIP_MEMORIA_MB e passa para um arquivo
+    temporário em disco depois disso. Enquanto o resultado for pequeno
+    (LIMITE_DOWNLOADS_INDIVIDUAIS arquivos e LIMITE_DOWNLOADS_INDIVIDUAIS_MB)
+    os bytes de cada arquivo também são guardados para botões individuais;
+    ao passar dos limites, só o ZIP fica.
+    """
+
+    def __init__(self, limite_memoria_mb: int = LIMITE_ZIP_MEMORIA_MB):
+        self.limite_memoria = int(limite_memoria_mb * 1024 ** 2)
+        self._arquivo = tempfile.SpooledTemporaryFile(max_size=self.limite_memoria)
+        self._zip = zipfile.ZipFile(self._arquivo, 'w')
+        self.arquivos = 0
+        self.tamanho = 0
+        self.individuais = {}
+
+    def adicionar(self, nome: str, dados: bytes) -> None:
+        """
+        Grava um arquivo no ZIP.
+
+        Args:
+            nome: Nome do arquivo dentro do ZIP
+            dados: Conteúdo (pode ser descartado depois da chamada)
+        """
+        compressao = zipfile.ZIP_STORED if nome.lower().endswith(_EXTENSOES_COMPRIMIDAS) else zipfile.ZIP_DEFLATED
+        self._zip.writestr(nome, dados, compress_type=compressao)
+        self.arquivos += 1
+        self.tamanho += len(dados)
+
+        if self.individuais is not None:
+            if (self.arquivos > LIMITE_DOWNLOADS_INDIVIDUAIS
+                    or self.tamanho > LIMITE_DOWNLOADS_INDIVIDUAIS_MB * 1024 ** 2):
+                self.individuais = None
+            else:
+                self.individuais[nome] = dados
+
+    @property
+    def em_disco(self) -> bool:
+        """Se o ZIP passou do limite de memória e foi para o disco."""
+        return self._arquivo.tell() > self.limite_memoria
+
+    def finalizar(self) -> bytes:
+        """
+        Fecha o ZIP e devolve seu conteúdo.
+
+        O st.download_button só aceita o arquivo inteiro em memória: a partir
+        daqui o ZIP completo fica na memória (mais as cópias individuais, se
+        o resultado for pequeno). O arquivo temporário é apagado na leitura.
+        """
+        self._zip.close()
+        self._arquivo.seek(0)
+        with self._arquivo:
+            return self._arquivo.read()
+
+
+def exibir_downloads_pacote(pacote: PacoteZip, nome_zip: str = "resultados.zip", colunas: int = 2) -> None:
+    """
+    Oferece o resultado de um PacoteZip para download.
+
+    Um único arquivo sai direto, sem ZIP. Resultados pequenos têm o ZIP e
+    um botão por arquivo; os grandes, só o ZIP.
+
+    Args:
+        pacote: Pacote com os arquivos gerados (é finalizado aqui)
+        nome_zip: Nome do arquivo ZIP
+        colunas: Botões individuais por linha
+    """
+    if pacote.arquivos == 0:
+        return
+    em_disco = pacote.em_disco
+    dados_zip = pacote.finalizar()
+    if pacote.arquivos == 1 and pacote.individuais:
+        nome_arquivo, dados = next(iter(pacote.individuais.items()))
+        st.download_button(label=f"📥 {nome_arquivo}", data=dados, file_name=nome_arquivo, use_container_width=True)
+        return
+
+    st.download_button(
+        label=f"📦 Baixar todos ({pacote.arquivos:,} arquivos, .zip)",
+        data=dados_zip,
+        file_name=nome_zip,
+        mime="application/zip",
+        type="primary",
+        use_container_width=True
+    )
+
+    if pacote.individuais is None:
+        st.caption(f"📦 {pacote.arquivos:,} arquivos ({pacote.tamanho / 1024 ** 2:,.1f} MB): "
+                   f"acima de {LIMITE_DOWNLOADS_INDIVIDUAIS} arquivos ou {LIMITE_DOWNLOADS_INDIVIDUAIS_MB} MB, "
+                   "os arquivos são oferecidos só no ZIP"
+                   + (" (montado em disco)" if em_disco else ""))
+        return
+
+    itens = list(pacote.individuais.items())
+    for i in range(0, len(itens), colunas):
+        for col, (nome_arquivo, dados) in zip(st.columns(colunas), itens[i:i + colunas]):
+            with col:
+                st.download_button(
+                    label=f"📥 {nome_arquivo}",
+                    data=dados,
+                    file_name=nome_arquivo,
+                    use_container_width=True
+                )
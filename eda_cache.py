@@ -0,0 +1,253 @@
+"""
+EDA_CACHE.PY - Cache da Análise Exploratória
+============================================
+O Streamlit reexecuta a página inteira a cada interação. Este módulo guarda
+as estatísticas descritivas, os agregados mensais, as médias móveis e as
+figuras já montadas de cada conjunto de dados, indexados pela impressão
+digital do DataFrame e pelas colunas escolhidas. Interações que não mudam
+os dados reaproveitam tudo.
+
+O cache é compartilhado entre as sessões do servidor e remove as entradas
+usadas há mais tempo quando passa do limite de memória.
+"""
+
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from config import PONTOS_MAXIMOS_GRAFICO, dataset_fingerprint, reduzir_pontos
+
+DEFAULT_CACHE_MB = 256
+
+
+def estimate_size(obj):
+    """Estimativa (em bytes) da memória ocupada por um resultado do cache."""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(obj, pd.DataFrame) else usage)
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, go.Figure):
+        # Os pontos dominam o tamanho; o layout e os estilos são desprezíveis
+        return sum(estimate_size(np.asarray(values)) for trace in obj.data
+                   for values in (getattr(trace, 'x', None), getattr(trace, 'y', None)) if values is not None)
+    if isinstance(obj, dict):
+        return sum(estimate_size(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(estimate_size(value) for value in obj)
+    if isinstance(obj, str):
+        return len(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return len(obj)
+    if hasattr(obj, 'nbytes'):
+        # Objetos que informam o próprio tamanho (ex.: documentos PDF lidos)
+        return int(obj.nbytes)
+    return 64
+
+
+class EDACache:
+    """
+    Cache LRU limitado por memória.
+
+    As chaves combinam a impressão digital do DataFrame, a seção calculada e
+    as colunas escolhidas. O cálculo da impressão digital (um hash de todas
+    as linhas) também é memorizado por objeto: o mesmo DataFrame guardado em
+    st.session_state não é lido de novo a cada reexecução.
+    """
+
+    def __init__(self, max_mb=DEFAULT_CACHE_MB):
+        self.max_bytes = int(max_mb * 1024 ** 2)
+        self._entries = OrderedDict()
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, df):
+        """
+        Impressão digital do DataFrame, memorizada enquanto o objeto existir.
+
+        A assinatura inclui colunas, tipos e número de linhas, então
+        conversões de coluna feitas no próprio objeto (ex.: texto -> data)
+        geram uma nova impressão digital.
+        """
+        signature = (tuple(df.columns), tuple(str(dtype) for dtype in df.dtypes), len(df))
+        with self._lock:
+            cached = self._fingerprints.get(id(df))
+        if cached is not None and cached[0]() is df and cached[1] == signature:
+            return cached[2]
+
+        fingerprint = dataset_fingerprint(df)
+        with self._lock:
+            # Remove memórias de DataFrames que já foram descartados
+            self._fingerprints = {key: value for key, value in self._fingerprints.items() if value[0]() is not None}
+            self._fingerprints[id(df)] = (weakref.ref(df), signature, fingerprint)
+        return fingerprint
+
+    def get_or_compute(self, key, compute):
+        """
+        Devolve o resultado guardado para `key` ou calcula, guarda e devolve.
+
+        Args:
+            key: Chave do resultado (tupla com a impressão digital)
+            compute: Função sem argumentos que produz o resultado
+
+        Returns:
+            Resultado em cache (não deve ser alterado por quem chama)
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        value = compute()
+        size = estimate_size(value)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (value, size)
+                self.size += size
+            while self.size > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+        return value
+
+    def get(self, key, default=None):
+        """Resultado guardado para `key`, ou `default`, sem calcular nem contar acerto."""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            return self._entries[key][0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._fingerprints.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+EDA_CACHE = EDACache()
+
+
+# ==============================
+# RESUMOS
+# ==============================
+
+def overview(df, cache=EDA_CACHE):
+    """
+    Primeiras linhas e estatísticas descritivas do conjunto.
+
+    Returns:
+        dict: 'head' e 'describe'
+    """
+    key = (cache.fingerprint(df), 'overview')
+    return cache.get_or_compute(key, lambda: {'head': df.head(10), 'describe': df.describe()})
+
+
+def _build_series_views(df, date_column, target_column, max_points):
+    # As figuras recebem arrays NumPy: com Series de datas o Plotly converte
+    # ponto a ponto, o que em milhões de linhas leva segundos por gráfico
+    dates = pd.to_datetime(df[date_column]).to_numpy()
+    values = df[target_column].to_numpy(dtype='float64')
+
+    # Séries longas são reduzidas no servidor (LTTB); as médias móveis são
+    # calculadas na série completa e amostradas nos mesmos pontos
+    shown = reduzir_pontos(dates, values, max_points)
+    shown_dates = dates[shown]
+
+    series_fig = go.Figure()
+    series_fig.add_trace(go.Scatter(
+        x=shown_dates, y=values[shown],
+        mode='lines+markers',
+        name='Demanda',
+        line=dict(color='#667eea', width=2),
+        marker=dict(size=6)
+    ))
+    series_fig.update_layout(
+        xaxis_title="Data",
+        yaxis_title="Demanda",
+        height=420,
+        hovermode='x unified',
+        margin=dict(l=40, r=40, t=60, b=40)
+    )
+
+    # Distribuição por mês: quartis calculados aqui, sem enviar os pontos ao navegador
+    by_month = pd.Series(values).groupby(pd.DatetimeIndex(dates).month)
+    quartiles = by_month.quantile([0.25, 0.5, 0.75]).unstack()
+    iqr = quartiles[0.75] - quartiles[0.25]
+    lower = np.maximum(by_month.min(), quartiles[0.25] - 1.5 * iqr)
+    upper = np.minimum(by_month.max(), quartiles[0.75] + 1.5 * iqr)
+    monthly = by_month.agg(['mean', 'count']).rename_axis('mes').reset_index()
+
+    box_fig = go.Figure(go.Box(
+        x=quartiles.index.to_numpy(),
+        q1=quartiles[0.25].to_numpy(),
+        median=quartiles[0.5].to_numpy(),
+        q3=quartiles[0.75].to_numpy(),
+        lowerfence=lower.to_numpy(),
+        upperfence=upper.to_numpy(),
+        mean=monthly['mean'].to_numpy(),
+        name=target_column,
+        marker_color='#636efa'
+    ))
+    box_fig.update_layout(title="Distribuição por Mês", xaxis_title="mes", yaxis_title=target_column)
+
+    monthly_fig = go.Figure(go.Scatter(
+        x=monthly['mes'].to_numpy(), y=monthly['mean'].to_numpy(), mode='lines+markers', name=target_column
+    ))
+    monthly_fig.update_layout(title="Média por Mês", xaxis_title="mes", yaxis_title=target_column)
+
+    rolling = pd.Series(values)
+    trend_fig = go.Figure()
+    trend_fig.add_trace(go.Scatter(
+        x=shown_dates, y=values[shown],
+        mode='lines+markers', name='Demanda Real',
+        line=dict(color='#667eea', width=1), opacity=0.7
+    ))
+    trend_fig.add_trace(go.Scatter(
+        x=shown_dates, y=rolling.rolling(window=3).mean().to_numpy()[shown],
+        mode='lines', name='Média Móvel 3 Meses',
+        line=dict(color='#ff7f0e', width=2)
+    ))
+    trend_fig.add_trace(go.Scatter(
+        x=shown_dates, y=rolling.rolling(window=6).mean().to_numpy()[shown],
+        mode='lines', name='Média Móvel 6 Meses',
+        line=dict(color='#2ca02c', width=2)
+    ))
+    trend_fig.update_layout(
+        title="Tendência com Médias Móveis",
+        xaxis_title="Data", yaxis_title="Demanda", height=420
+    )
+
+    return {
+        'monthly': monthly,
+        'series_fig': series_fig,
+        'box_fig': box_fig,
+        'monthly_fig': monthly_fig,
+        'trend_fig': trend_fig,
+        'points': (len(shown), len(values)),
+    }
+
+
+def series_views(df, date_column, target_column, max_points=PONTOS_MAXIMOS_GRAFICO, cache=EDA_CACHE):
+    """
+    Agregados mensais, médias móveis e figuras da série escolhida.
+
+    Args:
+        max_points: Pontos máximos por curva nos gráficos de linha
+
+    Returns:
+        dict: 'monthly' (média e contagem por mês), as figuras 'series_fig',
+        'box_fig', 'monthly_fig' e 'trend_fig' e 'points' (exibidos, total)
+    """
+    key = (cache.fingerprint(df), 'series', date_column, target_column, max_points)
+    return cache.get_or_compute(key, lambda: _build_series_views(df, date_column, target_column, max_points))
@@ -0,0 +1,1163 @@
+"""
+FORECASTING.PY - Motor de Previsão de Demanda
+=============================================
+Funções e classes do sistema de previsão que não dependem da interface
+Streamlit. Ficam em um módulo importável para que possam ser reutilizadas
+por benchmarks e executadas em processos paralelos.
+"""
+
+import time
+import warnings
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, as_completed, wait
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from numpy.lib.stride_tricks import sliding_window_view
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+from sklearn.metrics import mean_absolute_error, mean_absolute_percentage_error, mean_squared_error, r2_score
+from sklearn.model_selection import ParameterSampler, TimeSeriesSplit
+from threadpoolctl import threadpool_limits
+
+from paralelismo import criar_pool_processos, encerrar_pool_processos, threads_por_worker
+
+# ==============================
+# CONFIGURAÇÕES DE FEATURES
+# ==============================
+
+LAG_FEATURES = [1, 2, 3, 6, 12]
+ROLLING_WINDOWS = [3, 6, 12]
+MAX_LOOKBACK = max(LAG_FEATURES + ROLLING_WINDOWS)
+ROLLING_CHUNK_SIZE = 262144
+
+
+# ==============================
+# FEATURES EM LOTE
+# ==============================
+
+def add_calendar_features(df, date_column):
+    """Adiciona as features de calendário e trigonométricas (altera df)."""
+    df['ano'] = df[date_column].dt.year
+    df['mes'] = df[date_column].dt.month
+    df['dia'] = df[date_column].dt.day
+    df['dia_semana'] = df[date_column].dt.dayofweek
+    df['dia_ano'] = df[date_column].dt.dayofyear
+    df['trimestre'] = df[date_column].dt.quarter
+    df['semana_mes'] = df[date_column].dt.day // 7 + 1
+    df['fim_semana'] = (df['dia_semana'] >= 5).astype(int)
+
+    # Features trigonométricas
+    df['mes_sin'] = np.sin(2 * np.pi * df['mes'] / 12)
+    df['mes_cos'] = np.cos(2 * np.pi * df['mes'] / 12)
+    df['dia_semana_sin'] = np.sin(2 * np.pi * df['dia_semana'] / 7)
+    df['dia_semana_cos'] = np.cos(2 * np.pi * df['dia_semana'] / 7)
+    return df
+
+
+def window_mean_std(windows):
+    """
+    Média e desvio padrão (ddof=1) de cada linha de uma matriz de janelas, ignorando NaN.
+
+    O cálculo depende apenas dos valores da janela, então o mesmo resultado é
+    obtido em lote (todas as janelas) ou incrementalmente (uma janela por vez).
+
+    Args:
+        windows: Matriz (n_janelas, tamanho_janela)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: (médias, desvios, observações válidas)
+    """
+    valid = ~np.isnan(windows)
+    count = valid.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(valid, windows, 0.0).sum(axis=1) / count
+        deviation = np.where(valid, windows - mean[:, None], 0.0)
+        std = np.sqrt((deviation * deviation).sum(axis=1) / (count - 1))
+    std[count < 2] = np.nan
+    return mean, std, count
+
+
+def rolling_mean_std(values, window, groups=None):
+    """
+    Média e desvio móveis (min_periods=1) calculados janela a janela, em blocos.
+
+    Com `groups` (códigos inteiros, contíguos por série), valores de outra
+    série dentro da janela são ignorados, como em um groupby().rolling().
+    """
+    padded = np.concatenate([np.full(window - 1, np.nan), np.asarray(values, dtype='float64')])
+    windows = sliding_window_view(padded, window)
+    if groups is not None:
+        padded_groups = np.concatenate([np.full(window - 1, -1), np.asarray(groups)])
+        group_windows = sliding_window_view(padded_groups, window)
+    means, stds, counts = [], [], []
+    for start in range(0, len(windows), ROLLING_CHUNK_SIZE):
+        chunk = windows[start:start + ROLLING_CHUNK_SIZE]
+        if groups is not None:
+            chunk_groups = group_windows[start:start + ROLLING_CHUNK_SIZE]
+            chunk = np.where(chunk_groups == chunk_groups[:, -1:], chunk, np.nan)
+        mean, std, count = window_mean_std(chunk)
+        means.append(mean)
+        stds.append(std)
+        counts.append(count)
+    if not means:
+        return np.empty(0), np.empty(0), np.empty(0, dtype=int)
+    return np.concatenate(means), np.concatenate(stds), np.concatenate(counts)
+
+
+def create_features(df, date_column, target_column, group_column=None):
+    """
+    Cria o conjunto completo de features a partir do histórico inteiro.
+
+    Args:
+        df: DataFrame com a coluna de data e a coluna alvo
+        date_column: Nome da coluna de data
+        target_column: Nome da coluna de demanda
+        group_column: Coluna que identifica cada série (SKU, loja) em dados empilhados
+
+    Returns:
+        pd.DataFrame: Histórico ordenado com as features, sem linhas incompletas
+    """
+    df = df.copy()
+    if group_column is None:
+        df = df.sort_values(date_column)
+        target = df[target_column]
+        codes = None
+    else:
+        # Séries contíguas: shifts e janelas em um único passe, sem laço por série
+        df = df.sort_values([group_column, date_column], kind='stable')
+        target = df.groupby(group_column, sort=False, observed=True)[target_column]
+        codes = target.ngroup().to_numpy()
+
+    add_calendar_features(df, date_column)
+
+    # Features de lag
+    for lag in LAG_FEATURES:
+        df[f'lag_{lag}'] = target.shift(lag)
+
+    # Médias móveis
+    full_means = {}
+    for window in ROLLING_WINDOWS:
+        mean, std, count = rolling_mean_std(df[target_column].to_numpy(dtype='float64'), window, codes)
+        df[f'media_movel_{window}'] = mean
+        df[f'std_movel_{window}'] = std
+        rolling = target.rolling(window=window, min_periods=1)
+        if group_column is None:
+            df[f'min_movel_{window}'] = rolling.min()
+            df[f'max_movel_{window}'] = rolling.max()
+        else:
+            df[f'min_movel_{window}'] = rolling.min().droplevel(0)
+            df[f'max_movel_{window}'] = rolling.max().droplevel(0)
+        full_means[window] = np.where(count >= window, mean, np.nan)
+
+    # Features de tendência
+    df['tendencia_3m'] = full_means[3] - full_means[6]
+    df['variacao_percentual'] = target.pct_change()
+
+    # Features de crescimento
+    previous, year_ago = target.shift(1), target.shift(12)
+    df['crescimento_mensal'] = (df[target_column] - previous) / previous
+    df['crescimento_anual'] = (df[target_column] - year_ago) / year_ago
+
+    df = df.replace([np.inf, -np.inf], np.nan)
+    df = df.dropna()
+
+    return df
+
+
+# ==============================
+# FEATURES INCREMENTAIS
+# ==============================
+
+class RollingWindowState:
+    """
+    Estado de uma janela móvel de tamanho fixo.
+
+    Mantém os últimos valores da janela (para média e desvio, recalculados
+    em O(tamanho da janela) com a mesma fórmula do lote) e deques
+    monotônicos para mínimo e máximo em O(1) amortizado.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.position = -1
+        self.values = deque([np.nan] * window, maxlen=window)
+        self.min_deque = deque()
+        self.max_deque = deque()
+
+    def push(self, value):
+        """Adiciona o valor mais recente da série."""
+        self.position += 1
+        self.values.append(value)
+
+        limit = self.position - self.window
+        while self.min_deque and self.min_deque[0][0] <= limit:
+            self.min_deque.popleft()
+        while self.max_deque and self.max_deque[0][0] <= limit:
+            self.max_deque.popleft()
+
+        if value == value:
+            while self.min_deque and self.min_deque[-1][1] >= value:
+                self.min_deque.pop()
+            self.min_deque.append((self.position, value))
+            while self.max_deque and self.max_deque[-1][1] <= value:
+                self.max_deque.pop()
+            self.max_deque.append((self.position, value))
+
+    def mean_std(self):
+        """Devolve (média, desvio, observações válidas) da janela atual."""
+        mean, std, count = window_mean_std(np.array(self.values, dtype='float64')[None, :])
+        return mean[0], std[0], count[0]
+
+    def min(self):
+        return self.min_deque[0][1] if self.min_deque else np.nan
+
+    def max(self):
+        return self.max_deque[0][1] if self.max_deque else np.nan
+
+
+class IncrementalFeatureStore:
+    """
+    Matriz de features que cresce apenas com as linhas novas.
+
+    `build` gera a matriz em lote (create_features) e captura o estado das
+    janelas móveis; `append` estende a matriz processando só os novos
+    registros, com o mesmo resultado que recalcular tudo do zero.
+    """
+
+    def __init__(self, date_column, target_column):
+        self.date_column = date_column
+        self.target_column = target_column
+        self.raw_columns = None
+        self.columns = None
+        self.dtypes = None
+        self.n_raw = 0
+        self.n_rows = 0
+        self.last_date = None
+        self.raw_fingerprint = None
+        self._buffers = {}
+        self._index = None
+        self._tail = deque(maxlen=MAX_LOOKBACK)
+        self._last_valid = np.nan
+        self._windows = {}
+        self._frame_cache = None
+
+    # ---------- construção em lote ----------
+
+    def build(self, df):
+        """Reconstrói a matriz inteira e o estado incremental a partir de `df`."""
+        features = create_features(df, self.date_column, self.target_column)
+        raw = df.sort_values(self.date_column)
+
+        self.raw_columns = list(df.columns)
+        self.columns = list(features.columns)
+        self.dtypes = features.dtypes.to_dict()
+        self.n_raw = len(df)
+        self.n_rows = len(features)
+        self.last_date = raw[self.date_column].iloc[-1] if len(raw) else None
+        self.raw_fingerprint = self._fingerprint(df)
+
+        capacity = max(16, self.n_rows * 2)
+        self._buffers = {}
+        for col in self.columns:
+            buffer = np.empty(capacity, dtype=features[col].to_numpy().dtype)
+            buffer[:self.n_rows] = features[col].to_numpy()
+            self._buffers[col] = buffer
+        self._index = np.empty(capacity, dtype=features.index.to_numpy().dtype)
+        self._index[:self.n_rows] = features.index.to_numpy()
+
+        # O estado das janelas só depende dos últimos MAX_LOOKBACK valores brutos
+        target = raw[self.target_column].to_numpy(dtype='float64')
+        history = target[-MAX_LOOKBACK:]
+        self._tail = deque(maxlen=MAX_LOOKBACK)
+        self._windows = {window: RollingWindowState(window) for window in ROLLING_WINDOWS}
+        for value in history:
+            self._push_target(value)
+        valid = target[~np.isnan(target)]
+        self._last_valid = valid[-1] if len(valid) else np.nan
+
+        self._frame_cache = features
+        return features
+
+    @staticmethod
+    def _fingerprint(df):
+        return int(pd.util.hash_pandas_object(df, index=True).to_numpy().sum(dtype=np.uint64))
+
+    def _push_target(self, value):
+        for state in self._windows.values():
+            state.push(value)
+        self._tail.append(value)
+
+    # ---------- atualização incremental ----------
+
+    def can_append(self, new_rows):
+        """Indica se `new_rows` pode ser anexado sem reordenar nem recalcular o histórico."""
+        if self.columns is None or list(new_rows.columns) != self.raw_columns:
+            return False
+        if new_rows[self.target_column].isna().any():
+            return False
+        dates = new_rows[self.date_column]
+        if dates.isna().any() or not dates.is_monotonic_increasing or dates.duplicated().any():
+            return False
+        return self.last_date is None or dates.iloc[0] > self.last_date
+
+    def append(self, new_rows):
+        """
+        Estende a matriz de features processando apenas `new_rows`.
+
+        Args:
+            new_rows: Registros novos, posteriores ao último registro conhecido
+
+        Returns:
+            int: Quantidade de linhas acrescentadas à matriz (linhas incompletas são descartadas)
+        """
+        if not self.can_append(new_rows):
+            raise ValueError("Os novos registros não podem ser anexados incrementalmente")
+
+        calendar = add_calendar_features(
+            pd.DataFrame({self.date_column: new_rows[self.date_column].to_numpy()}), self.date_column
+        )
+        target = new_rows[self.target_column].to_numpy(dtype='float64')
+        index = new_rows.index.to_numpy()
+
+        n_rows_before = self.n_rows
+        for i in range(len(new_rows)):
+            value = target[i]
+            previous = self._tail[-1] if self._tail else np.nan
+            row = {col: new_rows[col].iat[i] for col in self.raw_columns}
+            row.update({col: calendar[col].iat[i] for col in calendar.columns if col != self.date_column})
+
+            for lag in LAG_FEATURES:
+                row[f'lag_{lag}'] = self._tail[-lag] if len(self._tail) >= lag else np.nan
+
+            self._push_target(value)
+            full_means = {}
+            for window, state in self._windows.items():
+                mean, std, count = state.mean_std()
+                row[f'media_movel_{window}'] = mean
+                row[f'std_movel_{window}'] = std
+                row[f'min_movel_{window}'] = state.min()
+                row[f'max_movel_{window}'] = state.max()
+                full_means[window] = mean if count >= window else np.nan
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                row['tendencia_3m'] = full_means[3] - full_means[6]
+                # pct_change preenche lacunas com o último valor válido
+                row['variacao_percentual'] = value / self._last_valid - 1
+                row['crescimento_mensal'] = (value - previous) / previous
+                lag_12 = row['lag_12']
+                row['crescimento_anual'] = (value - lag_12) / lag_12
+            self._last_valid = value
+
+            self._store_row(row, index[i])
+
+        self.n_raw += len(new_rows)
+        self.last_date = new_rows[self.date_column].iloc[-1]
+        if self.raw_fingerprint is not None:
+            # O hash é a soma dos hashes por linha, então basta somar o das linhas novas
+            self.raw_fingerprint = (self.raw_fingerprint + self._fingerprint(new_rows)) % 2 ** 64
+        self._frame_cache = None
+        return self.n_rows - n_rows_before
+
+    def _store_row(self, row, label):
+        values = {}
+        for col in self.columns:
+            value = row[col]
+            # Mesmo critério do lote: infinitos viram NaN e linhas incompletas são descartadas
+            if pd.isna(value) or (isinstance(value, (float, np.floating)) and np.isinf(value)):
+                return
+            values[col] = value
+
+        if self.n_rows == len(self._index):
+            self._grow()
+        for col, value in values.items():
+            self._buffers[col][self.n_rows] = value
+        self._index[self.n_rows] = label
+        self.n_rows += 1
+
+    def _grow(self):
+        capacity = len(self._index) * 2
+        for col, buffer in self._buffers.items():
+            grown = np.empty(capacity, dtype=buffer.dtype)
+            grown[:self.n_rows] = buffer[:self.n_rows]
+            self._buffers[col] = grown
+        grown = np.empty(capacity, dtype=self._index.dtype)
+        grown[:self.n_rows] = self._index[:self.n_rows]
+        self._index = grown
+
+    def update(self, df):
+        """
+        Devolve a matriz de features para `df`, anexando só o que for novo.
+
+        Se `df` for o mesmo histórico já processado acrescido de registros
+        posteriores, apenas esses registros são processados; caso contrário a
+        matriz é reconstruída em lote.
+        """
+        if self.columns is not None and len(df) >= self.n_raw and list(df.columns) == self.raw_columns:
+            prefix, new_rows = df.iloc[:self.n_raw], df.iloc[self.n_raw:]
+            if self._fingerprint(prefix) == self.raw_fingerprint:
+                if len(new_rows) == 0:
+                    return self.frame
+                if self.can_append(new_rows):
+                    self.append(new_rows)
+                    return self.frame
+        return self.build(df)
+
+    @property
+    def frame(self):
+        """Matriz de features atual como DataFrame (mesmo formato de create_features)."""
+        if self._frame_cache is None:
+            n = self.n_rows
+            self._frame_cache = pd.DataFrame(
+                {col: pd.Series(self._buffers[col][:n], dtype=self.dtypes[col], copy=False) for col in self.columns},
+            )
+            self._frame_cache.index = pd.Index(self._index[:n])
+        return self._frame_cache
+
+
+# ==============================
+# TREINAMENTO PARALELO
+# ==============================
+
+MODEL_NAMES = [
+    'Linear Regression', 'Ridge Regression', 'Lasso Regression',
+    'Random Forest', 'Gradient Boosting', 'XGBoost'
+]
+
+
+def make_model(name, n_jobs=1, params=None):
+    """
+    Cria um modelo com os hiperparâmetros padrão do sistema.
+
+    Args:
+        name: Nome do modelo (um de MODEL_NAMES)
+        n_jobs: Threads que o modelo pode usar (Random Forest e XGBoost)
+        params: Hiperparâmetros que substituem os padrões (ex.: vindos do ajuste)
+
+    Returns:
+        Estimador scikit-learn não treinado
+    """
+    if name == 'Linear Regression':
+        model = LinearRegression()
+    elif name == 'Ridge Regression':
+        model = Ridge(alpha=1.0)
+    elif name == 'Lasso Regression':
+        model = Lasso(alpha=1.0)
+    elif name == 'Random Forest':
+        model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=n_jobs)
+    elif name == 'Gradient Boosting':
+        model = GradientBoostingRegressor(n_estimators=100, random_state=42)
+    elif name == 'XGBoost':
+        model = xgb.XGBRegressor(n_estimators=100, random_state=42, verbosity=0, n_jobs=n_jobs)
+    else:
+        raise ValueError(f"Modelo desconhecido: {name}")
+    if params:
+        model.set_params(**params)
+    return model
+
+
+def fit_and_evaluate(name, model, X_train, y_train, X_val, y_val, X_test, threads=1):
+    """
+    Treina um modelo e calcula as métricas de validação (executado em um worker).
+
+    Args:
+        name: Nome do modelo
+        model: Estimador não treinado
+        X_train, y_train: Conjunto de treino
+        X_val, y_val: Conjunto de validação
+        X_test: Features do conjunto de teste
+        threads: Limite de threads BLAS/OpenMP para este modelo
+
+    Returns:
+        Tuple[str, dict]: (nome, resultado no formato de `results`)
+    """
+    with threadpool_limits(limits=threads):
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        y_pred_val = model.predict(X_val)
+        y_pred_test = model.predict(X_test)
+        predict_time = time.perf_counter() - start
+
+    return name, {
+        'model': model,
+        'mae': mean_absolute_error(y_val, y_pred_val),
+        'rmse': np.sqrt(mean_squared_error(y_val, y_pred_val)),
+        'mape': mean_absolute_percentage_error(y_val, y_pred_val) * 100,
+        'r2': r2_score(y_val, y_pred_val),
+        'predictions_val': y_pred_val,
+        'predictions_test': y_pred_test,
+        'fit_time': fit_time,
+        'predict_time': predict_time
+    }
+
+
+def train_models(model_names, X_train, y_train, X_val, y_val, X_test,
+                 max_workers=1, threads_per_model=None, on_complete=None, params=None):
+    """
+    Treina vários modelos em paralelo num pool de processos.
+
+    Args:
+        model_names: Modelos a treinar (nomes de MODEL_NAMES)
+        X_train, y_train, X_val, y_val, X_test: Conjuntos de dados
+        max_workers: Processos simultâneos (1 treina no próprio processo)
+        threads_per_model: Threads por modelo (padrão: CPUs divididas entre os workers)
+        on_complete: Função chamada como on_complete(nome, resultado, concluídos, total)
+            assim que cada modelo termina
+        params: dict nome -> hiperparâmetros que substituem os padrões
+
+    Returns:
+        dict: nome do modelo -> resultado, na ordem de `model_names`
+    """
+    model_names = list(model_names)
+    params = params or {}
+    workers = max(1, min(max_workers, len(model_names)))
+    threads = threads_per_model or threads_por_worker(workers)
+    results = {}
+
+    def collect(name, result):
+        results[name] = result
+        if on_complete is not None:
+            on_complete(name, result, len(results), len(model_names))
+
+    if workers == 1:
+        for name in model_names:
+            collect(*fit_and_evaluate(name, make_model(name, threads, params.get(name)), X_train, y_train,
+                                      X_val, y_val, X_test, threads))
+    else:
+        with criar_pool_processos(workers) as pool:
+            futures = [
+                pool.submit(fit_and_evaluate, name, make_model(name, threads, params.get(name)), X_train, y_train,
+                            X_val, y_val, X_test, threads)
+                for name in model_names
+            ]
+            for future in as_completed(futures):
+                collect(*future.result())
+
+    return {name: results[name] for name in model_names}
+
+
+# ==============================
+# PREVISÃO RECURSIVA
+# ==============================
+
+class RecursiveForecaster:
+    """
+    Previsão recursiva de vários passos com estado em NumPy.
+
+    Mantém um buffer circular com os últimos valores da série e atualiza
+    lags, médias/desvios/mínimos/máximos móveis e taxas de crescimento a
+    cada passo, em custo constante. Várias trajetórias (modelos diferentes
+    e/ou pontos de origem diferentes) avançam juntas: cada passo monta uma
+    única matriz pré-alocada e chama `predict` uma vez por modelo.
+
+    As features que no histórico usam o próprio valor do período (médias
+    móveis, tendência, variação e crescimento) são calculadas com a série
+    até o último valor conhecido, que no futuro é a previsão anterior.
+    """
+
+    def __init__(self, history, feature_columns, date_column, target_column, freq='MS', group_column=None):
+        sort_columns = [date_column] if group_column is None else [group_column, date_column]
+        self.history = history.sort_values(sort_columns, kind='stable').reset_index(drop=True)
+        self.feature_columns = list(feature_columns)
+        self.date_column = date_column
+        self.target_column = target_column
+        self.group_column = group_column
+        self.freq = freq
+        self.buffer_size = MAX_LOOKBACK + 1
+        self._positions = {col: i for i, col in enumerate(self.feature_columns)}
+        if group_column is None:
+            self._codes = np.zeros(len(self.history), dtype=int)
+        else:
+            self._codes = self.history.groupby(group_column, sort=False, observed=True).ngroup().to_numpy()
+
+    def series_ends(self):
+        """Posição final (exclusiva) de cada série no histórico ordenado."""
+        return np.append(np.flatnonzero(np.diff(self._codes)) + 1, len(self.history))
+
+    def series_keys(self, origins):
+        """Identificador da série de cada origem (None sem coluna de série)."""
+        if self.group_column is None:
+            return [None] * len(origins)
+        return self.history[self.group_column].to_numpy()[np.asarray(origins) - 1]
+
+    def _future_dates(self, origin_dates, horizon):
+        # Séries empilhadas costumam terminar na mesma data: um date_range por data distinta
+        offset = pd.tseries.frequencies.to_offset(self.freq)
+        unique_dates, inverse = np.unique(origin_dates, return_inverse=True)
+        ranges = np.array([
+            pd.date_range(start=date + offset, periods=horizon, freq=self.freq).to_numpy()
+            for date in pd.DatetimeIndex(unique_dates)
+        ])
+        return ranges[inverse]
+
+    def forecast(self, models, horizon, origins=None, clip_negative=True):
+        """
+        Gera previsões recursivas para um ou mais modelos.
+
+        Args:
+            models: dict nome -> modelo treinado
+            horizon: Número de passos à frente
+            origins: Posições do histórico onde cada previsão começa (padrão: fim de cada série)
+            clip_negative: Substitui previsões negativas por zero
+
+        Returns:
+            Tuple[dict, np.ndarray]: (nome -> previsões (origens, passos), datas (origens, passos))
+        """
+        names = list(models)
+        origins = self.series_ends() if origins is None else np.asarray(origins)
+        n_origins = len(origins)
+        blocks = [(models[name], slice(m * n_origins, (m + 1) * n_origins)) for m, name in enumerate(names)]
+        predictions, dates = self._rollout(origins, len(names), blocks, horizon, clip_negative)
+        return {name: predictions[block] for name, (_, block) in zip(names, blocks)}, dates
+
+    def forecast_each(self, models, horizon, origins=None, clip_negative=True):
+        """
+        Gera previsões com um modelo diferente para cada origem (ex.: um modelo por série).
+
+        Args:
+            models: Modelos treinados, um por origem
+            horizon: Número de passos à frente
+            origins: Posições do histórico onde cada previsão começa (padrão: fim de cada série)
+            clip_negative: Substitui previsões negativas por zero
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (previsões (origens, passos), datas (origens, passos))
+        """
+        origins = self.series_ends() if origins is None else np.asarray(origins)
+        blocks = [(model, slice(i, i + 1)) for i, model in enumerate(models)]
+        return self._rollout(origins, 1, blocks, horizon, clip_negative)
+
+    def _rollout(self, origins, copies, blocks, horizon, clip_negative):
+        """Avança `copies` trajetórias por origem; cada bloco de linhas é previsto pelo seu modelo."""
+        n_origins = len(origins)
+        n_paths = n_origins * copies
+        size = self.buffer_size
+
+        # Buffer circular (trajetórias x valores); a posição `head` guarda o valor mais recente.
+        # Valores de outra série que caiam na janela inicial viram NaN.
+        target = self.history[self.target_column].to_numpy(dtype='float64')
+        padded = np.concatenate([np.full(size, np.nan), target])
+        padded_codes = np.concatenate([np.full(size, -1), self._codes])
+        positions = origins[:, None] + np.arange(size)
+        windows, window_codes = padded[positions], padded_codes[positions]
+        windows[window_codes != window_codes[:, -1:]] = np.nan
+        buffer = np.tile(windows, (copies, 1))
+        head = size - 1
+
+        dates = self._future_dates(self.history[self.date_column].to_numpy()[origins - 1], horizon)
+        calendar = add_calendar_features(pd.DataFrame({self.date_column: dates.ravel()}), self.date_column)
+
+        # Matriz pré-alocada; colunas exógenas ficam fixas no último valor conhecido
+        X = np.zeros((n_paths, len(self.feature_columns)))
+        generated = set(calendar.columns) | {f'lag_{lag}' for lag in LAG_FEATURES}
+        for col, pos in self._positions.items():
+            if col not in generated and col in self.history.columns:
+                X[:, pos] = np.tile(self.history[col].to_numpy(dtype='float64')[origins - 1], copies)
+
+        calendar_cols = [col for col in calendar.columns if col in self._positions and col != self.date_column]
+        calendar_values = calendar[calendar_cols].to_numpy(dtype='float64').reshape(n_origins, horizon, -1)
+        calendar_pos = [self._positions[col] for col in calendar_cols]
+        lag_pos = [(self._positions[f'lag_{lag}'], lag) for lag in LAG_FEATURES if f'lag_{lag}' in self._positions]
+
+        predictions = np.empty((n_paths, horizon))
+        rows = np.arange(n_paths)
+
+        for step in range(horizon):
+            X[:, calendar_pos] = np.tile(calendar_values[:, step, :], (copies, 1))
+
+            # lag_k no passo t é o valor de t-k: o mais recente no buffer é t-1
+            for pos, lag in lag_pos:
+                X[:, pos] = buffer[:, (head - lag + 1) % size]
+
+            full_means = {}
+            for window in ROLLING_WINDOWS:
+                window_values = buffer[:, (head - np.arange(window - 1, -1, -1)) % size]
+                mean, std, count = window_mean_std(window_values)
+                with np.errstate(all='ignore'):
+                    stats = {
+                        f'media_movel_{window}': mean,
+                        f'std_movel_{window}': std,
+                        f'min_movel_{window}': np.nanmin(window_values, axis=1),
+                        f'max_movel_{window}': np.nanmax(window_values, axis=1),
+                    }
+                for col, values in stats.items():
+                    if col in self._positions:
+                        X[:, self._positions[col]] = values
+                full_means[window] = np.where(count >= window, mean, np.nan)
+
+            last = buffer[:, head]
+            previous = buffer[:, (head - 1) % size]
+            year_ago = buffer[:, (head - 12) % size]
+            with np.errstate(all='ignore'):
+                derived = {
+                    'tendencia_3m': full_means[3] - full_means[6],
+                    'variacao_percentual': last / previous - 1,
+                    'crescimento_mensal': (last - previous) / previous,
+                    'crescimento_anual': (last - year_ago) / year_ago,
+                }
+            for col, values in derived.items():
+                if col in self._positions:
+                    X[:, self._positions[col]] = values
+            np.nan_to_num(X, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+
+            # Predição direto no array: a validação de DataFrame custaria mais que o próprio modelo
+            with warnings.catch_warnings():
+                warnings.filterwarnings('ignore', message='X does not have valid feature names')
+                for model, block in blocks:
+                    predictions[block, step] = model.predict(X[block])
+            if clip_negative:
+                np.maximum(predictions[:, step], 0, out=predictions[:, step])
+
+            head = (head + 1) % size
+            buffer[rows, head] = predictions[:, step]
+
+        return predictions, dates
+
+
+# ==============================
+# VÁRIAS SÉRIES (SKU / LOJA)
+# ==============================
+
+MIN_SERIES_ROWS = 3
+SERIES_STRATEGIES = ['global', 'por_serie']
+
+
+def prepare_series(df, date_column, target_column, group_column):
+    """Deixa um registro por (série, data), somando lançamentos repetidos."""
+    return (
+        df.groupby([group_column, date_column], sort=True, observed=True)[target_column]
+        .sum(min_count=1)
+        .reset_index()
+    )
+
+
+def _forecast_table(keys, dates, predictions, date_column, group_column):
+    horizon = dates.shape[1]
+    return pd.DataFrame({
+        group_column: np.repeat(keys, horizon),
+        date_column: dates.ravel(),
+        'previsao': predictions.ravel()
+    })
+
+
+def fit_forecast_series(model_name, history, features, feature_columns, date_column,
+                        target_column, group_column, horizon, threads=1):
+    """
+    Treina um modelo por série e gera as previsões de um bloco de séries (executado em um worker).
+
+    Returns:
+        pd.DataFrame: Previsões do bloco no formato da tabela consolidada
+    """
+    models = {}
+    with threadpool_limits(limits=threads):
+        for key, series_features in features.groupby(group_column, sort=False, observed=True):
+            models[key] = make_model(model_name, threads)
+            models[key].fit(series_features[feature_columns], series_features[target_column])
+
+        # Uma única passada recursiva para o bloco, cada série com o seu modelo
+        engine = RecursiveForecaster(history, feature_columns, date_column, target_column,
+                                     group_column=group_column)
+        origins = engine.series_ends()
+        keys = engine.series_keys(origins)
+        predictions, dates = engine.forecast_each([models[key] for key in keys], horizon, origins)
+    return _forecast_table(keys, dates, predictions, date_column, group_column)
+
+
+def forecast_many_series(df, date_column, target_column, group_column, model_name, horizon,
+                         strategy='global', max_workers=1, threads_per_model=None, on_progress=None):
+    """
+    Prevê todas as séries de um arquivo empilhado (uma linha por série e data).
+
+    Args:
+        df: DataFrame com as colunas de data, demanda e série
+        date_column, target_column, group_column: Nomes das colunas
+        model_name: Modelo a usar (um de MODEL_NAMES)
+        horizon: Número de períodos à frente
+        strategy: 'global' (um modelo para todas as séries, previstas juntas)
+            ou 'por_serie' (um modelo por série, em blocos distribuídos no pool)
+        max_workers: Processos simultâneos no modo por série
+        threads_per_model: Threads por modelo (padrão: CPUs divididas entre os workers)
+        on_progress: Função chamada como on_progress(séries concluídas, total)
+
+    Returns:
+        Tuple[pd.DataFrame, dict]: (tabela consolidada de previsões, estatísticas da execução)
+    """
+    if strategy not in SERIES_STRATEGIES:
+        raise ValueError(f"Estratégia desconhecida: {strategy}")
+
+    start = time.perf_counter()
+    history = prepare_series(df, date_column, target_column, group_column)
+    features = create_features(history, date_column, target_column, group_column)
+
+    # Séries curtas demais não geram linhas completas suficientes para treinar
+    counts = features[group_column].value_counts()
+    eligible = counts.index[counts >= MIN_SERIES_ROWS]
+    total_series = history[group_column].nunique()
+    history = history[history[group_column].isin(eligible)]
+    features = features[features[group_column].isin(eligible)]
+    feature_columns = [col for col in features.columns if col not in (date_column, target_column, group_column)]
+    keys = features[group_column].unique()
+    n_series = len(keys)
+
+    if n_series == 0:
+        raise ValueError(f"Nenhuma série tem histórico suficiente (mínimo de {MAX_LOOKBACK + MIN_SERIES_ROWS} períodos)")
+
+    if strategy == 'global':
+        threads = threads_per_model or threads_por_worker(1)
+        with threadpool_limits(limits=threads):
+            model = make_model(model_name, threads)
+            model.fit(features[feature_columns], features[target_column])
+            engine = RecursiveForecaster(history, feature_columns, date_column, target_column,
+                                         group_column=group_column)
+            origins = engine.series_ends()
+            predictions, dates = engine.forecast({model_name: model}, horizon, origins)
+        tables = [_forecast_table(engine.series_keys(origins), dates, predictions[model_name],
+                                  date_column, group_column)]
+        if on_progress is not None:
+            on_progress(n_series, n_series)
+    else:
+        workers = max(1, min(max_workers, n_series))
+        threads = threads_per_model or threads_por_worker(workers)
+        chunks = np.array_split(keys, min(n_series, workers * 4))
+        tables, done = [], 0
+
+        def args_for(chunk):
+            in_chunk = history[group_column].isin(chunk)
+            return (model_name, history[in_chunk], features[features[group_column].isin(chunk)],
+                    feature_columns, date_column, target_column, group_column, horizon, threads)
+
+        def collect(table):
+            nonlocal done
+            tables.append(table)
+            done += table[group_column].nunique()
+            if on_progress is not None:
+                on_progress(done, n_series)
+
+        if workers == 1:
+            for chunk in chunks:
+                collect(fit_forecast_series(*args_for(chunk)))
+        else:
+            with criar_pool_processos(workers) as pool:
+                futures = [pool.submit(fit_forecast_series, *args_for(chunk)) for chunk in chunks]
+                for future in as_completed(futures):
+                    collect(future.result())
+
+    table = pd.concat(tables, ignore_index=True).sort_values([group_column, date_column], kind='stable')
+    elapsed = time.perf_counter() - start
+    stats = {
+        'series': n_series,
+        'skipped': total_series - n_series,
+        'rows': len(features),
+        'time': elapsed,
+        'series_per_second': n_series / elapsed if elapsed > 0 else float('inf'),
+    }
+    return table.reset_index(drop=True), stats
+
+
+# ==============================
+# BACKTESTING WALK-FORWARD
+# ==============================
+
+BACKTEST_MODES = ['expanding', 'sliding']
+
+# Matriz de features do backtest em cada worker (enviada uma vez pelo initializer do pool)
+_backtest_data = {}
+
+
+def _set_backtest_data(X, y):
+    _backtest_data['X'] = X
+    _backtest_data['y'] = y
+
+
+def backtest_splits(n_samples, n_splits=5, mode='expanding', window=None, test_size=None, gap=0):
+    """
+    Índices de treino e teste de cada fold do walk-forward.
+
+    Args:
+        n_samples: Número de linhas da matriz de features
+        n_splits: Número de folds
+        mode: 'expanding' (treino cresce a cada fold) ou 'sliding' (janela fixa)
+        window: Tamanho da janela de treino no modo 'sliding'
+        test_size: Linhas de teste por fold (padrão: n_samples // (n_splits + 1))
+        gap: Linhas descartadas entre treino e teste
+
+    Returns:
+        list[Tuple[np.ndarray, np.ndarray]]: (índices de treino, índices de teste) por fold
+    """
+    if mode not in BACKTEST_MODES:
+        raise ValueError(f"Modo de backtest desconhecido: {mode}")
+    max_train_size = window if mode == 'sliding' else None
+    splitter = TimeSeriesSplit(n_splits=n_splits, max_train_size=max_train_size, test_size=test_size, gap=gap)
+    return list(splitter.split(np.arange(n_samples)))
+
+
+def backtest_fold(name, fold, train_index, test_index, threads=1, params=None):
+    """
+    Treina e avalia um modelo em um fold usando a matriz compartilhada (executado em um worker).
+
+    Returns:
+        dict: Métricas e tempos do fold
+    """
+    start_wall = time.perf_counter()
+    X, y = _backtest_data['X'], _backtest_data['y']
+    y_test = y.iloc[test_index]
+
+    with threadpool_limits(limits=threads):
+        model = make_model(name, threads, params)
+        start = time.perf_counter()
+        model.fit(X.iloc[train_index], y.iloc[train_index])
+        fit_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        y_pred = model.predict(X.iloc[test_index])
+        predict_time = time.perf_counter() - start
+
+    return {
+        'model': name,
+        'fold': fold,
+        'train_size': len(train_index),
+        'test_size': len(test_index),
+        'train_end': y.index[train_index[-1]],
+        'test_start': y.index[test_index[0]],
+        'test_end': y.index[test_index[-1]],
+        'mae': mean_absolute_error(y_test, y_pred),
+        'rmse': np.sqrt(mean_squared_error(y_test, y_pred)),
+        'mape': mean_absolute_percentage_error(y_test, y_pred) * 100,
+        'fit_time': fit_time,
+        'predict_time': predict_time,
+        'wall_time': time.perf_counter() - start_wall,
+    }
+
+
+def walk_forward_backtest(model_names, X, y, n_splits=5, mode='expanding', window=None,
+                          test_size=None, gap=0, max_workers=1, threads_per_model=None,
+                          on_complete=None):
+    """
+    Avalia os modelos em vários folds walk-forward, em paralelo.
+
+    A matriz de features é calculada uma única vez e reaproveitada em todos
+    os folds: cada worker a recebe ao iniciar e as tarefas enviam só os índices.
+
+    Args:
+        model_names: Modelos a avaliar (nomes de MODEL_NAMES)
+        X, y: Features e alvo já processados, em ordem cronológica
+        n_splits, mode, window, test_size, gap: Definição dos folds (ver backtest_splits)
+        max_workers: Processos simultâneos (1 executa no próprio processo)
+        threads_per_model: Threads por modelo (padrão: CPUs divididas entre os workers)
+        on_complete: Função chamada como on_complete(resultado do fold, concluídos, total)
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame, float]: (métricas por fold, resumo por modelo,
+        tempo total em segundos)
+    """
+    start = time.perf_counter()
+    splits = backtest_splits(len(X), n_splits, mode, window, test_size, gap)
+    tasks = [(name, fold, train_index, test_index)
+             for name in model_names
+             for fold, (train_index, test_index) in enumerate(splits, start=1)]
+    workers = max(1, min(max_workers, len(tasks)))
+    threads = threads_per_model or threads_por_worker(workers)
+    folds = []
+
+    def collect(result):
+        folds.append(result)
+        if on_complete is not None:
+            on_complete(result, len(folds), len(tasks))
+
+    if workers == 1:
+        _set_backtest_data(X, y)
+        try:
+            for task in tasks:
+                collect(backtest_fold(*task, threads))
+        finally:
+            _backtest_data.clear()
+    else:
+        with criar_pool_processos(workers, initializer=_set_backtest_data, initargs=(X, y)) as pool:
+            futures = [pool.submit(backtest_fold, *task, threads) for task in tasks]
+            for future in as_completed(futures):
+                collect(future.result())
+
+    order = {name: i for i, name in enumerate(model_names)}
+    folds = pd.DataFrame(sorted(folds, key=lambda result: (order[result['model']], result['fold'])))
+    summary = folds.groupby('model', sort=False).agg(
+        mae=('mae', 'mean'), mae_std=('mae', 'std'),
+        rmse=('rmse', 'mean'), rmse_std=('rmse', 'std'),
+        mape=('mape', 'mean'), mape_std=('mape', 'std'),
+        fit_time=('fit_time', 'sum'), wall_time=('wall_time', 'sum'),
+    )
+    return folds, summary, time.perf_counter() - start
+
+
+# ==============================
+# AJUSTE DE HIPERPARÂMETROS
+# ==============================
+
+PARAM_SPACES = {
+    'Ridge Regression': {'alpha': [0.01, 0.1, 1.0, 10.0, 100.0]},
+    'Lasso Regression': {'alpha': [0.001, 0.01, 0.1, 1.0, 10.0]},
+    'Random Forest': {
+        'n_estimators': [50, 100, 200, 400],
+        'max_depth': [None, 4, 8, 16],
+        'min_samples_leaf': [1, 2, 4],
+    },
+    'Gradient Boosting': {
+        'n_estimators': [50, 100, 200],
+        'learning_rate': [0.03, 0.1, 0.3],
+        'max_depth': [2, 3, 5],
+        'subsample': [0.7, 1.0],
+    },
+    'XGBoost': {
+        'n_estimators': [100, 200, 400],
+        'learning_rate': [0.03, 0.1, 0.3],
+        'max_depth': [3, 4, 6, 8],
+        'subsample': [0.7, 1.0],
+        'colsample_bytree': [0.7, 1.0],
+    },
+}
+
+
+def sample_candidates(name, n_candidates, random_state=42):
+    """Configurações a testar: a padrão primeiro, depois amostras aleatórias do espaço."""
+    candidates = [{}]
+    if name in PARAM_SPACES and n_candidates > 1:
+        sampler = ParameterSampler(PARAM_SPACES[name], n_iter=n_candidates - 1, random_state=random_state)
+        with warnings.catch_warnings():
+            # Espaços menores que n_candidates são percorridos inteiros
+            warnings.simplefilter('ignore', UserWarning)
+            candidates += [params for params in sampler]
+    return candidates
+
+
+def tune_models(model_names, X_train, y_train, X_val, y_val, X_test, time_budget,
+                n_candidates=12, n_splits=4, eta=2, max_workers=1, threads_per_model=None,
+                random_state=42, on_progress=None):
+    """
+    Busca aleatória com successive halving sobre os folds, limitada por tempo.
+
+    Os folds do TimeSeriesSplit (do mais recente para o mais antigo) são o
+    recurso da halving: a cada rodada todos os candidatos sobreviventes são
+    avaliados em mais um fold, em paralelo, e só a melhor fração 1/eta de
+    cada modelo (pelo MAPE médio parcial) segue adiante. Quando o orçamento
+    acaba, as avaliações pendentes são canceladas e vence o melhor candidato
+    entre os que chegaram mais longe. A configuração padrão é sempre
+    candidata, então o ajuste nunca escolhe algo pior que ela na validação cruzada.
+
+    Args:
+        model_names: Modelos a ajustar (nomes de MODEL_NAMES)
+        X_train, y_train, X_val, y_val, X_test: Conjuntos de dados (busca usa só o treino)
+        time_budget: Tempo máximo da busca, em segundos
+        n_candidates: Configurações sorteadas por modelo (incluindo a padrão)
+        n_splits: Folds do TimeSeriesSplit dentro do treino
+        eta: Fator de corte a cada rodada
+        max_workers: Processos simultâneos
+        threads_per_model: Threads por modelo (padrão: CPUs divididas entre os workers)
+        random_state: Semente do sorteio das configurações
+        on_progress: Função chamada como on_progress(rodada, total de rodadas, avaliações)
+
+    Returns:
+        Tuple[dict, pd.DataFrame, dict]: (resultados no formato de `train_models`, com
+        'params' e 'cv_mape'; histórico de avaliações; estatísticas da busca)
+    """
+    start = time.perf_counter()
+    deadline = start + time_budget
+    model_names = list(model_names)
+    splits = backtest_splits(len(X_train), n_splits)[::-1]
+    candidates = {name: sample_candidates(name, n_candidates, random_state) for name in model_names}
+    survivors = {name: list(range(len(cands))) for name, cands in candidates.items() if len(cands) > 1}
+    scores = {(name, i): [] for name, cands in candidates.items() for i in range(len(cands))}
+    history = []
+    workers = max(1, min(max_workers, sum(len(ids) for ids in survivors.values()) or 1))
+    threads = threads_per_model or threads_por_worker(workers)
+    budget_exhausted = False
+
+    def record(name, i, rung, result):
+        scores[(name, i)].append(result['mape'])
+        history.append({'model': name, 'candidate': i, 'params': candidates[name][i], 'rung': rung,
+                        'fold': result['fold'], 'mape': result['mape'], 'fit_time': result['fit_time']})
+
+    pool = criar_pool_processos(workers, _set_backtest_data, (X_train, y_train)) if workers > 1 else None
+    if pool is None:
+        _set_backtest_data(X_train, y_train)
+    try:
+        for rung, (train_index, test_index) in enumerate(splits, start=1):
+            tasks = [(name, i) for name, ids in survivors.items() for i in ids]
+            if not tasks or time.perf_counter() >= deadline:
+                budget_exhausted = bool(tasks)
+                break
+
+            if pool is None:
+                for name, i in tasks:
+                    if time.perf_counter() >= deadline:
+                        budget_exhausted = True
+                        break
+                    record(name, i, rung, backtest_fold(name, rung, train_index, test_index,
+                                                        threads, candidates[name][i]))
+            else:
+                futures = {
+                    pool.submit(backtest_fold, name, rung, train_index, test_index,
+                                threads, candidates[name][i]): (name, i)
+                    for name, i in tasks
+                }
+                pending = set(futures)
+                while pending:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        budget_exhausted = True
+                        break
+                    done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record(*futures[future], rung, future.result())
+                for future in pending:
+                    future.cancel()
+
+            # Poda: só os candidatos que completaram a rodada disputam; fica a melhor fração 1/eta
+            for name, ids in survivors.items():
+                evaluated = sorted((i for i in ids if len(scores[(name, i)]) == rung),
+                                   key=lambda i: np.mean(scores[(name, i)]))
+                survivors[name] = evaluated[:max(1, int(np.ceil(len(evaluated) / eta)))]
+
+            if on_progress is not None:
+                on_progress(rung, len(splits), len(history))
+            if budget_exhausted:
+                break
+    finally:
+        if pool is None:
+            _backtest_data.clear()
+        else:
+            # Avaliações que passaram do orçamento são interrompidas: não
+            # podem disputar as CPUs com o treino final
+            encerrar_pool_processos(pool)
+
+    best_params, cv_mape = {}, {}
+    for name in model_names:
+        evaluated = [i for i in range(len(candidates[name])) if scores[(name, i)]]
+        if not evaluated:
+            best_params[name], cv_mape[name] = {}, np.nan
+            continue
+        depth = max(len(scores[(name, i)]) for i in evaluated)
+        best = min((i for i in evaluated if len(scores[(name, i)]) == depth),
+                   key=lambda i: np.mean(scores[(name, i)]))
+        best_params[name], cv_mape[name] = candidates[name][best], float(np.mean(scores[(name, best)]))
+
+    search_time = time.perf_counter() - start
+
+    # Treino final com a melhor configuração de cada modelo, no formato de `results`
+    results = train_models(model_names, X_train, y_train, X_val, y_val, X_test,
+                           max_workers=max_workers, threads_per_model=threads_per_model,
+                           params=best_params)
+    for name, result in results.items():
+        result['params'] = best_params[name]
+        result['cv_mape'] = cv_mape[name]
+
+    stats = {
+        'search_time': search_time,
+        'total_time': time.perf_counter() - start,
+        'evaluations': len(history),
+        'candidates': sum(len(cands) for cands in candidates.values()),
+        'budget_exhausted': budget_exhausted,
+    }
+    return results, pd.DataFrame(history), stats
@@ -0,0 +1,325 @@
+"""
+MODEL_REGISTRY.PY - Registro Persistente de Modelos
+===================================================
+Guarda em disco os modelos treinados, o scaler, a ordem das features e as
+métricas, indexados pelo hash do conjunto de dados e da configuração de
+treinamento. Um upload idêntico recarrega os modelos em vez de treinar de
+novo, mesmo após atualizar a página ou reiniciar o servidor.
+
+Cada entrada é um diretório:
+    manifest.json        -> features, métricas e arquivos de cada modelo
+    scaler.joblib        -> StandardScaler ajustado no treino
+    features.joblib      -> conjunto processado (features + alvo), para não recalculá-lo
+    <modelo>.json        -> XGBoost no formato nativo
+    <modelo>.joblib      -> demais estimadores scikit-learn
+    <modelo>.result.joblib -> métricas e predições de validação/teste
+    .lock                -> trava das gravações do manifest
+
+O horário de modificação do manifest marca o último acesso; quando o
+diretório passa do orçamento de disco, as entradas usadas há mais tempo
+são removidas primeiro.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import joblib
+import sklearn
+import xgboost as xgb
+
+try:
+    import fcntl
+except ImportError:  # Windows: só a trava entre as sessões do mesmo servidor
+    fcntl = None
+
+from config import dataset_fingerprint
+from forecasting import LAG_FEATURES, ROLLING_WINDOWS
+
+DEFAULT_REGISTRY_DIR = os.environ.get(
+    'FERRAMENTAS_MODELOS_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'ferramentas-uteis', 'modelos')
+)
+DEFAULT_BUDGET_MB = 512
+MANIFEST_FILE = 'manifest.json'
+
+
+def registry_key(df, config):
+    """
+    Chave do registro para um conjunto de dados e uma configuração de treino.
+
+    Inclui os parâmetros das features e as versões das bibliotecas, para que
+    uma mudança em qualquer um deles nunca reaproveite modelos incompatíveis.
+
+    Args:
+        df: Conjunto de dados original, antes das features (a chave é
+            calculada antes de processá-lo)
+        config: Configuração do treinamento (ex.: colunas de data e alvo,
+            tamanhos de validação e teste)
+
+    Returns:
+        str: Chave hexadecimal
+    """
+    payload = {
+        'data': dataset_fingerprint(df),
+        'config': config,
+        'features': {'lags': LAG_FEATURES, 'rolling': ROLLING_WINDOWS},
+        'versions': {'sklearn': sklearn.__version__, 'xgboost': xgb.__version__},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:32]
+
+
+# Travas por chave: as sessões do Streamlit são threads do mesmo processo
+_LOCKS = {}
+_LOCKS_GUARD = threading.Lock()
+
+
+def _slug(name):
+    return re.sub(r'[^0-9a-zA-Z]+', '_', name).strip('_').lower()
+
+
+def _file_size(path):
+    """Tamanho de um arquivo; 0 se ele sumiu (temporário de um save concorrente já renomeado)."""
+    try:
+        return os.path.getsize(path) if os.path.isfile(path) else 0
+    except OSError:
+        return 0
+
+
+def _atomic_write(path, write):
+    """Grava em um arquivo temporário e renomeia, para nunca deixar arquivos pela metade."""
+    # Mantém a extensão final: o XGBoost escolhe o formato pelo nome do arquivo
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-',
+                                    suffix=os.path.splitext(path)[1])
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ModelRegistry:
+    """
+    Registro de modelos em disco com remoção LRU por orçamento de espaço.
+
+    Os modelos de uma entrada são guardados individualmente: treinar só
+    alguns modelos de novo (ou acrescentar outros) reaproveita os que já
+    estão salvos para a mesma chave.
+    """
+
+    def __init__(self, root=DEFAULT_REGISTRY_DIR, budget_mb=DEFAULT_BUDGET_MB):
+        self.root = root
+        self.budget_bytes = int(budget_mb * 1024 ** 2)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key)
+
+    @contextmanager
+    def _entry_lock(self, key):
+        """
+        Acesso exclusivo ao manifest de uma entrada.
+
+        Entre sessões do mesmo servidor basta uma trava por chave; entre
+        processos (vários servidores no mesmo diretório), um flock no
+        arquivo .lock da entrada, quando o sistema oferece.
+        """
+        with _LOCKS_GUARD:
+            lock = _LOCKS.setdefault(key, threading.Lock())
+        with lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self._entry_dir(key), '.lock'), 'a') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_manifest(self, key):
+        try:
+            with open(os.path.join(self._entry_dir(key), MANIFEST_FILE), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, key, model_names):
+        """
+        Carrega os modelos salvos de uma chave.
+
+        Args:
+            key: Chave gerada por registry_key
+            model_names: Modelos desejados
+
+        Returns:
+            Tuple[dict, object, list]: (nome -> resultado no formato de `results`,
+            scaler, ordem das features); dicionário vazio se nada foi encontrado
+        """
+        manifest = self._read_manifest(key)
+        if manifest is None:
+            return {}, None, None
+
+        entry_dir = self._entry_dir(key)
+        results = {}
+        for name in model_names:
+            info = manifest['models'].get(name)
+            if info is None:
+                continue
+            try:
+                if info['format'] == 'xgboost':
+                    model = xgb.XGBRegressor()
+                    model.load_model(os.path.join(entry_dir, info['model_file']))
+                else:
+                    model = joblib.load(os.path.join(entry_dir, info['model_file']))
+                result = joblib.load(os.path.join(entry_dir, info['result_file']))
+            except (OSError, ValueError, EOFError, xgb.core.XGBoostError):
+                # Arquivo removido ou corrompido: o modelo é treinado de novo
+                continue
+            result['model'] = model
+            results[name] = result
+
+        scaler = None
+        scaler_path = os.path.join(entry_dir, 'scaler.joblib')
+        if results and os.path.exists(scaler_path):
+            scaler = joblib.load(scaler_path)
+
+        # Marca o acesso para a política LRU
+        os.utime(os.path.join(entry_dir, MANIFEST_FILE))
+        return results, scaler, manifest['feature_columns']
+
+    def load_features(self, key):
+        """
+        Carrega o conjunto processado salvo com os modelos de uma chave.
+
+        Args:
+            key: Chave gerada por registry_key
+
+        Returns:
+            pd.DataFrame ou None se a entrada não tiver o conjunto salvo
+        """
+        try:
+            return joblib.load(os.path.join(self._entry_dir(key), 'features.joblib'))
+        except (OSError, ValueError, EOFError):
+            return None
+
+    def save(self, key, results, scaler, feature_columns, features=None):
+        """
+        Salva (ou acrescenta) modelos em uma entrada e aplica o orçamento de disco.
+
+        Args:
+            key: Chave gerada por registry_key
+            results: nome -> resultado no formato de `results` (com a chave 'model')
+            scaler: Scaler ajustado no treino
+            feature_columns: Ordem das colunas usada no treino
+            features: Conjunto processado (features + alvo); gravado só na
+                primeira vez, pois é o mesmo para toda a chave
+        """
+        entry_dir = self._entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        models = {}
+
+        for name, result in results.items():
+            model = result['model']
+            slug = _slug(name)
+            if isinstance(model, xgb.XGBModel):
+                info = {'format': 'xgboost', 'model_file': f'{slug}.json'}
+                _atomic_write(os.path.join(entry_dir, info['model_file']), model.save_model)
+            else:
+                info = {'format': 'joblib', 'model_file': f'{slug}.joblib'}
+                _atomic_write(os.path.join(entry_dir, info['model_file']),
+                              lambda path: joblib.dump(model, path))
+
+            info['result_file'] = f'{slug}.result.joblib'
+            metrics = {k: v for k, v in result.items() if k != 'model'}
+            _atomic_write(os.path.join(entry_dir, info['result_file']),
+                          lambda path: joblib.dump(metrics, path))
+            info.update({metric: float(result[metric]) for metric in ('mae', 'rmse', 'mape', 'r2')})
+            models[name] = info
+
+        if scaler is not None:
+            _atomic_write(os.path.join(entry_dir, 'scaler.joblib'), lambda path: joblib.dump(scaler, path))
+        features_path = os.path.join(entry_dir, 'features.joblib')
+        if features is not None and not os.path.exists(features_path):
+            _atomic_write(features_path, lambda path: joblib.dump(features, path))
+
+        # O manifest é gravado por último: só aparece quando os arquivos estão
+        # completos. Ele é relido sob a trava, para que duas sessões salvando
+        # a mesma chave somem os modelos em vez de uma apagar os da outra.
+        with self._entry_lock(key):
+            manifest = self._read_manifest(key) or {'created': time.time(), 'models': {}}
+            manifest['feature_columns'] = list(feature_columns)
+            manifest['models'].update(models)
+
+            def write_manifest(path):
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+            _atomic_write(os.path.join(entry_dir, MANIFEST_FILE), write_manifest)
+        self.evict(keep=key)
+
+    def entries(self):
+        """
+        Lista as entradas do registro, da usada mais recentemente para a mais antiga.
+
+        Returns:
+            list[dict]: key, models, size (bytes) e last_access (timestamp)
+        """
+        if not os.path.isdir(self.root):
+            return []
+
+        entries = []
+        for key in os.listdir(self.root):
+            entry_dir = self._entry_dir(key)
+            manifest_path = os.path.join(entry_dir, MANIFEST_FILE)
+            if not os.path.isfile(manifest_path):
+                continue
+            size = sum(_file_size(os.path.join(entry_dir, name)) for name in os.listdir(entry_dir))
+            manifest = self._read_manifest(key) or {'models': {}}
+            entries.append({
+                'key': key,
+                'models': list(manifest['models']),
+                'size': size,
+                'last_access': os.path.getmtime(manifest_path),
+            })
+        return sorted(entries, key=lambda entry: entry['last_access'], reverse=True)
+
+    def usage(self):
+        """Espaço total ocupado pelo registro, em bytes."""
+        return sum(entry['size'] for entry in self.entries())
+
+    def evict(self, keep=None):
+        """
+        Remove as entradas menos usadas até caber no orçamento de disco.
+
+        Args:
+            keep: Chave que nunca é removida (a entrada recém-salva)
+
+        Returns:
+            int: Número de entradas removidas
+        """
+        entries = self.entries()
+        total = sum(entry['size'] for entry in entries)
+        removed = 0
+        for entry in reversed(entries):
+            if total <= self.budget_bytes:
+                break
+            if entry['key'] == keep:
+                continue
+            shutil.rmtree(self._entry_dir(entry['key']), ignore_errors=True)
+            total -= entry['size']
+            removed += 1
+        return removed
+
+    def clear(self):
+        """Remove todas as entradas do registro."""
+        for entry in self.entries():
+            shutil.rmtree(self._entry_dir(entry['key']), ignore_errors=True)
@@ -4,6 +4,7 @@ import numpy as np
 from datetime import datetime, timedelta
 import warnings
 import re
+import time
 warnings.filterwarnings('ignore')
 
 # Bibliotecas para Machine Learning
@@ -25,7 +26,20 @@ from plotly.subplots import make_subplots
 # Importar configurações
 import sys
 sys.path.append('..')
-from config import configurar_pagina, aplicar_estilo_global, criar_header, criar_divider
+from config import (
+    configurar_pagina, aplicar_estilo_global, criar_header, criar_divider, carregar_csv_grande, exibir_resumo_leitura,
+    carregar_tabela, compactar_dataframe, exibir_compactacao,
+    converter_serie_numeros_brasileiros, inferir_formato_data, converter_coluna_data,
+    reduzir_pontos, exibir_reducao_grafico
+)
+from forecasting import (
+    BACKTEST_MODES, IncrementalFeatureStore, MODEL_NAMES, RecursiveForecaster, SERIES_STRATEGIES,
+    forecast_many_series, train_models, tune_models, walk_forward_backtest
+)
+from eda_cache import overview, series_views
+from downloads import criar_botao_download_csv_cache, criar_botoes_download_arrow, exibir_painel_downloads
+from model_registry import ModelRegistry, registry_key
+from paralelismo import cpus_disponiveis, threads_por_worker
 
 # Configuração da página
 configurar_pagina("Previsão de Demanda", "📈")
@@ -64,19 +78,8 @@ st.markdown("""
 
 # Funções auxiliares
 def convert_brazilian_number(value):
-    if pd.isna(value):
-        return np.nan
-    
-    if isinstance(value, (int, float)):
-        return float(value)
-    
-    value = str(value).strip()
-    value = value.replace('.', '').replace(',', '.')
-    
-    try:
-        return float(value)
-    except:
-        return np.nan
+    valores, _ = converter_serie_numeros_brasileiros(pd.Series([value], dtype=object))
+    return valores[0]
 
 # Classe DemandForecaster
 class DemandForecasterStreamlit:    
@@ -84,6 +87,7 @@ class DemandForecasterStreamlit:
         self.data = None
         self.date_column = None
         self.target_column = None
+        self.group_column = None
         self.models = {}
         self.best_model = None
         self.scaler = StandardScaler()
@@ -98,33 +102,28 @@ class DemandForecasterStreamlit:
         self.dates_test = None
         self.results = None
         self.best_model_name = None
+        self.date_formats = {}
+        self.detected_columns = None
+        self.feature_store = None
     
     def read_data_flexible(self, uploaded_file, file_type):
         df = None
         
         try:
             if file_type == "CSV":
-                separators = [',', ';', '\\t', '|']
-                encodings = ['utf-8', 'latin1', 'iso-8859-1', 'cp1252']
-                
-                for encoding in encodings:
-                    for sep in separators:
-                        try:
-                            uploaded_file.seek(0)
-                            df = pd.read_csv(uploaded_file, sep=sep, encoding=encoding)
-                            if len(df.columns) > 1:
-                                st.success(f"✅ Arquivo lido com sucesso! (Separador: '{sep}', Encoding: {encoding})")
-                                break
-                        except:
-                            continue
-                    if df is not None and len(df.columns) > 1:
-                        break
-                
-                if df is None or len(df.columns) <= 1:
-                    uploaded_file.seek(0)
-                    df = pd.read_csv(uploaded_file, encoding='utf-8', sep=None, engine='python')
+                df, leitura = carregar_csv_grande(uploaded_file)
+                if df is None:
+                    return None
+                st.session_state.leitura_csv = leitura
+                dialeto = leitura['dialeto']
+                sep = '\\t' if dialeto['sep'] == '\t' else dialeto['sep']
+                st.success(
+                    f"✅ Arquivo lido com sucesso! (Separador: '{sep}', Encoding: {dialeto['encoding']}, "
+                    f"Decimal: '{dialeto['decimal']}' — detecção em {dialeto['tempo'] * 1000:.1f} ms)"
+                )
             else:
-                df = pd.read_excel(uploaded_file, sheet_name=0)
+                st.session_state.leitura_csv = None
+                df, _ = carregar_tabela(uploaded_file)
             
             return df
             
@@ -133,22 +132,29 @@ class DemandForecasterStreamlit:
             return None
     
     def detect_columns(self, df):
+        # Streamlit reexecuta o script a cada interação: reaproveita a detecção do mesmo DataFrame
+        chave = (id(df), tuple(df.columns), len(df))
+        if self.detected_columns is not None and self.detected_columns[0] == chave:
+            return self.detected_columns[1], self.detected_columns[2]
+        
         date_cols = []
         numeric_cols = []
+        self.date_formats = {}
         
         for col in df.columns:
-            if df[col].dtype == 'object':
-                try:
-                    pd.to_datetime(df[col])
+            if (df[col].dtype == 'object' or isinstance(df[col].dtype, pd.CategoricalDtype)
+                    or pd.api.types.is_datetime64_any_dtype(df[col])):
+                formato_data = inferir_formato_data(df[col])
+                if formato_data is not None:
                     date_cols.append(col)
-                except:
-                    pass
+                    self.date_formats[col] = formato_data
             elif pd.api.types.is_numeric_dtype(df[col]):
                 numeric_cols.append(col)
         
+        self.detected_columns = (chave, date_cols, numeric_cols)
         return date_cols, numeric_cols
     
-    def validate_data(self, df, date_col, target_col):
+    def validate_data(self, df, date_col, target_col, group_col=None):
         issues = []
         
         null_dates = df[date_col].isnull().sum()
@@ -162,57 +168,118 @@ class DemandForecasterStreamlit:
         if (df[target_col] < 0).any():
             issues.append(f"⚠️ Valores negativos detectados na coluna de demanda")
         
-        duplicates = df[date_col].duplicated().sum()
+        duplicates = df.duplicated([date_col] if group_col is None else [group_col, date_col]).sum()
         if duplicates > 0:
             issues.append(f"⚠️ {duplicates} datas duplicadas encontradas")
         
         return issues
     
     def create_features(self, df):
-        df = df.copy()
-        df = df.sort_values(self.date_column)
-        
-        # Features temporais
-        df['ano'] = df[self.date_column].dt.year
-        df['mes'] = df[self.date_column].dt.month
-        df['dia'] = df[self.date_column].dt.day
-        df['dia_semana'] = df[self.date_column].dt.dayofweek
-        df['dia_ano'] = df[self.date_column].dt.dayofyear
-        df['trimestre'] = df[self.date_column].dt.quarter
-        df['semana_mes'] = df[self.date_column].dt.day // 7 + 1
-        df['fim_semana'] = (df['dia_semana'] >= 5).astype(int)
+        # Reaproveita a matriz já calculada e processa apenas os registros novos
+        if (self.feature_store is None
+                or self.feature_store.date_column != self.date_column
+                or self.feature_store.target_column != self.target_column):
+            self.feature_store = IncrementalFeatureStore(self.date_column, self.target_column)
         
-        # Features trigonométricas
-        df['mes_sin'] = np.sin(2 * np.pi * df['mes'] / 12)
-        df['mes_cos'] = np.cos(2 * np.pi * df['mes'] / 12)
-        df['dia_semana_sin'] = np.sin(2 * np.pi * df['dia_semana'] / 7)
-        df['dia_semana_cos'] = np.cos(2 * np.pi * df['dia_semana'] / 7)
-        
-        # Features de lag
-        lag_features = [1, 2, 3, 6, 12]
-        for lag in lag_features:
-            df[f'lag_{lag}'] = df[self.target_column].shift(lag)
-        
-        # Médias móveis
-        rolling_features = [3, 6, 12]
-        for window in rolling_features:
-            df[f'media_movel_{window}'] = df[self.target_column].rolling(window=window, min_periods=1).mean()
-            df[f'std_movel_{window}'] = df[self.target_column].rolling(window=window, min_periods=1).std()
-            df[f'min_movel_{window}'] = df[self.target_column].rolling(window=window, min_periods=1).min()
-            df[f'max_movel_{window}'] = df[self.target_column].rolling(window=window, min_periods=1).max()
-        
-        # Features de tendência
-        df['tendencia_3m'] = df[self.target_column].rolling(window=3).mean() - df[self.target_column].rolling(window=6).mean()
-        df['variacao_percentual'] = df[self.target_column].pct_change()
-        
-        # Features de crescimento
-        df['crescimento_mensal'] = (df[self.target_column] - df[self.target_column].shift(1)) / df[self.target_column].shift(1)
-        df['crescimento_anual'] = (df[self.target_column] - df[self.target_column].shift(12)) / df[self.target_column].shift(12)
+        return self.feature_store.update(df)
+
+SEM_SERIE = "(nenhuma — série única)"
+
+def render_multi_series_mode(forecaster):
+    """Treina e prevê todas as séries de um arquivo empilhado (modo multi-séries)."""
+    group_col = forecaster.group_column
+    n_series = forecaster.data[group_col].nunique()
+    
+    st.markdown("### 🧩 Modo Multi-Séries")
+    st.info(f"📦 {n_series:,} séries identificadas pela coluna `{group_col}`")
+    
+    col1, col2, col3 = st.columns(3, gap="large")
+    
+    with col1:
+        model_name = st.selectbox("Modelo:", MODEL_NAMES, index=MODEL_NAMES.index('XGBoost'))
+    
+    with col2:
+        strategy = st.radio(
+            "Estratégia de treinamento:",
+            SERIES_STRATEGIES,
+            format_func=lambda s: "🌐 Global (um modelo para todas)" if s == 'global' else "🧱 Um modelo por série",
+            help="O modelo global aprende com todas as séries e prevê todas em uma única passada"
+        )
+    
+    with col3:
+        horizon = st.number_input("Meses para prever:", min_value=1, max_value=120, value=6)
+    
+    cpus = cpus_disponiveis()
+    if strategy == 'por_serie' and cpus > 1:
+        n_workers = st.slider("Processos simultâneos", 1, cpus, cpus,
+                              help="As séries são divididas em blocos distribuídos entre os processos")
+    else:
+        n_workers = 1
+    
+    if st.button("🚀 Treinar e Prever Todas as Séries", type="primary", use_container_width=True):
+        progress_bar = st.progress(0)
+        status_text = st.empty()
         
-        df = df.replace([np.inf, -np.inf], np.nan)
-        df = df.dropna()
+        def on_progress(done, total):
+            progress_bar.progress(done / total)
+            status_text.text(f"Séries concluídas: {done:,}/{total:,}")
         
-        return df
+        try:
+            with st.spinner("Treinando e prevendo as séries..."):
+                st.session_state.multi_series_result = forecast_many_series(
+                    forecaster.data, forecaster.date_column, forecaster.target_column, group_col,
+                    model_name, horizon, strategy=strategy, max_workers=n_workers,
+                    threads_per_model=threads_por_worker(n_workers, cpus), on_progress=on_progress
+                )
+            status_text.empty()
+        except Exception as e:
+            st.error(f"❌ Erro no modo multi-séries: {str(e)}")
+    
+    if st.session_state.get('multi_series_result') is None:
+        return
+    
+    forecast_table, stats = st.session_state.multi_series_result
+    
+    criar_divider()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Séries previstas", f"{stats['series']:,}")
+    col2.metric("Throughput", f"{stats['series_per_second']:,.1f} séries/s")
+    col3.metric("Tempo total", f"{stats['time']:.2f} s")
+    col4.metric("Séries ignoradas", f"{stats['skipped']:,}",
+                help="Séries com histórico curto demais para gerar as features")
+    
+    st.markdown("### 📋 Previsões Consolidadas")
+    st.dataframe(forecast_table, use_container_width=True, height=320)
+    criar_botao_download_csv_cache(
+        forecast_table,
+        f'previsoes_series_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
+        "📥 Download Previsões (CSV)",
+        use_container_width=True,
+        type='primary'
+    )
+    criar_botoes_download_arrow(forecast_table, 'previsoes_series')
+    
+    serie = st.selectbox("Visualizar série:", forecast_table[group_col].unique())
+    history = forecaster.data[forecaster.data[group_col] == serie].sort_values(forecaster.date_column)
+    future = forecast_table[forecast_table[group_col] == serie]
+    
+    history_dates = history[forecaster.date_column].to_numpy()
+    history_values = history[forecaster.target_column].to_numpy(dtype='float64')
+    shown = reduzir_pontos(history_dates, history_values)
+    
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=history_dates[shown], y=history_values[shown],
+        mode='lines+markers', name='Histórico', line=dict(color='#667eea', width=2)
+    ))
+    fig.add_trace(go.Scatter(
+        x=future[forecaster.date_column], y=future['previsao'],
+        mode='lines+markers', name='Previsão', line=dict(color='#ff7f0e', width=2, dash='dash')
+    ))
+    fig.update_layout(title=f"Série {serie}", xaxis_title="Data", yaxis_title="Demanda",
+                      height=420, hovermode='x unified')
+    st.plotly_chart(fig, use_container_width=True)
+    exibir_reducao_grafico(fig, len(shown) + len(future), len(history) + len(future))
 
 # Inicializar estado da sessão
 if 'forecaster' not in st.session_state:
@@ -223,6 +290,14 @@ if 'models_trained' not in st.session_state:
     st.session_state.models_trained = False
 if 'columns_configured' not in st.session_state:
     st.session_state.columns_configured = False
+if 'multi_series_result' not in st.session_state:
+    st.session_state.multi_series_result = None
+if 'backtest_result' not in st.session_state:
+    st.session_state.backtest_result = None
+if 'leitura_csv' not in st.session_state:
+    st.session_state.leitura_csv = None
+if 'compactacao' not in st.session_state:
+    st.session_state.compactacao = None
 
 # Cabeçalho da página
 criar_header("📈 Previsão de Demanda com Machine Learning avançado")
@@ -236,7 +311,7 @@ col1, col2, col3 = st.columns([1.5, 0.75, 0.4])
 with col2:
         file_type = st.selectbox(
         "**📁 Tipo de arquivo:**",
-        ["CSV", "XLSX"],
+        ["CSV", "XLSX", "Parquet", "Feather"],
         help="Formato do arquivo a ser carregado"
     )
 
@@ -269,12 +344,18 @@ if usar_exemplo:
     
     st.session_state.data = df
     st.session_state.data_loaded = True
+    st.session_state.leitura_csv = None
+    st.session_state.compactacao = None
     st.session_state.date_col_selected = 'data'
     st.session_state.target_col_selected = 'demanda'
     st.session_state.columns_configured = True
     
+    st.session_state.group_col_selected = None
+    st.session_state.multi_series_result = None
+    
     st.session_state.forecaster.date_column = 'data'
     st.session_state.forecaster.target_column = 'demanda'
+    st.session_state.forecaster.group_column = None
     st.session_state.forecaster.data = df
     
     st.success("✅ Dados de exemplo gerados! (48 meses)")
@@ -286,6 +367,7 @@ if uploaded_file is not None and not st.session_state.data_loaded:
         
         if df is not None:
             st.write(f"📊 Dados carregados: {len(df)} registros, {len(df.columns)} colunas")
+            df, st.session_state.compactacao = compactar_dataframe(df)
             st.session_state.data = df
             st.session_state.data_loaded = True
             st.rerun()
@@ -310,41 +392,31 @@ if st.session_state.data_loaded:
     # TAB 1: ANÁLISE DE DADOS
     with tabs[0]:
         st.header("📊 Análise Exploratória dos Dados")
+        if st.session_state.leitura_csv is not None:
+            exibir_resumo_leitura(st.session_state.leitura_csv)
+        if st.session_state.compactacao is not None:
+            exibir_compactacao(st.session_state.compactacao)
         
         col1, col2 = st.columns([2,2.5])
         
+        resumo = overview(df)
+        
         with col1:
             st.subheader("Dataset")
-            st.dataframe(df.head(10), use_container_width=True)
+            st.dataframe(resumo['head'], use_container_width=True)
         
         with col2:
             st.subheader("📈 Estatísticas Descritivas")
-            st.dataframe(df.describe(), use_container_width=True)
+            st.dataframe(resumo['describe'], use_container_width=True)
 
         
         # Visualização da série temporal
         if st.session_state.columns_configured:
             st.subheader("📊 Série Temporal - Dataset")
             
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(
-                x=df[st.session_state.date_col_selected],
-                y=df[st.session_state.target_col_selected],
-                mode='lines+markers',
-                name='Demanda',
-                line=dict(color='#667eea', width=2),
-                marker=dict(size=6)
-            ))
-            
-            fig.update_layout(
-                xaxis_title="Data",
-                yaxis_title="Demanda",
-                height=420,
-                hovermode='x unified',
-                margin=dict(l=40, r=40, t=60, b=40)
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
+            views = series_views(df, st.session_state.date_col_selected, st.session_state.target_col_selected)
+            st.plotly_chart(views['series_fig'], use_container_width=True)
+            exibir_reducao_grafico(views['series_fig'], *views['points'])
             criar_divider()
     
     # TAB 2: CONFIGURAÇÃO
@@ -378,13 +450,33 @@ if st.session_state.data_loaded:
                 
                 st.session_state.target_col_selected = target_col
             
+            st.subheader("Coluna de Série (opcional)")
+            group_options = [col for col in df.columns if col not in (date_col, target_col)]
+            group_col = st.selectbox(
+                "Selecione a coluna que identifica cada série (SKU, loja...):",
+                [SEM_SERIE] + group_options,
+                help="Para arquivos com várias séries empilhadas: ativa o modo multi-séries"
+            )
+            group_col = None if group_col == SEM_SERIE else group_col
+            
             if st.button("✅ Confirmar Configuração", type="primary"):
                 try:
-                    df[date_col] = pd.to_datetime(df[date_col])
+                    df[date_col] = converter_coluna_data(
+                        df[date_col], st.session_state.forecaster.date_formats.get(date_col)
+                    )
+                    
+                    # A coluna pode ter sido compactada (int8, float32...): os modelos recebem float64
+                    valores, falhas = converter_serie_numeros_brasileiros(df[target_col])
+                    df[target_col] = valores
+                    if falhas.any():
+                        st.warning(f"⚠️ {int(falhas.sum())} valores da coluna '{target_col}' não puderam ser convertidos")
                     
                     st.session_state.forecaster.date_column = date_col
                     st.session_state.forecaster.target_column = target_col
+                    st.session_state.forecaster.group_column = group_col
                     st.session_state.forecaster.data = df
+                    st.session_state.group_col_selected = group_col
+                    st.session_state.multi_series_result = None
                     st.session_state.columns_configured = True
                     
                     st.success("✅ Configuração salva com sucesso!")
@@ -398,6 +490,7 @@ if st.session_state.data_loaded:
             ✅ **Configuração Detectada:**
             - Coluna de Data: `{st.session_state.date_col_selected}`
             - Coluna de Demanda: `{st.session_state.target_col_selected}`
+            - Coluna de Série: `{st.session_state.get('group_col_selected') or SEM_SERIE}`
             """)
             
             if st.button("✅ Validar Configuração", type='primary'):
@@ -412,7 +505,8 @@ if st.session_state.data_loaded:
                     issues = st.session_state.forecaster.validate_data(
                         df, 
                         st.session_state.date_col_selected, 
-                        st.session_state.target_col_selected
+                        st.session_state.target_col_selected,
+                        st.session_state.get('group_col_selected')
                     )
                     
                     if issues:
@@ -424,54 +518,20 @@ if st.session_state.data_loaded:
                     
                     st.subheader("📊 Análise de Sazonalidade")
                     
+                    views = series_views(df, st.session_state.date_col_selected, st.session_state.target_col_selected)
+                    
                     col1, col2 = st.columns(2, gap="large")
                     
                     with col1:
-                        df_temp = df.copy()
-                        df_temp['mes'] = pd.to_datetime(df_temp[st.session_state.date_col_selected]).dt.month
-                        
-                        fig_box = px.box(df_temp, x='mes', y=st.session_state.target_col_selected,
-                                        title="Distribuição por Mês")
-                        st.plotly_chart(fig_box, use_container_width=True)
+                        st.plotly_chart(views['box_fig'], use_container_width=True)
                     
                     with col2:
-                        media_mensal = df_temp.groupby('mes')[st.session_state.target_col_selected].mean().reset_index()
-                        
-                        fig_media = px.line(media_mensal, x='mes', y=st.session_state.target_col_selected,
-                                          title="Média por Mês",
-                                          markers=True)
-                        st.plotly_chart(fig_media, use_container_width=True)
+                        st.plotly_chart(views['monthly_fig'], use_container_width=True)
                     
                     st.subheader("📈 Análise de Tendência")
                     
-                    df_temp = df.copy()
-                    df_temp = df_temp.set_index(st.session_state.date_col_selected)
-                    df_temp['media_movel_3'] = df_temp[st.session_state.target_col_selected].rolling(window=3).mean()
-                    df_temp['media_movel_6'] = df_temp[st.session_state.target_col_selected].rolling(window=6).mean()
-                    
-                    fig_trend = go.Figure()
-                    fig_trend.add_trace(go.Scatter(
-                        x=df_temp.index, y=df_temp[st.session_state.target_col_selected],
-                        mode='lines+markers', name='Demanda Real',
-                        line=dict(color='#667eea', width=1), opacity=0.7
-                    ))
-                    fig_trend.add_trace(go.Scatter(
-                        x=df_temp.index, y=df_temp['media_movel_3'],
-                        mode='lines', name='Média Móvel 3 Meses',
-                        line=dict(color='#ff7f0e', width=2)
-                    ))
-                    fig_trend.add_trace(go.Scatter(
-                        x=df_temp.index, y=df_temp['media_movel_6'],
-                        mode='lines', name='Média Móvel 6 Meses',
-                        line=dict(color='#2ca02c', width=2)
-                    ))
-                    
-                    fig_trend.update_layout(
-                        title="Tendência com Médias Móveis",
-                        xaxis_title="Data", yaxis_title="Demanda", height=420
-                    )
-                    
-                    st.plotly_chart(fig_trend, use_container_width=True)
+                    st.plotly_chart(views['trend_fig'], use_container_width=True)
+                    exibir_reducao_grafico(views['trend_fig'], 3 * views['points'][0], 3 * views['points'][1])
                     criar_divider()
                     
                 except Exception as e:
@@ -482,7 +542,10 @@ if st.session_state.data_loaded:
         st.header("🤖 Treinamento dos Modelos")
         
         # AJUSTE 3: Verificar se as colunas foram configuradas
-        if st.session_state.columns_configured and st.session_state.forecaster.date_column and st.session_state.forecaster.target_column:
+        if st.session_state.columns_configured and st.session_state.forecaster.group_column:
+            render_multi_series_mode(st.session_state.forecaster)
+        
+        elif st.session_state.columns_configured and st.session_state.forecaster.date_column and st.session_state.forecaster.target_column:
             
             st.markdown("### ⚙️ Configurações de Treinamento")
             
@@ -523,19 +586,123 @@ if st.session_state.data_loaded:
                 use_gb = st.checkbox("Gradient Boosting", value=True)
                 use_xgb = st.checkbox("XGBoost", value=True)
             
+            st.markdown("### 🎛️ Ajuste de Hiperparâmetros")
+            
+            col1, col2, col3 = st.columns(3, gap="large")
+            
+            with col1:
+                ajustar_hiperparametros = st.checkbox(
+                    "Ajustar hiperparâmetros (opcional)", value=False,
+                    help="Busca aleatória com successive halving em folds temporais do conjunto de treino"
+                )
+            
+            with col2:
+                orcamento_ajuste = st.slider(
+                    "Orçamento de tempo (s)", 10, 600, 60, step=10,
+                    disabled=not ajustar_hiperparametros,
+                    help="A busca para quando o tempo acaba e usa o melhor candidato encontrado"
+                )
+            
+            with col3:
+                candidatos_ajuste = st.slider(
+                    "Candidatos por modelo", 4, 32, 12,
+                    disabled=not ajustar_hiperparametros,
+                    help="Inclui sempre a configuração padrão"
+                )
+            
+            st.markdown("### ⚡ Paralelismo")
+            
+            cpus = cpus_disponiveis()
+            max_workers = min(len(MODEL_NAMES), cpus)
+            
+            col1, col2, col3 = st.columns(3, gap="large")
+            
+            with col1:
+                if max_workers > 1:
+                    n_workers = st.slider(
+                        "Processos simultâneos", 1, max_workers, max_workers,
+                        help="Quantos modelos são treinados ao mesmo tempo"
+                    )
+                else:
+                    n_workers = 1
+                    st.metric("Processos simultâneos", 1)
+            
+            with col2:
+                if cpus > 1:
+                    threads_per_model = st.slider(
+                        "Threads por modelo", 1, cpus, threads_por_worker(n_workers, cpus),
+                        help="Limite de threads de Random Forest, XGBoost e BLAS em cada processo"
+                    )
+                else:
+                    threads_per_model = 1
+                    st.metric("Threads por modelo", 1)
+            
+            with col3:
+                st.metric("CPUs disponíveis", cpus)
+            
+            st.markdown("### 🗄️ Registro de Modelos")
+            
+            model_registry = ModelRegistry()
+            col1, col2, col3 = st.columns(3, gap="large")
+            
+            with col1:
+                usar_registro = st.checkbox(
+                    "♻️ Reutilizar modelos salvos", value=True,
+                    help="Carrega do disco os modelos já treinados com os mesmos dados e configuração"
+                )
+            
+            with col2:
+                entradas = model_registry.entries()
+                st.metric("Conjuntos salvos", len(entradas),
+                          help=f"Uso em disco: {sum(e['size'] for e in entradas) / 1024 ** 2:.1f} MB "
+                               f"de {model_registry.budget_bytes / 1024 ** 2:.0f} MB")
+            
+            with col3:
+                if st.button("🗑️ Limpar registro", use_container_width=True, disabled=not entradas):
+                    model_registry.clear()
+                    st.rerun()
+            
             criar_divider()
             
             if st.button("🚀 Iniciar Treinamento", type="primary", use_container_width=True):
                 with st.spinner("Processando dados e treinando modelos..."):
                     try:
-                        st.info("📊 Criando features...")
-                        processed_df = st.session_state.forecaster.create_features(st.session_state.forecaster.data)
+                        selected_models = [
+                            name for name, selected in zip(MODEL_NAMES, [use_linear, use_ridge, use_lasso, use_rf, use_gb, use_xgb])
+                            if selected
+                        ]
+                        
+                        # Mesmos dados e configuração: reaproveita do registro os modelos,
+                        # o scaler e as features, antes de recalcular qualquer um deles
+                        config_treino = {
+                            'test_size': test_size, 'val_size': val_size,
+                            'date_column': st.session_state.forecaster.date_column,
+                            'target_column': st.session_state.forecaster.target_column,
+                        }
+                        if ajustar_hiperparametros:
+                            config_treino['tuning'] = {'budget': orcamento_ajuste, 'candidates': candidatos_ajuste}
+                        chave_registro = registry_key(st.session_state.forecaster.data, config_treino)
+                        carregados, scaler_salvo, colunas_salvas = {}, None, None
+                        processed_df = None
+                        if usar_registro:
+                            inicio_registro = time.perf_counter()
+                            carregados, scaler_salvo, colunas_salvas = model_registry.load(chave_registro, selected_models)
+                            processed_df = model_registry.load_features(chave_registro)
+                            if carregados:
+                                st.info(f"♻️ {len(carregados)} modelo(s) carregado(s) do registro em "
+                                        f"{(time.perf_counter() - inicio_registro) * 1000:.0f} ms")
+                        
+                        if processed_df is None:
+                            st.info("📊 Criando features...")
+                            processed_df = st.session_state.forecaster.create_features(st.session_state.forecaster.data)
                         st.session_state.forecaster.processed_data = processed_df
                         
                         st.info("✂️ Dividindo dados...")
                         feature_columns = [col for col in processed_df.columns 
                                         if col not in [st.session_state.forecaster.date_column, 
                                                     st.session_state.forecaster.target_column]]
+                        if colunas_salvas != feature_columns:
+                            carregados, scaler_salvo = {}, None
                         
                         X = processed_df[feature_columns]
                         y = processed_df[st.session_state.forecaster.target_column]
@@ -555,10 +722,13 @@ if st.session_state.data_loaded:
                         
                         dates_test = dates[train_size + val_size_n:]
                         
-                        scaler = StandardScaler()
-                        X_train_scaled = scaler.fit_transform(X_train)
-                        X_val_scaled = scaler.transform(X_val)
-                        X_test_scaled = scaler.transform(X_test)
+                        if scaler_salvo is not None:
+                            scaler = scaler_salvo
+                        else:
+                            scaler = StandardScaler()
+                            X_train_scaled = scaler.fit_transform(X_train)
+                            X_val_scaled = scaler.transform(X_val)
+                            X_test_scaled = scaler.transform(X_test)
                         
                         st.session_state.forecaster.X_train = X_train
                         st.session_state.forecaster.X_val = X_val
@@ -571,48 +741,60 @@ if st.session_state.data_loaded:
                         
                         st.info("🤖 Treinando modelos...")
                         
-                        models_to_train = {}
-                        if use_linear:
-                            models_to_train['Linear Regression'] = LinearRegression()
-                        if use_ridge:
-                            models_to_train['Ridge Regression'] = Ridge(alpha=1.0)
-                        if use_lasso:
-                            models_to_train['Lasso Regression'] = Lasso(alpha=1.0)
-                        if use_rf:
-                            models_to_train['Random Forest'] = RandomForestRegressor(n_estimators=100, random_state=42)
-                        if use_gb:
-                            models_to_train['Gradient Boosting'] = GradientBoostingRegressor(n_estimators=100, random_state=42)
-                        if use_xgb:
-                            models_to_train['XGBoost'] = xgb.XGBRegressor(n_estimators=100, random_state=42, verbosity=0)
+                        modelos_pendentes = [name for name in selected_models if name not in carregados]
                         
-                        results = {}
                         progress_bar = st.progress(0)
                         status_text = st.empty()
+                        status_text.text(f'🔄 Treinando {len(modelos_pendentes)} modelo(s) em {n_workers} processo(s)...')
                         
-                        for i, (name, model) in enumerate(models_to_train.items()):
-                            progress_bar.progress((i + 1) / len(models_to_train))
-                            status_text.text(f'🔄 Treinando modelo: {name}')
-                            
-                            model.fit(X_train, y_train)
-                            y_pred_val = model.predict(X_val)
-                            y_pred_test = model.predict(X_test)
-                            
-                            mae = mean_absolute_error(y_val, y_pred_val)
-                            rmse = np.sqrt(mean_squared_error(y_val, y_pred_val))
-                            mape = mean_absolute_percentage_error(y_val, y_pred_val) * 100
-                            r2 = r2_score(y_val, y_pred_val)
-                            
-                            results[name] = {
-                                'model': model,
-                                'mae': mae,
-                                'rmse': rmse,
-                                'mape': mape,
-                                'r2': r2,
-                                'predictions_val': y_pred_val,
-                                'predictions_test': y_pred_test
-                            }
-                            
-                            st.session_state.forecaster.models[name] = model
+                        def atualizar_treinamento(name, result, done, total):
+                            progress_bar.progress(done / total)
+                            status_text.text(f"✅ {name} concluído em {result['fit_time']:.2f}s ({done}/{total})")
+                        
+                        def atualizar_ajuste(rodada, total_rodadas, avaliacoes):
+                            progress_bar.progress(rodada / total_rodadas)
+                            status_text.text(f"🎛️ Rodada {rodada}/{total_rodadas} do ajuste — {avaliacoes} avaliações")
+                        
+                        treinados = {}
+                        if modelos_pendentes and ajustar_hiperparametros:
+                            treinados, historico_ajuste, stats_ajuste = tune_models(
+                                modelos_pendentes, X_train, y_train, X_val, y_val, X_test,
+                                time_budget=orcamento_ajuste,
+                                n_candidates=candidatos_ajuste,
+                                max_workers=n_workers,
+                                threads_per_model=threads_per_model,
+                                on_progress=atualizar_ajuste
+                            )
+                            st.info(
+                                f"🎛️ Ajuste: {stats_ajuste['evaluations']} avaliações de "
+                                f"{stats_ajuste['candidates']} candidatos em {stats_ajuste['search_time']:.1f}s"
+                                + (" (orçamento esgotado)" if stats_ajuste['budget_exhausted'] else "")
+                            )
+                            if not historico_ajuste.empty:
+                                with st.expander("🎛️ Candidatos avaliados por rodada"):
+                                    st.dataframe(
+                                        historico_ajuste.pivot_table(index='model', columns='rung',
+                                                                     values='candidate', aggfunc='count'),
+                                        use_container_width=True
+                                    )
+                        elif modelos_pendentes:
+                            treinados = train_models(
+                                modelos_pendentes, X_train, y_train, X_val, y_val, X_test,
+                                max_workers=n_workers,
+                                threads_per_model=threads_per_model,
+                                on_complete=atualizar_treinamento
+                            )
+                        
+                        if treinados:
+                            try:
+                                model_registry.save(chave_registro, treinados, scaler, feature_columns, processed_df)
+                            except OSError as e:
+                                st.warning(f"⚠️ Não foi possível salvar os modelos no registro: {str(e)}")
+                        
+                        results = {name: carregados.get(name) or treinados[name] for name in selected_models}
+                        
+                        for name, result in results.items():
+                            st.session_state.forecaster.models[name] = result['model']
 
                         status_text.text('✅ Todos os modelos foram treinados!')
 
@@ -633,6 +815,7 @@ if st.session_state.data_loaded:
                             st.session_state.forecaster.feature_importance = importance_df
                         
                         st.session_state.models_trained = True
+                        st.session_state.backtest_result = None
                         st.success(f"✅ Treinamento concluído! Melhor modelo: {best_model_name} (MAPE: {results[best_model_name]['mape']:.2f}%)")
                         
                         st.subheader("📊 Estatísticas do Conjunto Processado")
@@ -672,8 +855,17 @@ if st.session_state.data_loaded:
                 'MAE': [results[m]['mae'] for m in results.keys()],
                 'RMSE': [results[m]['rmse'] for m in results.keys()],
                 'MAPE (%)': [results[m]['mape'] for m in results.keys()],
-                'R²': [results[m]['r2'] for m in results.keys()]
-            }).sort_values('MAPE (%)')
+                'R²': [results[m]['r2'] for m in results.keys()],
+                'Treino (s)': [results[m].get('fit_time', np.nan) for m in results.keys()],
+                'Predição (s)': [results[m].get('predict_time', np.nan) for m in results.keys()]
+            })
+            if any('params' in result for result in results.values()):
+                results_df['MAPE CV (%)'] = [results[m].get('cv_mape', np.nan) for m in results.keys()]
+                results_df['Hiperparâmetros'] = [
+                    ', '.join(f"{k}={v}" for k, v in sorted(results[m].get('params', {}).items())) or 'padrão'
+                    for m in results.keys()
+                ]
+            results_df = results_df.sort_values('MAPE (%)')
 
             st.dataframe(
                 results_df.style.highlight_min(subset=['MAE', 'RMSE', 'MAPE (%)'])
@@ -686,7 +878,7 @@ if st.session_state.data_loaded:
             col1, col2 = st.columns(2, gap="large")
             with col1:
                 st.markdown("### 🕸️ Comparativo Geral dos Modelos (Radar Chart)")
-                radar_df = results_df.copy()
+                radar_df = results_df[['Modelo', 'MAE', 'RMSE', 'MAPE (%)', 'R²']].copy()
                 radar_df.set_index('Modelo', inplace=True)
                 radar_df_norm = (radar_df - radar_df.min()) / (radar_df.max() - radar_df.min())
                 radar_df_norm = radar_df_norm.reset_index()
@@ -806,6 +998,100 @@ if st.session_state.data_loaded:
                 )
                 st.plotly_chart(fig_importance, use_container_width=True)
 
+            criar_divider()
+            st.markdown("### 🔁 Backtesting Walk-Forward")
+            st.caption("Reavalia os modelos em vários cortes sucessivos da série, reaproveitando a mesma matriz de features")
+            
+            forecaster = st.session_state.forecaster
+            n_linhas = len(forecaster.processed_data)
+            max_folds = max(2, min(10, n_linhas // 4))
+            
+            col1, col2, col3 = st.columns(3, gap="large")
+            
+            with col1:
+                n_folds = st.slider("Número de folds", 2, max_folds, min(5, max_folds))
+                modo_backtest = st.radio(
+                    "Janela de treino:",
+                    BACKTEST_MODES,
+                    format_func=lambda m: "📈 Expansível" if m == 'expanding' else "↔️ Deslizante",
+                    horizontal=True
+                )
+            
+            with col2:
+                modelos_backtest = st.multiselect("Modelos:", list(results.keys()), default=list(results.keys()))
+                janela_treino = None
+                if modo_backtest == 'sliding':
+                    janela_treino = st.number_input(
+                        "Tamanho da janela de treino:", min_value=2, max_value=n_linhas,
+                        value=max(2, n_linhas // 2)
+                    )
+            
+            with col3:
+                cpus = cpus_disponiveis()
+                if cpus > 1:
+                    workers_backtest = st.slider("Processos simultâneos (backtest)", 1, cpus, cpus)
+                else:
+                    workers_backtest = 1
+                    st.metric("Processos simultâneos", 1)
+            
+            if st.button("🔁 Executar Backtesting", type="primary", use_container_width=True,
+                         disabled=not modelos_backtest):
+                progress_bar = st.progress(0)
+                status_text = st.empty()
+                
+                def atualizar_backtest(fold_result, done, total):
+                    progress_bar.progress(done / total)
+                    status_text.text(f"✅ {fold_result['model']} — fold {fold_result['fold']} ({done}/{total})")
+                
+                try:
+                    dados_bt = forecaster.processed_data.set_index(forecaster.date_column)
+                    st.session_state.backtest_result = walk_forward_backtest(
+                        modelos_backtest,
+                        dados_bt[forecaster.X_train.columns],
+                        dados_bt[forecaster.target_column],
+                        n_splits=n_folds,
+                        mode=modo_backtest,
+                        window=janela_treino,
+                        max_workers=workers_backtest,
+                        threads_per_model=threads_por_worker(workers_backtest, cpus),
+                        on_complete=atualizar_backtest
+                    )
+                except Exception as e:
+                    st.error(f"❌ Erro no backtesting: {str(e)}")
+                finally:
+                    progress_bar.empty()
+                    status_text.empty()
+            
+            if st.session_state.get('backtest_result') is not None:
+                folds_bt, resumo_bt, tempo_bt = st.session_state.backtest_result
+                
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Tempo total", f"{tempo_bt:.2f} s")
+                col2.metric("Folds x modelos", len(folds_bt))
+                col3.metric("Melhor MAPE médio", f"{resumo_bt['mape'].min():.2f}% ({resumo_bt['mape'].idxmin()})")
+                
+                st.markdown("#### 📊 Resumo por Modelo")
+                resumo_display = resumo_bt.reset_index().round(4)
+                resumo_display.columns = ['Modelo', 'MAE', 'MAE (desvio)', 'RMSE', 'RMSE (desvio)',
+                                          'MAPE (%)', 'MAPE (desvio)', 'Treino (s)', 'Tempo total (s)']
+                st.dataframe(resumo_display, use_container_width=True, hide_index=True)
+                
+                st.markdown("#### 🧾 Métricas por Fold")
+                folds_display = folds_bt.copy()
+                for col in ['train_end', 'test_start', 'test_end']:
+                    folds_display[col] = pd.to_datetime(folds_display[col]).dt.strftime('%m/%Y')
+                folds_display = folds_display.round(4)
+                folds_display.columns = ['Modelo', 'Fold', 'Linhas Treino', 'Linhas Teste', 'Fim do Treino',
+                                         'Início do Teste', 'Fim do Teste', 'MAE', 'RMSE', 'MAPE (%)',
+                                         'Treino (s)', 'Predição (s)', 'Tempo do Fold (s)']
+                st.dataframe(folds_display, use_container_width=True, hide_index=True)
+                
+                fig_folds = px.line(folds_bt, x='fold', y='mape', color='model', markers=True,
+                                    labels={'fold': 'Fold', 'mape': 'MAPE (%)', 'model': 'Modelo'},
+                                    title="MAPE por Fold")
+                fig_folds.update_layout(height=420)
+                st.plotly_chart(fig_folds, use_container_width=True)
+
         else:
             st.info("📊 Treine os modelos na aba 'Treinamento de Modelos' para visualizar os resultados")
     
@@ -822,10 +1108,14 @@ if st.session_state.data_loaded:
                 periodo_previsao = st.number_input(
                     "Número de meses para prever:",
                     min_value=1,
-                    max_value=24,
+                    max_value=120,
                     value=6,
                     help="Quantos meses você deseja prever"
                 )
+                comparar_modelos = st.checkbox(
+                    "Comparar todos os modelos",
+                    help="Gera as previsões de todos os modelos treinados em uma única passada"
+                )
 
             with col2:
                 modelo_previsao = st.selectbox(
@@ -836,52 +1126,23 @@ if st.session_state.data_loaded:
             if st.button("🔮 Gerar Previsões", type="primary", use_container_width=True):
                 with st.spinner("Gerando previsões..."):
                     try:
-                        model = st.session_state.forecaster.models[modelo_previsao]
-                        last_date = st.session_state.forecaster.processed_data[st.session_state.forecaster.date_column].max()
+                        forecaster = st.session_state.forecaster
+                        modelos_previsao = (dict(forecaster.models) if comparar_modelos
+                                            else {modelo_previsao: forecaster.models[modelo_previsao]})
                         
-                        future_dates = pd.date_range(
-                            start=last_date + pd.DateOffset(months=1),
-                            periods=periodo_previsao,
-                            freq='MS'
+                        engine = RecursiveForecaster(
+                            forecaster.data,
+                            forecaster.X_train.columns,
+                            forecaster.date_column,
+                            forecaster.target_column
                         )
-                        
-                        last_row = st.session_state.forecaster.processed_data.iloc[-1:].copy()
-                        future_predictions = []
-                        
-                        for i in range(periodo_previsao):
-                            current_date = future_dates[i]
-                            last_row['ano'] = current_date.year
-                            last_row['mes'] = current_date.month
-                            last_row['dia'] = current_date.day
-                            last_row['dia_semana'] = current_date.dayofweek
-                            last_row['dia_ano'] = current_date.dayofyear
-                            last_row['trimestre'] = current_date.quarter
-                            last_row['semana_mes'] = current_date.day // 7 + 1
-                            last_row['fim_semana'] = int(current_date.dayofweek >= 5)
-                            
-                            last_row['mes_sin'] = np.sin(2 * np.pi * current_date.month / 12)
-                            last_row['mes_cos'] = np.cos(2 * np.pi * current_date.month / 12)
-                            last_row['dia_semana_sin'] = np.sin(2 * np.pi * current_date.dayofweek / 7)
-                            last_row['dia_semana_cos'] = np.cos(2 * np.pi * current_date.dayofweek / 7)
-                            
-                            for lag in [1, 2, 3, 6, 12]:
-                                if i < lag:
-                                    idx = len(st.session_state.forecaster.processed_data) - lag + i
-                                    if idx >= 0:
-                                        last_row[f'lag_{lag}'] = st.session_state.forecaster.processed_data[
-                                            st.session_state.forecaster.target_column].iloc[idx]
-                                else:
-                                    last_row[f'lag_{lag}'] = future_predictions[i - lag]
-                            
-                            X_future = last_row.drop(columns=[st.session_state.forecaster.date_column, 
-                                                             st.session_state.forecaster.target_column])
-                            
-                            pred = model.predict(X_future)[0]
-                            future_predictions.append(max(pred, 0))
+                        inicio_previsao = time.perf_counter()
+                        all_predictions, future_dates = engine.forecast(modelos_previsao, periodo_previsao)
+                        tempo_previsao = time.perf_counter() - inicio_previsao
                         
                         future_df = pd.DataFrame({
-                            'data': future_dates,
-                            'previsao': future_predictions
+                            'data': future_dates[0],
+                            'previsao': all_predictions[modelo_previsao][0]
                         })
                         
                         std_error = np.std(st.session_state.forecaster.y_test.values - 
@@ -947,15 +1208,22 @@ if st.session_state.data_loaded:
                                 use_container_width=True,
                                 type='primary'
                             )
+                            criar_botoes_download_arrow(future_df, 'previsoes', sob_demanda=False)
 
 
                         st.markdown("### 📈 Visualização das Previsões")
                         
+                        # O histórico é reduzido no servidor; as previsões vão completas
+                        historico = st.session_state.forecaster.processed_data
+                        datas_historico = historico[st.session_state.forecaster.date_column].to_numpy()
+                        valores_historico = historico[st.session_state.forecaster.target_column].to_numpy(dtype='float64')
+                        pontos_historico = reduzir_pontos(datas_historico, valores_historico)
+                        
                         fig_future = go.Figure()
                         
                         fig_future.add_trace(go.Scatter(
-                            x=st.session_state.forecaster.processed_data[st.session_state.forecaster.date_column],
-                            y=st.session_state.forecaster.processed_data[st.session_state.forecaster.target_column],
+                            x=datas_historico[pontos_historico],
+                            y=valores_historico[pontos_historico],
                             mode='lines+markers',
                             name='Histórico',
                             line=dict(color='#667eea', width=2),
@@ -971,6 +1239,17 @@ if st.session_state.data_loaded:
                             marker=dict(size=8)
                         ))
                         
+                        if comparar_modelos:
+                            for nome, previsoes in all_predictions.items():
+                                if nome != modelo_previsao:
+                                    fig_future.add_trace(go.Scatter(
+                                        x=future_df['data'],
+                                        y=previsoes[0],
+                                        mode='lines',
+                                        name=f'Previsão ({nome})',
+                                        line=dict(width=1, dash='dot')
+                                    ))
+                        
                         fig_future.add_trace(go.Scatter(
                             x=future_df['data'],
                             y=future_df['limite_superior'],
@@ -999,13 +1278,21 @@ if st.session_state.data_loaded:
                         )
                         
                         st.plotly_chart(fig_future, use_container_width=True)
+                        pontos_previsao = sum(len(trace.x) for trace in fig_future.data[1:])
+                        exibir_reducao_grafico(fig_future, len(pontos_historico) + pontos_previsao,
+                                               len(historico) + pontos_previsao)
+                        st.caption(f"⏱️ {periodo_previsao} passos x {len(modelos_previsao)} modelo(s) "
+                                   f"gerados em {tempo_previsao * 1000:.1f} ms")
                                                 
                     except Exception as e:
                         st.error(f"❌ Erro ao gerar previsões: {str(e)}")
                         import traceback
                         st.code(traceback.format_exc())
         else:
-            st.info("🤖 Treine os modelos primeiro para gerar previsões")
+            if st.session_state.forecaster.group_column:
+                st.info("🧩 No modo multi-séries as previsões consolidadas ficam na aba de Treinamento")
+            else:
+                st.info("🤖 Treine os modelos primeiro para gerar previsões")
     
     # TAB 6: DOCUMENTAÇÃO
     with tabs[5]:
@@ -1083,6 +1370,8 @@ else:
         | 2022-03-01 | 59543.25 |
         """)
 
+exibir_painel_downloads()
+
 # Footer
 criar_divider()
 st.markdown("""
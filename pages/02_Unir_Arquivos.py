@@ -5,16 +5,25 @@ Página reorganizada com interface intuitiva
 
 import streamlit as st
 import tempfile
+import time
 import os
-import PyPDF2
 from streamlit_sortables import sort_items
 import pandas as pd
-import io
+import pyarrow.parquet as pq
 
 # Importar configurações
 import sys
 sys.path.append('..')
-from config import configurar_pagina, aplicar_estilo_global, criar_header, criar_divider, criar_botao_download_excel, exibir_sucesso, exibir_erro
+from config import (
+    configurar_pagina, aplicar_estilo_global, criar_header, criar_divider, exibir_sucesso, exibir_erro,
+    MAX_FILE_SIZE_MB, LIMITE_LINHAS_EXCEL, MIME_EXCEL, MIME_PARQUET, validar_tamanho_arquivo,
+    carregar_tabela, exibir_resumo_leitura, compactar_dataframe, exibir_compactacao,
+    ler_cabecalhos_tabela, ler_excels_em_paralelo, iterar_excels_em_paralelo
+)
+from consolidacao import MODOS_CONSOLIDACAO, ConsolidacaoEmDisco, consolidar_tabelas, exportar_excel_de_parquet, planejar_colunas
+from downloads import criar_botoes_download_arrow, criar_botao_download_excel_planilhas, exibir_painel_downloads
+from paralelismo import cpus_disponiveis
+from pdfs import MOTORES_UNIAO, PAGINAS_MOTOR_RAPIDO, abrir_pdf, interpretar_paginas, unir_pdfs
 
 # Configuração da página
 configurar_pagina("Unir Arquivos", "📁")
@@ -88,6 +97,92 @@ if "tipo_uniao" not in st.session_state:
     st.session_state.tipo_uniao = None
 if "resultado_excel" not in st.session_state:
     st.session_state.resultado_excel = None
+if "compactacao_excel" not in st.session_state:
+    st.session_state.compactacao_excel = None
+if "conciliacao_excel" not in st.session_state:
+    st.session_state.conciliacao_excel = None
+if "leituras_unir" not in st.session_state:
+    st.session_state.leituras_unir = {}
+if "resultado_disco" not in st.session_state:
+    st.session_state.resultado_disco = None
+if "pdf_unificado" not in st.session_state:
+    st.session_state.pdf_unificado = None
+
+# ========================================
+# CONSOLIDAÇÃO EM DISCO
+# ========================================
+
+def consolidar_em_disco(rotulos, origem, plano, todas_planilhas):
+    """
+    Lê as tabelas aceitas e grava cada uma em disco assim que fica pronta.
+
+    Nenhuma tabela lida fica na sessão: o pico de memória é o da maior
+    tabela (ou de uma por processo, na leitura paralela dos Excel).
+
+    Args:
+        rotulos: Rótulos das tabelas aceitas, na ordem do upload
+        origem: Rótulo -> (arquivo, planilha)
+        plano: Plano de colunas (planejar_colunas)
+        todas_planilhas: Se todas as planilhas dos arquivos Excel são consolidadas
+
+    Returns:
+        dict: Informações de ConsolidacaoEmDisco.finalizar, mais o diretório
+        temporário ('diretorio') e o caminho do Parquet consolidado ('caminho')
+    """
+    diretorio = tempfile.TemporaryDirectory(prefix="consolidacao_")
+    consolidacao = ConsolidacaoEmDisco(plano, diretorio.name)
+    posicoes = {rotulo: posicao for posicao, rotulo in enumerate(rotulos)}
+
+    # Tabelas aceitas de cada arquivo: planilha -> rótulo
+    por_arquivo = {}
+    for rotulo in rotulos:
+        file, planilha = origem[rotulo]
+        por_arquivo.setdefault(file.file_id, (file, {}))[1][planilha] = rotulo
+
+    excels = []
+    for file, planilhas in por_arquivo.values():
+        if file.name.lower().endswith('.xlsx'):
+            excels.append((file, planilhas))
+            continue
+        df, _ = carregar_tabela(file)
+        if df is not None:
+            consolidacao.adicionar(posicoes[planilhas[None]], planilhas[None], df)
+        del df
+
+    if excels:
+        workers = min(len(excels), cpus_disponiveis())
+        leituras = iterar_excels_em_paralelo(
+            [file.getvalue() for file, _ in excels], workers, None if todas_planilhas else 0
+        )
+        for indice, resultado, _, erro in leituras:
+            file, planilhas = excels[indice]
+            if erro is not None:
+                raise ValueError(f"{file.name}: {erro}")
+            resultado = resultado if todas_planilhas else {None: resultado}
+            for planilha, rotulo in planilhas.items():
+                consolidacao.adicionar(posicoes[rotulo], rotulo, resultado[planilha])
+            del resultado
+
+    caminho = os.path.join(diretorio.name, "consolidado.parquet")
+    return {'diretorio': diretorio, 'caminho': caminho, **consolidacao.finalizar(caminho)}
+
+
+def oferecer_arquivo_em_disco(caminho, rotulo, nome_arquivo, mime):
+    """
+    Botão de download de um arquivo do diretório da consolidação.
+
+    Chamado só quando o usuário pede o arquivo: o conteúdo é lido nessa
+    execução e sai da memória na reexecução seguinte.
+
+    Args:
+        caminho: Caminho do arquivo em disco
+        rotulo: Texto do botão
+        nome_arquivo: Nome do arquivo baixado
+        mime: Tipo MIME do arquivo
+    """
+    with open(caminho, 'rb') as f:
+        st.download_button(label=rotulo, data=f.read(), file_name=nome_arquivo, mime=mime,
+                           type="primary", use_container_width=True)
 
 # ========================================
 # SELEÇÃO DO TIPO DE UNIÃO
@@ -123,6 +218,7 @@ if st.session_state.tipo_uniao == "PDF":
         <ul>
             <li>✅ Faça upload de múltiplos arquivos PDF</li>
             <li>🔄 Arraste e solte para definir a ordem desejada</li>
+            <li>📑 Se quiser, escolha páginas ou intervalos de cada arquivo</li>
             <li>📥 Baixe o PDF unificado final</li>
         </ul>
     </div>
@@ -156,65 +252,116 @@ if st.session_state.tipo_uniao == "PDF":
         
         criar_divider()
         
-        with tempfile.TemporaryDirectory() as temp_dir:
-            pdf_files = {}
+        # Cada PDF é lido direto do upload e interpretado uma única vez (cache
+        # por conteúdo): reordenar a lista não relê nenhum arquivo
+        pdf_files = {}
+        for uploaded_file in uploaded_files:
+            try:
+                pdf_files[uploaded_file.name] = abrir_pdf(uploaded_file)
+            except Exception as e:
+                st.error(f"❌ Erro ao ler {uploaded_file.name}: {str(e)}")
 
-            # Salvar arquivos temporariamente
-            for uploaded_file in uploaded_files:
-                file_path = os.path.join(temp_dir, uploaded_file.name)
-                with open(file_path, "wb") as f:
-                    f.write(uploaded_file.getvalue())
-                pdf_files[uploaded_file.name] = file_path
+        st.markdown("### 🔄 Defina a Ordem dos Arquivos")
+        st.info("💡 Arraste os itens para cima ou para baixo para reordená-los")
 
-            st.markdown("### 🔄 Defina a Ordem dos Arquivos")
-            st.info("💡 Arraste os itens para cima ou para baixo para reordená-los")
+        # Lista arrastável
+        file_order = sort_items(
+            list(pdf_files.keys()),
+            direction="vertical",
+            key="sortable_list"
+        )
+        
+        criar_divider()
 
-            # Lista arrastável
-            file_order = sort_items(
-                list(pdf_files.keys()),
-                direction="vertical",
-                key="sortable_list"
+        # Opções da união
+        col1, col2 = st.columns(2)
+        with col1:
+            motor = st.selectbox(
+                "⚙️ Motor de união",
+                list(MOTORES_UNIAO),
+                format_func=MOTORES_UNIAO.get,
+                help=f"O PyMuPDF é bem mais rápido em documentos grandes; no modo automático "
+                     f"ele é usado acima de {PAGINAS_MOTOR_RAPIDO} páginas no total"
+            )
+        with col2:
+            marcadores = st.checkbox(
+                "🔖 Preservar marcadores (sumário) dos arquivos",
+                value=True,
+                help="Desmarque para gerar um PDF sem os marcadores dos arquivos originais"
             )
-            
-            criar_divider()
 
-            if st.button("🔗 Unir PDFs", type="primary", use_container_width=True):
+        # Páginas de cada arquivo, na ordem da lista; vazio usa o arquivo inteiro
+        with st.expander("📑 Páginas de cada arquivo"):
+            st.caption("Use vírgulas para separar páginas e hífen para intervalos (ex: 3-10,12). "
+                       "Deixe em branco para usar o arquivo inteiro.")
+            especificacoes = {}
+            selecoes = {}
+            for filename in file_order:
+                especificacoes[filename] = st.text_input(
+                    f"{filename} ({pdf_files[filename].paginas} páginas)",
+                    placeholder="Todas as páginas",
+                    key=f"paginas_{filename}"
+                )
                 try:
-                    merger = PyPDF2.PdfMerger()
-                    progress_bar = st.progress(0)
-                    status_text = st.empty()
-
-                    for i, filename in enumerate(file_order):
-                        pdf_file = pdf_files[filename]
-                        status_text.text(f"Processando {filename}...")
-                        merger.append(pdf_file)
-                        progress_bar.progress((i + 1) / len(file_order))
-
-                    # Gerar arquivo final
-                    output_path = os.path.join(temp_dir, "pdf_unificado.pdf")
-                    merger.write(output_path)
-                    merger.close()
-
-                    # Preparar arquivo para download
-                    with open(output_path, "rb") as f:
-                        pdf_bytes = f.read()
-
-                    st.success("✅ PDFs unidos com sucesso!")
-                    
-                    st.download_button(
-                        label="📥 Baixar PDF Unificado",
-                        data=pdf_bytes,
-                        file_name="pdf_unificado.pdf",
-                        mime="application/pdf",
-                        use_container_width=True
-                    )
+                    selecoes[filename] = interpretar_paginas(especificacoes[filename], pdf_files[filename].paginas)
+                except ValueError as e:
+                    st.error(f"❌ {filename}: {e}")
+        chave = (
+            tuple((pdf_files[filename].hash, especificacoes[filename]) for filename in file_order),
+            motor, marcadores
+        )
 
-                except Exception as e:
-                    st.error(f"❌ Erro ao unir PDFs: {str(e)}")
+        if st.button("🔗 Unir PDFs", type="primary", use_container_width=True,
+                     disabled=len(selecoes) < len(file_order)):
+            progress_bar = st.progress(0)
+            status_text = st.empty()
+            try:
+                def ao_processar(i):
+                    status_text.text(f"Processando {file_order[i]}...")
+                    progress_bar.progress((i + 1) / len(file_order))
+
+                documentos = [pdf_files[filename] for filename in file_order]
+                pdf_bytes, info = unir_pdfs(
+                    documentos, motor, marcadores, ao_processar, [selecoes[filename] for filename in file_order]
+                )
+                st.session_state.pdf_unificado = {
+                    'chave': chave,
+                    'dados': pdf_bytes,
+                    'info': info,
+                    'arquivos': pd.DataFrame({
+                        'Arquivo': file_order,
+                        'Páginas': info['paginas'],
+                        'Tempo (s)': [round(tempo, 3) for tempo in info['tempos']],
+                    }),
+                }
+                st.success("✅ PDFs unidos com sucesso!")
 
-                finally:
-                    progress_bar.empty()
-                    status_text.empty()
+            except Exception as e:
+                st.error(f"❌ Erro ao unir PDFs: {str(e)}")
+
+            finally:
+                progress_bar.empty()
+                status_text.empty()
+
+        # O PDF unido continua disponível enquanto os arquivos, a ordem e as opções forem os mesmos
+        resultado_pdf = st.session_state.pdf_unificado
+        if resultado_pdf is not None and resultado_pdf['chave'] == chave:
+            info = resultado_pdf['info']
+            arquivos = resultado_pdf['arquivos']
+            st.caption(
+                f"⚡ {arquivos['Páginas'].sum():,} páginas unidas com {MOTORES_UNIAO[info['motor']]} em "
+                f"{sum(info['tempos']) + info['escrita']:.2f} s "
+                f"(cópia das páginas: {sum(info['tempos']):.2f} s; escrita do arquivo: {info['escrita']:.2f} s)"
+            )
+            with st.expander("⏱️ Tempo por arquivo"):
+                st.dataframe(arquivos, use_container_width=True, hide_index=True)
+            st.download_button(
+                label="📥 Baixar PDF Unificado",
+                data=resultado_pdf['dados'],
+                file_name="pdf_unificado.pdf",
+                mime="application/pdf",
+                use_container_width=True
+            )
 
 # ========================================
 # UNIÃO DE ARQUIVOS EXCEL
@@ -227,21 +374,21 @@ elif st.session_state.tipo_uniao == "Excel":
     <div class="info-box">
         <h4>📋 Como funciona:</h4>
         <ul>
-            <li>✅ Faça upload de múltiplos arquivos Excel (.xlsx)</li>
-            <li>🔍 O sistema valida se as colunas são compatíveis</li>
+            <li>✅ Faça upload de múltiplos arquivos Excel (.xlsx), CSV, Parquet ou Feather</li>
+            <li>🔍 O sistema alinha as colunas e concilia os tipos de dados</li>
             <li>📊 Todos os arquivos são consolidados em um único</li>
             <li>📥 Baixe o arquivo Excel consolidado</li>
         </ul>
     </div>
     """, unsafe_allow_html=True)
     
-    st.markdown("""
+    st.markdown(f"""
     <div style="padding: 1rem; margin: 1rem 0;">
         <strong>⚠️ Requisitos Importantes:</strong>
         <ul>
-            <li>Todos os arquivos devem ter as <strong>mesmas colunas</strong></li>
-            <li>Os nomes das colunas devem ser <strong>idênticos</strong></li>
-            <li>Tamanho máximo: <strong>5MB por arquivo</strong></li>
+            <li>No modo <strong>Estrita</strong>, todos os arquivos devem ter as <strong>mesmas colunas</strong></li>
+            <li>Nos modos <strong>União</strong> e <strong>Interseção</strong>, as colunas são alinhadas pelo nome</li>
+            <li>Tamanho máximo: <strong>{MAX_FILE_SIZE_MB}MB por arquivo</strong></li>
         </ul>
     </div>
     """, unsafe_allow_html=True)
@@ -251,8 +398,8 @@ elif st.session_state.tipo_uniao == "Excel":
     # Upload de arquivos
     st.markdown('<div class="upload-zone">', unsafe_allow_html=True)
     uploaded_files = st.file_uploader(
-        "📤 Faça o upload de arquivos Excel",
-        type=["xlsx"],
+        "📤 Faça o upload de arquivos Excel, CSV, Parquet ou Feather",
+        type=["xlsx", "csv", "parquet", "feather"],
         accept_multiple_files=True,
         help="Selecione múltiplos arquivos Excel para consolidar"
     )
@@ -274,52 +421,132 @@ elif st.session_state.tipo_uniao == "Excel":
         
         criar_divider()
         
-        lista_df = []
-        colunas_iguais = True
-        colunas_referencia = None
-        arquivos_processados = []
+        # Opções de alinhamento
+        col1, col2 = st.columns(2)
+        with col1:
+            modo = st.selectbox(
+                "🧩 Alinhamento das colunas",
+                list(MODOS_CONSOLIDACAO),
+                format_func=MODOS_CONSOLIDACAO.get,
+                help="Estrita exige colunas idênticas; União e Interseção alinham as colunas pelo nome"
+            )
+            em_disco = st.checkbox(
+                "💽 Consolidar em disco",
+                help="Para muitos arquivos ou arquivos grandes: cada tabela é gravada em disco assim que é lida, "
+                     "e a memória usada fica limitada à do maior arquivo"
+            )
+        with col2:
+            normalizar = st.checkbox(
+                "Ignorar maiúsculas, acentos e espaços nos nomes das colunas",
+                help='"Preço Unitário" e "preco unitario" passam a ser a mesma coluna'
+            )
+            todas_planilhas = st.checkbox(
+                "Ler todas as planilhas de cada arquivo Excel",
+                help="Cada planilha entra na consolidação como uma tabela"
+            )
+        planilhas = None if todas_planilhas else 0
+        
         arquivos_ignorados = []
-
+        
+        # Arquivos já lidos em execuções anteriores não são lidos de novo;
+        # em disco, nenhuma leitura fica guardada na sessão
+        leituras = {} if em_disco else {
+            chave: st.session_state.leituras_unir[chave]
+            for chave in ((file.file_id, todas_planilhas) for file in uploaded_files)
+            if chave in st.session_state.leituras_unir
+        }
+        
+        # 1) Cabeçalhos: nos arquivos Excel (e em todos, em disco) só os nomes
+        #    das colunas são lidos, e o plano é decidido antes da leitura completa
+        cabecalhos = {}
+        origem = {}
+        pendentes_excel = []
         for file in uploaded_files:
-            # Validação de tamanho
-            if file.size > 5 * 1024 * 1024:
-                st.error(f"❌ O arquivo **{file.name}** excede o limite de 5MB e não será processado.")
+            chave = (file.file_id, todas_planilhas)
+            try:
+                if chave in leituras:
+                    colunas = {planilha: df.columns for planilha, df in leituras[chave]['tabelas'].items()}
+                elif em_disco or file.name.lower().endswith('.xlsx'):
+                    if not validar_tamanho_arquivo(file):
+                        arquivos_ignorados.append(file.name)
+                        continue
+                    colunas = ler_cabecalhos_tabela(file, todas_planilhas)
+                    if file.name.lower().endswith('.xlsx'):
+                        pendentes_excel.append(file)
+                else:
+                    # CSVs grandes são lidos em blocos, já com os tipos reduzidos
+                    inicio = time.perf_counter()
+                    df, leitura = carregar_tabela(file)
+                    if df is None:
+                        arquivos_ignorados.append(file.name)
+                        continue
+                    leituras[chave] = {'tabelas': {None: df}, 'leitura': leitura, 'tempo': time.perf_counter() - inicio}
+                    colunas = {None: df.columns}
+            except Exception as e:
+                st.error(f"❌ Erro ao processar {file.name}: {str(e)}")
                 arquivos_ignorados.append(file.name)
                 continue
             
-            try:
-                df = pd.read_excel(file)
-                
-                # Verificação das colunas
-                if colunas_referencia is None:     
-                    colunas_referencia = df.columns
-                elif not df.columns.equals(colunas_referencia):
-                    colunas_iguais = False
-                    st.error(f"❌ O arquivo **{file.name}** possui colunas diferentes e não será processado.")
+            for planilha, colunas_planilha in colunas.items():
+                rotulo = file.name if planilha is None else f"{file.name} › {planilha}"
+                cabecalhos[rotulo] = colunas_planilha
+                origem[rotulo] = (file, planilha)
+        
+        plano = planejar_colunas(cabecalhos, modo, normalizar)
+        for rotulo, motivo in plano['rejeitadas'].items():
+            st.error(f"❌ **{rotulo}**: {motivo}; não será processado.")
+            arquivos_ignorados.append(rotulo)
+        
+        # 2) Leitura completa, em paralelo, dos arquivos Excel com alguma tabela aceita
+        aceitos = {origem[rotulo][0].file_id for rotulo in plano['renomear']}
+        pendentes_excel = [file for file in pendentes_excel if file.file_id in aceitos]
+        tempo_paralelo = None
+        if pendentes_excel and not em_disco:
+            workers = min(len(pendentes_excel), cpus_disponiveis())
+            with st.spinner(f"Lendo {len(pendentes_excel)} arquivo(s) Excel com {workers} processo(s)..."):
+                inicio = time.perf_counter()
+                resultados = ler_excels_em_paralelo([file.getvalue() for file in pendentes_excel], workers, planilhas)
+                tempo_paralelo = time.perf_counter() - inicio
+            
+            for file, (resultado, tempo, erro) in zip(pendentes_excel, resultados):
+                if erro is not None:
+                    st.error(f"❌ Erro ao processar {file.name}: {erro}")
                     arquivos_ignorados.append(file.name)
                     continue
+                leituras[(file.file_id, todas_planilhas)] = {
+                    'tabelas': resultado if todas_planilhas else {None: resultado},
+                    'leitura': None,
+                    'tempo': tempo,
+                }
+        
+        st.session_state.leituras_unir = leituras
+        
+        # 3) Tabelas aceitas, na ordem do upload; em disco, elas só são lidas na consolidação
+        tabelas = dict.fromkeys(plano['renomear']) if em_disco else {}
+        for rotulo in [] if em_disco else plano['renomear']:
+            file, planilha = origem[rotulo]
+            leitura = leituras.get((file.file_id, todas_planilhas))
+            if leitura is None:
+                continue
+            df = tabelas[rotulo] = leitura['tabelas'][planilha]
+
+            # Exibir informações da tabela
+            with st.expander(f"📊 Informações de {rotulo}"):
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Linhas", f"{df.shape[0]:,}")
+                col2.metric("Colunas", f"{df.shape[1]:,}")
+                col3.metric("Memória", f"{df.memory_usage(deep=True).sum() / 1024:.1f} KB")
+                col4.metric("Leitura do arquivo", f"{leitura['tempo']:.2f} s")
+                if leitura['leitura'] is not None:
+                    exibir_resumo_leitura(leitura['leitura'])
                 
-                lista_df.append(df)
-                arquivos_processados.append(file.name)
-
-                # Exibir informações do arquivo
-                with st.expander(f"📊 Informações de {file.name}"):
-                    col1, col2, col3 = st.columns(3)
-                    col1.metric("Linhas", f"{df.shape[0]:,}")
-                    col2.metric("Colunas", f"{df.shape[1]:,}")
-                    col3.metric("Memória", f"{df.memory_usage(deep=True).sum() / 1024:.1f} KB")
-                    
-                    if st.checkbox(f"Visualizar primeiras linhas de {file.name}", key=f"preview_{file.name}"):
-                        st.dataframe(df.head(), use_container_width=True)
-            
-            except Exception as e:
-                st.error(f"❌ Erro ao processar {file.name}: {str(e)}")
-                arquivos_ignorados.append(file.name)
+                if st.checkbox(f"Visualizar primeiras linhas de {rotulo}", key=f"preview_{rotulo}"):
+                    st.dataframe(df.head(), use_container_width=True)
 
         criar_divider()
         
         # Resumo do processamento
-        if arquivos_processados:
+        if tabelas:
             st.markdown("### 📈 Resumo do Processamento")
             
             col1, col2 = st.columns(2)
@@ -327,10 +554,10 @@ elif st.session_state.tipo_uniao == "Excel":
             with col1:
                 st.markdown("""
                 <div style="padding: 1rem;">
-                    <strong>✅ Arquivos Processados:</strong>
+                    <strong>✅ Tabelas Processadas:</strong>
                 </div>
                 """, unsafe_allow_html=True)
-                for nome in arquivos_processados:
+                for nome in tabelas:
                     st.markdown(f"- {nome}")
             
             with col2:
@@ -343,20 +570,60 @@ elif st.session_state.tipo_uniao == "Excel":
                     for nome in arquivos_ignorados:
                         st.markdown(f"- {nome}")
             
+            if em_disco:
+                st.dataframe(pd.DataFrame({
+                    'Tabela': list(tabelas),
+                    'Colunas': [len(cabecalhos[rotulo]) for rotulo in tabelas],
+                }), use_container_width=True, hide_index=True)
+                st.caption("💽 As tabelas são lidas só na consolidação, uma por vez, e gravadas em disco")
+            else:
+                st.dataframe(pd.DataFrame({
+                    'Tabela': list(tabelas),
+                    'Linhas': [len(df) for df in tabelas.values()],
+                    'Colunas': [df.shape[1] for df in tabelas.values()],
+                    'Leitura do arquivo (s)': [
+                        round(leituras[(origem[rotulo][0].file_id, todas_planilhas)]['tempo'], 2) for rotulo in tabelas
+                    ],
+                }), use_container_width=True, hide_index=True)
+            if tempo_paralelo is not None:
+                soma = sum(leituras[(file.file_id, todas_planilhas)]['tempo'] for file in pendentes_excel
+                           if (file.file_id, todas_planilhas) in leituras)
+                st.caption(f"⚡ {len(pendentes_excel)} arquivo(s) Excel lidos em {tempo_paralelo:.2f} s "
+                           f"com {workers} processo(s) (soma das leituras: {soma:.2f} s)")
+            
             criar_divider()
 
-        # Se todas as colunas forem compatíveis
-        if colunas_iguais and lista_df:
-            percentual_realizado = len(lista_df) / len(uploaded_files) * 100
-            
-            st.info(f"✅ {len(lista_df)} de {len(uploaded_files)} arquivos prontos para consolidação ({percentual_realizado:.1f}%)")
+        # No modo estrito, qualquer arquivo incompatível bloqueia a consolidação
+        if modo == 'estrita' and plano['rejeitadas']:
+            st.warning("⚠️ No modo estrito todos os arquivos precisam ter as mesmas colunas. "
+                       "Remova os arquivos incompatíveis ou escolha União ou Interseção.")
+        elif tabelas and not plano['colunas']:
+            st.warning("⚠️ Nenhuma coluna é comum a todas as tabelas.")
+        elif tabelas:
+            st.info(f"✅ {len(tabelas)} tabela(s) prontas para consolidação, com {len(plano['colunas'])} coluna(s)")
             
             if st.button("🔗 Consolidar Arquivos", type="primary", use_container_width=True):
                 try:
-                    with st.spinner("Consolidando arquivos..."):
-                        st.session_state.resultado_excel = pd.concat(lista_df, ignore_index=True)
-                        st.success("✅ Arquivos consolidados com sucesso!")
-                        st.rerun()
+                    if em_disco:
+                        with st.spinner("Consolidando arquivos em disco..."):
+                            if st.session_state.resultado_disco is not None:
+                                st.session_state.resultado_disco['diretorio'].cleanup()
+                            st.session_state.resultado_disco = consolidar_em_disco(
+                                list(tabelas), origem, plano, todas_planilhas
+                            )
+                            st.session_state.resultado_excel = None
+                    else:
+                        if st.session_state.resultado_disco is not None:
+                            st.session_state.resultado_disco['diretorio'].cleanup()
+                            st.session_state.resultado_disco = None
+                        with st.spinner("Consolidando arquivos..."):
+                            consolidado, st.session_state.conciliacao_excel = consolidar_tabelas(tabelas, plano)
+                            # Datas ficam como vieram: o arquivo consolidado preserva o conteúdo original
+                            st.session_state.resultado_excel, st.session_state.compactacao_excel = compactar_dataframe(
+                                consolidado, converter_datas=False
+                            )
+                    st.success("✅ Arquivos consolidados com sucesso!")
+                    st.rerun()
                 except Exception as e:
                     st.error(f"❌ Erro na consolidação: {str(e)}")
 
@@ -380,6 +647,17 @@ elif st.session_state.tipo_uniao == "Excel":
         with col4:
             st.metric("✅ Status", "Concluído")
         
+        if st.session_state.compactacao_excel is not None:
+            exibir_compactacao(st.session_state.compactacao_excel)
+        
+        conciliacao = st.session_state.conciliacao_excel
+        if conciliacao is not None and (conciliacao['conciliacoes'] or conciliacao['ausentes']):
+            with st.expander("🧩 Alinhamento de colunas e tipos"):
+                for coluna, descricao in conciliacao['conciliacoes'].items():
+                    st.markdown(f"- **{coluna}**: {descricao}")
+                for coluna, tabelas_sem in conciliacao['ausentes'].items():
+                    st.markdown(f"- **{coluna}**: vazia em {tabelas_sem} de {conciliacao['tabelas']} tabela(s)")
+        
         criar_divider()
         
         # Preview do resultado
@@ -394,24 +672,87 @@ elif st.session_state.tipo_uniao == "Excel":
         # Download
         st.markdown("### 📥 Download do Resultado")
         
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            resultado.to_excel(writer, index=False, sheet_name="Consolidado")
-        output.seek(0)
-
-        st.download_button(
-            label="📥 Baixar Arquivo Consolidado (.xlsx)",
-            data=output,
-            file_name="resultado_consolidado.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            use_container_width=True
+        criar_botao_download_excel_planilhas(
+            {"Consolidado": resultado}, "resultado_consolidado.xlsx", "📥 Baixar Arquivo Consolidado (.xlsx)"
         )
+        criar_botoes_download_arrow(resultado, 'resultado_consolidado')
         
         # Botão para resetar
         if st.button("🔄 Nova Consolidação", use_container_width=True):
             st.session_state.resultado_excel = None
             st.rerun()
 
+    # Exibir resultado se consolidado em disco
+    elif st.session_state.resultado_disco is not None:
+        criar_divider()
+        
+        st.markdown("### 📊 Resultado da Consolidação")
+        
+        resultado = st.session_state.resultado_disco
+        arquivo = pq.ParquetFile(resultado['caminho'])
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("📄 Total de Linhas", f"{resultado['linhas']:,}")
+        with col2:
+            st.metric("📋 Total de Colunas", f"{len(arquivo.schema_arrow):,}")
+        with col3:
+            st.metric("💽 Parquet em Disco", f"{resultado['tamanho'] / 1024 ** 2:.1f} MB")
+        with col4:
+            st.metric("🧠 Maior Tabela em Memória", f"{resultado['maior_tabela'] / 1024 ** 2:.1f} MB",
+                      help=f"Soma das tabelas: {resultado['soma_tabelas'] / 1024 ** 2:.1f} MB, "
+                           "que a consolidação em memória manteria ao mesmo tempo")
+        
+        if resultado['conciliacoes'] or resultado['ausentes']:
+            with st.expander("🧩 Alinhamento de colunas e tipos"):
+                for coluna, descricao in resultado['conciliacoes'].items():
+                    st.markdown(f"- **{coluna}**: {descricao}")
+                for coluna, tabelas_sem in resultado['ausentes'].items():
+                    st.markdown(f"- **{coluna}**: vazia em {tabelas_sem} de {resultado['tabelas']} tabela(s)")
+        
+        criar_divider()
+        
+        # Preview do resultado: só o primeiro lote de linhas sai do disco
+        if st.checkbox("👁️ Visualizar Arquivo Consolidado", key="preview_disco"):
+            primeiras = next(arquivo.iter_batches(batch_size=20), None)
+            if primeiras is not None:
+                st.dataframe(primeiras.to_pandas(), use_container_width=True)
+        
+        criar_divider()
+        
+        # Download
+        st.markdown("### 📥 Download do Resultado")
+        
+        # O st.download_button guarda o arquivo inteiro na memória: cada arquivo
+        # só é lido do disco na execução em que o download é pedido, não a cada
+        # reexecução da página. O Excel é gerado na primeira vez, lendo o
+        # Parquet em lotes.
+        caminho_excel = os.path.join(resultado['diretorio'].name, "consolidado.xlsx")
+        col_excel, col_parquet = st.columns(2)
+        
+        with col_excel:
+            if st.button("⚙️ Preparar Arquivo Consolidado (.xlsx)", use_container_width=True):
+                if 'excel' not in resultado:
+                    with st.spinner("Gerando planilha..."):
+                        resultado['excel'] = exportar_excel_de_parquet(resultado['caminho'], caminho_excel)
+                oferecer_arquivo_em_disco(caminho_excel, "📥 Baixar Arquivo Consolidado (.xlsx)",
+                                          "resultado_consolidado.xlsx", MIME_EXCEL)
+            if 'excel' in resultado and len(resultado['excel']['planilhas']) > 1:
+                st.caption(f"📑 Dividido em {len(resultado['excel']['planilhas'])} planilhas "
+                           f"(limite de {LIMITE_LINHAS_EXCEL:,} linhas do Excel)")
+        
+        with col_parquet:
+            if st.button("⚙️ Preparar Parquet", use_container_width=True):
+                oferecer_arquivo_em_disco(resultado['caminho'], "📥 Baixar Parquet",
+                                          "resultado_consolidado.parquet", MIME_PARQUET)
+        
+        # Botão para resetar
+        if st.button("🔄 Nova Consolidação", use_container_width=True):
+            resultado['diretorio'].cleanup()
+            st.session_state.resultado_disco = None
+            st.rerun()
+
 # ========================================
 # PÁGINA INICIAL (SEM SELEÇÃO)
 # ========================================
@@ -465,6 +806,8 @@ else:
             """""", unsafe_allow_html=True
         )
 
+exibir_painel_downloads()
+
 # Footer
 criar_divider()
 st.markdown("""
@@ -9,11 +9,15 @@ from reportlab.pdfgen import canvas
 import fitz  # PyMuPDF
 import os
 import io
+import time
 
 # Importar configurações
 import sys
 sys.path.append('..')
 from config import configurar_pagina, aplicar_estilo_global, criar_header, criar_divider
+from paralelismo import cpus_disponiveis
+from rasterizacao import DPI_PADRAO, ESPACOS_COR, rasterizar_pdf
+from downloads import PacoteZip, exibir_downloads_pacote
 
 # Configuração da página
 configurar_pagina("Conversor de Arquivos", "🔄")
@@ -141,6 +145,30 @@ st.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
+# Opções das imagens geradas a partir de PDFs
+if formato_entrada == "PDF" and formato_saida in ["PNG", "JPEG"]:
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        dpi = st.select_slider(
+            "🔍 Resolução (DPI)",
+            options=[72, 96, 150, 200, 300],
+            value=DPI_PADRAO,
+            help="72 DPI mantém o tamanho da página em pontos; 300 DPI é qualidade de impressão"
+        )
+    with col2:
+        cor = st.selectbox(
+            "🎨 Espaço de cor",
+            [opcao for opcao in ESPACOS_COR if formato_saida == "JPEG" or opcao != 'cmyk'],
+            format_func=ESPACOS_COR.get
+        )
+    with col3:
+        qualidade = st.slider(
+            "🗜️ Qualidade do JPEG",
+            min_value=10, max_value=100, value=90,
+            disabled=formato_saida != "JPEG",
+            help="Valores menores geram arquivos menores, com mais perda"
+        )
+
 criar_divider()
 
 # ========================================
@@ -189,8 +217,11 @@ if arquivos:
         progresso = st.progress(0)
         status_text = st.empty()
         total = len(arquivos)
-        resultados = []
+        # Cada arquivo gerado vai direto para um ZIP (em disco quando cresce)
+        resultados = PacoteZip()
         erros = []
+        paginas_renderizadas = 0
+        tempo_renderizacao = 0.0
 
         for idx, arquivo in enumerate(arquivos):
             try:
@@ -202,31 +233,42 @@ if arquivos:
                 # PDF → Outros formatos
                 # ========================================
                 if ext == ".pdf":
-                    with fitz.open(stream=arquivo.read(), filetype="pdf") as doc:
-                        
-                        # PDF → Imagem (PNG/JPEG)
-                        if formato_saida.lower() in ["png", "jpeg"]:
-                            for i, page in enumerate(doc):
-                                pix = page.get_pixmap()
-                                img_bytes = pix.tobytes(output=formato_saida.lower())
-                                resultados.append((f"{nome}_pagina_{i+1}.{formato_saida.lower()}", img_bytes))
-
-                        # PDF → TXT
-                        elif formato_saida.lower() == "txt":
-                            texto = "\n".join(page.get_text() for page in doc)
-                            resultados.append((f"{nome}.txt", texto.encode("utf-8")))
-
-                        # PDF → TEX
-                        elif formato_saida.lower() == "tex":
-                            texto = "\n".join(page.get_text() for page in doc)
-                            conteudo = (
-                                "\\documentclass{article}\n"
-                                "\\usepackage[utf8]{inputenc}\n"
-                                "\\begin{document}\n"
-                                + texto.replace("\n", "\\\\\n")
-                                + "\n\\end{document}"
-                            )
-                            resultados.append((f"{nome}.tex", conteudo.encode("utf-8")))
+                    
+                    # PDF → Imagem (PNG/JPEG): páginas renderizadas em paralelo,
+                    # cada uma recebida assim que fica pronta
+                    if formato_saida.lower() in ["png", "jpeg"]:
+                        inicio = time.perf_counter()
+                        # Páginas que chegam fora de ordem esperam só até as anteriores ficarem prontas
+                        pendentes = {}
+                        proxima = 0
+                        for i, img_bytes in rasterizar_pdf(arquivo.getvalue(), dpi, cor, formato_saida.lower(), qualidade):
+                            pendentes[i] = img_bytes
+                            while proxima in pendentes:
+                                resultados.adicionar(f"{nome}_pagina_{proxima+1}.{formato_saida.lower()}", pendentes.pop(proxima))
+                                proxima += 1
+                            status_text.text(f"🔄 Convertendo: {arquivo.name} → {proxima} página(s) prontas")
+                        tempo_renderizacao += time.perf_counter() - inicio
+                        paginas_renderizadas += proxima
+
+                    else:
+                        with fitz.open(stream=arquivo.read(), filetype="pdf") as doc:
+
+                            # PDF → TXT
+                            if formato_saida.lower() == "txt":
+                                texto = "\n".join(page.get_text() for page in doc)
+                                resultados.adicionar(f"{nome}.txt", texto.encode("utf-8"))
+
+                            # PDF → TEX
+                            elif formato_saida.lower() == "tex":
+                                texto = "\n".join(page.get_text() for page in doc)
+                                conteudo = (
+                                    "\\documentclass{article}\n"
+                                    "\\usepackage[utf8]{inputenc}\n"
+                                    "\\begin{document}\n"
+                                    + texto.replace("\n", "\\\\\n")
+                                    + "\n\\end{document}"
+                                )
+                                resultados.adicionar(f"{nome}.tex", conteudo.encode("utf-8"))
 
                 # ========================================
                 # Imagem → Outros formatos
@@ -240,7 +282,7 @@ if arquivos:
                         img_rgb = img.convert("RGB")
                         img_rgb.save(buffer, format="PDF")
                         buffer.seek(0)
-                        resultados.append((f"{nome}.pdf", buffer.read()))
+                        resultados.adicionar(f"{nome}.pdf", buffer.read())
                     
                     # Imagem → Outra imagem
                     elif formato_saida.lower() in ["png", "jpeg"]:
@@ -249,7 +291,7 @@ if arquivos:
                             img = img.convert("RGB")
                         img.save(buffer, format=formato_saida.upper())
                         buffer.seek(0)
-                        resultados.append((f"{nome}.{formato_saida.lower()}", buffer.read()))
+                        resultados.adicionar(f"{nome}.{formato_saida.lower()}", buffer.read())
 
                 # ========================================
                 # TXT → Outros formatos
@@ -270,7 +312,7 @@ if arquivos:
                             y -= 15
                         c.save()
                         buffer.seek(0)
-                        resultados.append((f"{nome}.pdf", buffer.read()))
+                        resultados.adicionar(f"{nome}.pdf", buffer.read())
 
                     # TXT → TEX
                     elif formato_saida.lower() == "tex":
@@ -281,7 +323,7 @@ if arquivos:
                             + conteudo.replace("\n", "\\\\\n")
                             + "\n\\end{document}"
                         )
-                        resultados.append((f"{nome}.tex", conteudo_tex.encode("utf-8")))
+                        resultados.adicionar(f"{nome}.tex", conteudo_tex.encode("utf-8"))
 
             except Exception as e:
                 erros.append(f"❌ {arquivo.name}: {str(e)}")
@@ -298,37 +340,31 @@ if arquivos:
         # RESULTADOS
         # ========================================
         
-        if resultados:
-            st.success(f"✅ Conversão finalizada! {len(resultados)} arquivo(s) gerado(s)")
+        if resultados.arquivos:
+            st.success(f"✅ Conversão finalizada! {resultados.arquivos} arquivo(s) gerado(s)")
             
             # Métricas
             col1, col2, col3 = st.columns(3)
             with col1:
                 st.metric("📤 Arquivos Enviados", len(arquivos))
             with col2:
-                st.metric("✅ Conversões", len(resultados))
+                st.metric("✅ Arquivos Gerados", resultados.arquivos)
             with col3:
-                taxa = (len(resultados) / len(arquivos)) * 100 if len(arquivos) > 0 else 0
+                taxa = ((len(arquivos) - len(erros)) / len(arquivos)) * 100 if len(arquivos) > 0 else 0
                 st.metric("📊 Taxa de Sucesso", f"{taxa:.0f}%")
             
+            if paginas_renderizadas:
+                st.caption(
+                    f"⚡ {paginas_renderizadas:,} página(s) renderizadas em {tempo_renderizacao:.1f} s "
+                    f"({paginas_renderizadas / tempo_renderizacao:.1f} páginas/s, até {cpus_disponiveis()} processo(s))"
+                )
+            
             criar_divider()
             
             st.markdown("### 📥 Downloads Disponíveis")
             
-            # Organizar downloads em colunas (2 por linha)
-            cols_per_row = 2
-            for i in range(0, len(resultados), cols_per_row):
-                cols = st.columns(cols_per_row)
-                for j, col in enumerate(cols):
-                    if i + j < len(resultados):
-                        nome_arquivo, dados = resultados[i + j]
-                        with col:
-                            st.download_button(
-                                label=f"📥 {nome_arquivo}",
-                                data=dados,
-                                file_name=nome_arquivo,
-                                use_container_width=True
-                            )
+            # Um único ZIP; botões por arquivo só para poucos arquivos (2 por linha)
+            exibir_downloads_pacote(resultados, f"conversao_{formato_saida.lower()}.zip")
         
         if erros:
             st.warning("⚠️ Alguns arquivos apresentaram erros:")
@@ -9,7 +9,6 @@ import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
-import io
 
 # Bibliotecas de Machine Learning
 from sklearn.ensemble import IsolationForest
@@ -22,7 +21,13 @@ import sys
 sys.path.append('..')
 from config import (
     configurar_pagina, aplicar_estilo_global, criar_header, 
-    criar_divider, criar_botao_download_excel, criar_botao_download_csv
+    criar_divider, criar_botao_download_csv,
+    PONTOS_MAXIMOS_GRAFICO, reduzir_pontos, exibir_reducao_grafico,
+    carregar_tabela, exibir_resumo_leitura, compactar_dataframe, exibir_compactacao
+)
+from downloads import (
+    criar_botao_download_csv_cache, criar_botoes_download_arrow, criar_botao_download_excel_planilhas,
+    exibir_painel_downloads
 )
 
 # Configuração da página
@@ -104,6 +109,10 @@ criar_header("🔍 Detector de Anomalias", "Identifique automaticamente dados at
 # Inicializar session_state
 if 'df_anomalias' not in st.session_state:
     st.session_state.df_anomalias = None
+if 'leitura_anomalias' not in st.session_state:
+    st.session_state.leitura_anomalias = None
+if 'compactacao_anomalias' not in st.session_state:
+    st.session_state.compactacao_anomalias = None
 if 'resultados_deteccao' not in st.session_state:
     st.session_state.resultados_deteccao = None
 if 'metodo_selecionado' not in st.session_state:
@@ -113,22 +122,26 @@ if 'metodo_selecionado' not in st.session_state:
 # FUNÇÕES DE DETECÇÃO
 # ========================================
 
+# Os dados da sessão são compactados (int8, float32...): os cálculos usam
+# float64, que devolve exatamente os valores originais
+
 def detectar_anomalias_iqr(df, coluna, multiplicador=1.5):
     """Detecção usando Intervalo Interquartil (IQR)"""
-    Q1 = df[coluna].quantile(0.25)
-    Q3 = df[coluna].quantile(0.75)
+    valores = df[coluna].astype('float64')
+    Q1 = valores.quantile(0.25)
+    Q3 = valores.quantile(0.75)
     IQR = Q3 - Q1
     
     limite_inferior = Q1 - multiplicador * IQR
     limite_superior = Q3 + multiplicador * IQR
     
-    anomalias = (df[coluna] < limite_inferior) | (df[coluna] > limite_superior)
+    anomalias = (valores < limite_inferior) | (valores > limite_superior)
     
     return anomalias, limite_inferior, limite_superior
 
 def detectar_anomalias_zscore(df, coluna, threshold=3):
     """Detecção usando Z-Score"""
-    z_scores = np.abs(stats.zscore(df[coluna].dropna()))
+    z_scores = np.abs(stats.zscore(df[coluna].astype('float64').dropna()))
     anomalias = z_scores > threshold
     
     # Ajustar para o tamanho original
@@ -140,7 +153,7 @@ def detectar_anomalias_zscore(df, coluna, threshold=3):
 def detectar_anomalias_isolation_forest(df, colunas, contaminacao=0.1):
     """Detecção usando Isolation Forest"""
     # Preparar dados
-    X = df[colunas].copy()
+    X = df[colunas].astype('float64')
     
     # Remover NaN
     mask_valido = X.notna().all(axis=1)
@@ -165,7 +178,7 @@ def detectar_anomalias_isolation_forest(df, colunas, contaminacao=0.1):
 
 def detectar_anomalias_elliptic(df, colunas, contaminacao=0.1):
     """Detecção usando Elliptic Envelope"""
-    X = df[colunas].copy()
+    X = df[colunas].astype('float64')
     
     mask_valido = X.notna().all(axis=1)
     X_clean = X[mask_valido]
@@ -197,8 +210,8 @@ col1, col2 = st.columns([3, 1])
 
 with col1:
     arquivo = st.file_uploader(
-        "Selecione o arquivo (CSV ou Excel)",
-        type=["csv", "xlsx", "xls"],
+        "Selecione o arquivo (CSV, Excel, Parquet ou Feather)",
+        type=["csv", "xlsx", "xls", "parquet", "feather"],
         help="Faça upload do arquivo com os dados para análise"
     )
 
@@ -228,20 +241,21 @@ if usar_exemplo:
     })
     
     st.session_state.df_anomalias = df_exemplo
+    st.session_state.leitura_anomalias = None
+    st.session_state.compactacao_anomalias = None
     st.success("✅ Dados de exemplo carregados! (200 registros com 20 anomalias)")
     st.rerun()
 
 # Processar upload
 if arquivo and st.session_state.df_anomalias is None:
     try:
-        if arquivo.name.endswith('.csv'):
-            df = pd.read_csv(arquivo)
-        else:
-            df = pd.read_excel(arquivo)
+        df, st.session_state.leitura_anomalias = carregar_tabela(arquivo)
         
-        st.session_state.df_anomalias = df
-        st.success(f"✅ Arquivo carregado: {len(df)} registros, {len(df.columns)} colunas")
-        st.rerun()
+        if df is not None:
+            df, st.session_state.compactacao_anomalias = compactar_dataframe(df)
+            st.session_state.df_anomalias = df
+            st.success(f"✅ Arquivo carregado: {len(df)} registros, {len(df.columns)} colunas")
+            st.rerun()
     
     except Exception as e:
         st.error(f"❌ Erro ao carregar arquivo: {str(e)}")
@@ -253,6 +267,10 @@ if st.session_state.df_anomalias is not None:
     
     # Informações do dataset
     st.markdown("### 📊 Informações do Dataset")
+    if st.session_state.leitura_anomalias is not None:
+        exibir_resumo_leitura(st.session_state.leitura_anomalias)
+    if st.session_state.compactacao_anomalias is not None:
+        exibir_compactacao(st.session_state.compactacao_anomalias)
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -571,14 +589,26 @@ if st.session_state.resultados_deteccao:
     with tabs[0]:
         st.markdown("### 📈 Visualização das Anomalias")
         
+        # Pontos normais são reduzidos no servidor; anomalias aparecem sempre
+        limite_pontos = st.select_slider(
+            "Pontos máximos no gráfico:",
+            options=[1000, 2000, 5000, 10000, 20000, 50000],
+            value=PONTOS_MAXIMOS_GRAFICO,
+            help="Conjuntos maiores são reduzidos antes de enviar ao navegador. Todas as anomalias são exibidas."
+        )
+        anomalia = df_resultado['Anomalia'].to_numpy()
+        
         # Gráfico 1: Scatter plot (univariado ou bivariado)
         if resultados['metodo'] in ["IQR", "ZScore"]:
             col_analise = resultados['info']['coluna']
             
             fig = go.Figure()
             
-            # Dados normais
-            df_normal = df_resultado[~df_resultado['Anomalia']]
+            # Dados normais: LTTB sobre a série inteira, preservando as anomalias
+            exibidos = np.zeros(len(df_resultado), dtype=bool)
+            exibidos[reduzir_pontos(np.arange(len(df_resultado)), df_resultado[col_analise].to_numpy(dtype='float64'),
+                                    limite_pontos, manter=anomalia)] = True
+            df_normal = df_resultado[exibidos & ~anomalia]
             fig.add_trace(go.Scatter(
                 x=df_normal.index,
                 y=df_normal[col_analise],
@@ -621,6 +651,7 @@ if st.session_state.resultados_deteccao:
             )
             
             st.plotly_chart(fig, use_container_width=True)
+            exibir_reducao_grafico(fig, int(exibidos.sum()), len(df_resultado))
         
         else:
             # Gráfico bivariado para métodos ML
@@ -631,7 +662,10 @@ if st.session_state.resultados_deteccao:
                 
                 fig = go.Figure()
                 
-                df_normal = df_resultado[~df_resultado['Anomalia']]
+                # Nuvem de pontos sem ordem em X: amostra aleatória dos normais
+                df_normal = df_resultado[~anomalia]
+                df_normal = df_normal.iloc[reduzir_pontos(df_normal[col1], df_normal[col2],
+                                                          limite_pontos, metodo='aleatorio')]
                 fig.add_trace(go.Scatter(
                     x=df_normal[col1],
                     y=df_normal[col2],
@@ -657,6 +691,7 @@ if st.session_state.resultados_deteccao:
                 )
                 
                 st.plotly_chart(fig, use_container_width=True)
+                exibir_reducao_grafico(fig, len(df_normal) + int(anomalia.sum()), len(df_resultado))
         
         criar_divider()
         
@@ -838,20 +873,13 @@ if st.session_state.resultados_deteccao:
         col1, col2 = st.columns(2)
         
         with col1:
-            # Excel
-            output_excel = io.BytesIO()
-            with pd.ExcelWriter(output_excel, engine='xlsxwriter') as writer:
-                # Aba completa
-                df_resultado.to_excel(writer, sheet_name='Dados Completos', index=False)
-                
-                # Aba só anomalias
-                if len(df_resultado[df_resultado['Anomalia']]) > 0:
-                    df_resultado[df_resultado['Anomalia']].to_excel(
-                        writer, sheet_name='Apenas Anomalias', index=False
-                    )
-                
-                # Aba de estatísticas
-                stats_df = pd.DataFrame({
+            # Excel: gerado sob demanda, em modo streaming. As abas ficam nos
+            # resultados para que o arquivo gerado continue válido nas reexecuções
+            if 'planilhas_excel' not in resultados:
+                planilhas = {'Dados Completos': df_resultado}
+                if resultados['n_anomalias'] > 0:
+                    planilhas['Apenas Anomalias'] = df_resultado[df_resultado['Anomalia']]
+                planilhas['Estatísticas'] = pd.DataFrame({
                     'Métrica': ['Total de Registros', 'Anomalias', 'Dados Normais', 'Taxa de Anomalias'],
                     'Valor': [
                         len(df_resultado),
@@ -860,29 +888,18 @@ if st.session_state.resultados_deteccao:
                         f"{resultados['percentual']:.2f}%"
                     ]
                 })
-                stats_df.to_excel(writer, sheet_name='Estatísticas', index=False)
-            
-            output_excel.seek(0)
+                resultados['planilhas_excel'] = planilhas
             
-            st.download_button(
-                label="📥 Baixar Excel Completo",
-                data=output_excel,
-                file_name="deteccao_anomalias.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
+            criar_botao_download_excel_planilhas(
+                resultados['planilhas_excel'], "deteccao_anomalias.xlsx", "📥 Baixar Excel Completo"
             )
         
         with col2:
             # CSV
-            csv = df_resultado.to_csv(index=False).encode('utf-8')
-            
-            st.download_button(
-                label="📥 Baixar CSV",
-                data=csv,
-                file_name="deteccao_anomalias.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
+            criar_botao_download_csv_cache(df_resultado, "deteccao_anomalias.csv", "📥 Baixar CSV",
+                                           use_container_width=True)
+        
+        criar_botoes_download_arrow(df_resultado, 'deteccao_anomalias')
         
         criar_divider()
         
@@ -1141,6 +1158,8 @@ else:
         - Padrões de fraude complexos
         """)
 
+exibir_painel_downloads()
+
 # Footer
 criar_divider()
 st.markdown("""
@@ -5,14 +5,17 @@ import json
 from datetime import datetime, timedelta
 import plotly.graph_objects as go
 import plotly.express as px
-import io
 
 # Importar configurações
 import sys
 sys.path.append('..')
 from config import (
     configurar_pagina, aplicar_estilo_global, criar_header, 
-    criar_divider, criar_botao_download_excel, criar_botao_download_csv
+    criar_divider, criar_botao_download_csv
+)
+from downloads import (
+    criar_botao_download_csv_cache, criar_botoes_download_arrow, criar_botao_download_excel_planilhas,
+    exibir_painel_downloads
 )
 
 # Configuração da página
@@ -403,18 +406,9 @@ if st.session_state.api_selecionada == "CEP":
                             )
                         
                         with col2:
-                            output = io.BytesIO()
-                            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                                df_resultados.to_excel(writer, index=False, sheet_name='CEPs')
-                            output.seek(0)
-                            
-                            st.download_button(
-                                label="📥 Baixar Excel",
-                                data=output,
-                                file_name="consulta_ceps.xlsx",
-                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                use_container_width=True
-                            )
+                            criar_botao_download_excel_planilhas({'CEPs': df_resultados}, "consulta_ceps.xlsx", "📥 Baixar Excel", sob_demanda=False)
+
+                        criar_botoes_download_arrow(df_resultados, 'consulta_ceps', sob_demanda=False)
                     else:
                         st.warning("⚠️ Nenhum CEP válido encontrado")
             else:
@@ -710,18 +704,9 @@ elif st.session_state.api_selecionada == "FERIADOS":
                         )
                     
                     with col2:
-                        output = io.BytesIO()
-                        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                            df_display.to_excel(writer, index=False, sheet_name='Feriados')
-                        output.seek(0)
-                        
-                        st.download_button(
-                            label="📥 Baixar Excel",
-                            data=output,
-                            file_name=f"feriados_{ano_feriado}.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            use_container_width=True
-                        )
+                        criar_botao_download_excel_planilhas({'Feriados': df_display}, f"feriados_{ano_feriado}.xlsx", "📥 Baixar Excel", sob_demanda=False)
+
+                    criar_botoes_download_arrow(df_display, f'feriados_{ano_feriado}', sob_demanda=False)
 
 elif st.session_state.api_selecionada == "BANCOS":
     st.markdown("### 🏦 Lista de Bancos Brasileiros")
@@ -794,18 +779,9 @@ elif st.session_state.api_selecionada == "BANCOS":
                     )
                 
                 with col2:
-                    output = io.BytesIO()
-                    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                        df_bancos.to_excel(writer, index=False, sheet_name='Bancos')
-                    output.seek(0)
-                    
-                    st.download_button(
-                        label="📥 Baixar Excel",
-                        data=output,
-                        file_name="bancos_brasil.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        use_container_width=True
-                    )
+                    criar_botao_download_excel_planilhas({'Bancos': df_bancos}, "bancos_brasil.xlsx", "📥 Baixar Excel", sob_demanda=False)
+
+                criar_botoes_download_arrow(df_bancos, 'bancos_brasil', sob_demanda=False)
 
 elif st.session_state.api_selecionada == "IBGE":
     st.markdown("### 🗺️ Dados do IBGE")
@@ -873,18 +849,9 @@ elif st.session_state.api_selecionada == "IBGE":
                         )
                     
                     with col2:
-                        output = io.BytesIO()
-                        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                            df_estados.to_excel(writer, index=False, sheet_name='Estados')
-                        output.seek(0)
-                        
-                        st.download_button(
-                            label="📥 Baixar Excel",
-                            data=output,
-                            file_name="estados_brasil.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            use_container_width=True
-                        )
+                        criar_botao_download_excel_planilhas({'Estados': df_estados}, "estados_brasil.xlsx", "📥 Baixar Excel", sob_demanda=False)
+
+                    criar_botoes_download_arrow(df_estados, 'estados_brasil', sob_demanda=False)
     
     with tab2:
         st.markdown("**🏙️ Consultar Municípios por Estado**")
@@ -965,18 +932,9 @@ elif st.session_state.api_selecionada == "IBGE":
                             )
                         
                         with col2:
-                            output = io.BytesIO()
-                            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                                df_municipios.to_excel(writer, index=False, sheet_name='Municípios')
-                            output.seek(0)
-                            
-                            st.download_button(
-                                label="📥 Baixar Excel",
-                                data=output,
-                                file_name=f"municipios_{uf_select}.xlsx",
-                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                use_container_width=True
-                            )
+                            criar_botao_download_excel_planilhas({'Municípios': df_municipios}, f"municipios_{uf_select}.xlsx", "📥 Baixar Excel", sob_demanda=False)
+
+                        criar_botoes_download_arrow(df_municipios, f'municipios_{uf_select}', sob_demanda=False)
 
 else:
     st.info("👆 Selecione uma API acima para começar as consultas")
@@ -1133,28 +1091,13 @@ if st.session_state.historico_consultas or st.session_state.dados_coletados:
             col1, col2, col3 = st.columns([2, 2, 1])
             
             with col1:
-                csv = df_coletados.to_csv(index=False).encode('utf-8')
-                st.download_button(
-                    label="📥 Baixar Todos os Dados (CSV)",
-                    data=csv,
-                    file_name="dados_coletados.csv",
-                    mime="text/csv",
-                    use_container_width=True
-                )
+                criar_botao_download_csv_cache(df_coletados, "dados_coletados.csv",
+                                               "📥 Baixar Todos os Dados (CSV)", use_container_width=True)
             
             with col2:
-                output = io.BytesIO()
-                with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                    df_coletados.to_excel(writer, index=False, sheet_name='Dados')
-                output.seek(0)
-                
-                st.download_button(
-                    label="📥 Baixar Todos os Dados (Excel)",
-                    data=output,
-                    file_name="dados_coletados.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    use_container_width=True
-                )
+                criar_botao_download_excel_planilhas({'Dados': df_coletados}, "dados_coletados.xlsx", "📥 Baixar Todos os Dados (Excel)")
+
+            criar_botoes_download_arrow(df_coletados, 'dados_coletados')
             
             with col3:
                 if st.button("🗑️ Limpar", use_container_width=True):
@@ -1183,6 +1126,8 @@ if st.session_state.historico_consultas or st.session_state.dados_coletados:
         else:
             st.info("Nenhuma consulta realizada ainda")
 
+exibir_painel_downloads()
+
 # Footer
 criar_divider()
 st.markdown("""
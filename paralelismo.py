@@ -0,0 +1,86 @@
+"""
+PARALELISMO.PY - Execução em Múltiplos Processos
+================================================
+Funções compartilhadas para distribuir trabalho pesado (treinamento,
+leitura de planilhas, renderização de PDFs) entre processos.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+
+def cpus_disponiveis() -> int:
+    """Número de CPUs que o processo atual pode usar."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def threads_por_worker(workers: int, cpus: Optional[int] = None) -> int:
+    """
+    Divide as CPUs entre os workers para evitar excesso de threads.
+
+    Args:
+        workers: Número de processos em paralelo
+        cpus: Total de CPUs (padrão: todas as disponíveis)
+
+    Returns:
+        int: Threads que cada worker pode usar (mínimo 1)
+    """
+    cpus = cpus or cpus_disponiveis()
+    return max(1, cpus // max(1, workers))
+
+
+def criar_pool_processos(max_workers: int, initializer: Optional[Callable] = None,
+                         initargs: tuple = ()) -> ProcessPoolExecutor:
+    """
+    Cria um pool de processos seguro para bibliotecas com OpenMP.
+
+    Usa 'forkserver' quando disponível: os workers nascem de um processo
+    limpo, sem herdar threads do OpenMP (XGBoost, scikit-learn) do servidor
+    Streamlit, o que poderia travar um fork direto.
+
+    Args:
+        max_workers: Número máximo de processos
+        initializer: Função executada uma vez em cada worker ao iniciar
+        initargs: Argumentos do initializer (enviados uma vez por worker,
+            não a cada tarefa)
+
+    Returns:
+        ProcessPoolExecutor pronto para uso
+    """
+    metodos = multiprocessing.get_all_start_methods()
+    contexto = multiprocessing.get_context('forkserver' if 'forkserver' in metodos else 'spawn')
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=contexto,
+                               initializer=initializer, initargs=initargs)
+
+
+def encerrar_pool_processos(pool: ProcessPoolExecutor) -> None:
+    """
+    Encerra o pool sem esperar as tarefas em andamento.
+
+    As tarefas pendentes são canceladas e os workers que ainda executam
+    alguma são terminados, para não disputarem as CPUs com o que vem
+    depois (um shutdown(wait=False) os deixaria rodando até o fim).
+
+    Args:
+        pool: Pool criado com criar_pool_processos
+    """
+    # O executor não expõe os processos: _processes é um atributo privado
+    # (CPython 3.8 a 3.13), lido antes do shutdown. Se uma versão futura o
+    # remover, o shutdown espera as tarefas em andamento em vez de deixar
+    # workers rodando.
+    processos = getattr(pool, '_processes', None)
+    if processos is None:
+        pool.shutdown(wait=True, cancel_futures=True)
+        return
+    processos = list(processos.values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for processo in processos:
+        if processo.is_alive():
+            processo.terminate()
+    for processo in processos:
+        processo.join()
@@ -0,0 +1,299 @@
+"""
+PDFS.PY - União de PDFs em Memória
+==================================
+Os PDFs enviados são lidos direto dos buffers do upload, sem passar pelo
+disco, e cada documento é interpretado uma única vez: o documento fica em
+um cache indexado pelo hash do conteúdo. Reordenar a lista, reexecutar a
+página ou unir de novo os mesmos arquivos reaproveita o que já foi lido.
+
+A união tem dois motores: PyPDF2 (Python puro, o caminho original) e
+PyMuPDF (MuPDF, em C), várias vezes mais rápido em documentos grandes. No
+modo automático o motor é escolhido pelo total de páginas. Cada arquivo
+pode contribuir só com algumas páginas ou intervalos, todos copiados na
+mesma passada.
+
+O cache é compartilhado entre as sessões do servidor e remove os
+documentos usados há mais tempo quando passa do limite de memória.
+"""
+
+import hashlib
+import io
+import os
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+from PyPDF2 import PdfReader, PdfWriter
+
+from eda_cache import EDACache
+from rasterizacao import TRAVA_MUPDF
+
+LIMITE_CACHE_PDFS_MB = int(os.environ.get('FERRAMENTAS_CACHE_PDFS_MB', 256))
+
+MOTORES_UNIAO = {
+    'auto': "Automático (pelo número de páginas)",
+    'pypdf2': "PyPDF2",
+    'pymupdf': "PyMuPDF",
+}
+
+# Acima deste total de páginas o modo automático usa o PyMuPDF; abaixo, o
+# PyPDF2 termina em poucos décimos de segundo
+PAGINAS_MOTOR_RAPIDO = 200
+
+
+class DocumentoPdf:
+    """
+    PDF enviado, interpretado uma única vez por motor.
+
+    O documento do PyMuPDF é aberto na criação (informa o número de
+    páginas); o leitor do PyPDF2 só na primeira união por esse motor. Os
+    dois guardam os objetos já lidos, e as uniões seguintes copiam as
+    páginas sem reler o arquivo. O leitor do PyPDF2 não pode ser usado por
+    duas uniões ao mesmo tempo (o fluxo de bytes é compartilhado), então
+    cada união o usa sob a trava do documento.
+    """
+
+    def __init__(self, dados: bytes, hash: str):
+        self.dados = dados
+        self.hash = hash
+        self.trava = threading.Lock()
+        self._leitor = None
+        with TRAVA_MUPDF:
+            self.documento = fitz.open(stream=dados, filetype='pdf')
+            self.paginas = self.documento.page_count
+
+    @property
+    def leitor(self) -> PdfReader:
+        """Leitor do PyPDF2, criado na primeira vez que é usado."""
+        if self._leitor is None:
+            self._leitor = PdfReader(io.BytesIO(self.dados))
+        return self._leitor
+
+    @property
+    def nbytes(self) -> int:
+        """Tamanho do arquivo, usado como estimativa da memória no cache."""
+        return len(self.dados)
+
+
+CACHE_PDFS = EDACache(max_mb=LIMITE_CACHE_PDFS_MB)
+
+
+def hash_conteudo(arquivo) -> str:
+    """
+    Hash SHA-1 do conteúdo de um upload, lido do buffer sem copiá-lo.
+
+    O file_id de um upload do Streamlit é o mesmo em todas as reexecuções;
+    com ele, o hash de cada upload é calculado uma única vez.
+
+    Args:
+        arquivo: Arquivo do Streamlit file_uploader (ou BytesIO)
+    """
+    calcular = lambda: hashlib.sha1(arquivo.getbuffer()).hexdigest()
+    file_id = getattr(arquivo, 'file_id', None)
+    if file_id is None:
+        return calcular()
+    return CACHE_PDFS.get_or_compute(('hash', file_id), calcular)
+
+
+def abrir_pdf(arquivo) -> DocumentoPdf:
+    """
+    Documento de um upload, interpretado só na primeira vez que o conteúdo aparece.
+
+    Args:
+        arquivo: Arquivo do Streamlit file_uploader (ou BytesIO)
+
+    Returns:
+        DocumentoPdf: Documento em cache (compartilhado; não deve ser alterado)
+    """
+    chave = hash_conteudo(arquivo)
+    return CACHE_PDFS.get_or_compute(('pdf', chave), lambda: DocumentoPdf(arquivo.getvalue(), chave))
+
+
+# ==============================
+# SELEÇÃO DE PÁGINAS
+# ==============================
+
+def interpretar_paginas(especificacao: str, total: int) -> Optional[List[int]]:
+    """
+    Converte uma seleção de páginas como "3-10,12,1" em índices (base 0).
+
+    Usa a mesma sintaxe do Editor de PDF: vírgulas separam páginas e hífen
+    indica intervalos. A ordem escrita é mantida, e uma página pode aparecer
+    mais de uma vez.
+
+    Args:
+        especificacao: Seleção digitada (vazia para todas as páginas)
+        total: Número de páginas do documento
+
+    Returns:
+        List[int] ou None: Índices das páginas, ou None para o documento inteiro
+
+    Raises:
+        ValueError: Se a seleção não puder ser interpretada ou citar páginas inexistentes
+    """
+    if not especificacao.strip():
+        return None
+
+    paginas = []
+    for parte in especificacao.split(','):
+        parte = parte.strip()
+        try:
+            if '-' in parte:
+                inicio, fim = map(int, parte.split('-'))
+            else:
+                inicio = fim = int(parte)
+        except ValueError:
+            raise ValueError(f'"{parte}" não é uma página nem um intervalo (ex: 3-10)') from None
+        if inicio > fim:
+            raise ValueError(f'intervalo "{parte}" invertido')
+        if inicio < 1 or fim > total:
+            raise ValueError(f'"{parte}" fora das páginas do arquivo (1 a {total})')
+        paginas.extend(range(inicio - 1, fim))
+    return paginas
+
+
+def _trechos_contiguos(paginas: List[int]) -> List[Tuple[int, int]]:
+    """Agrupa índices em trechos (início, fim) de páginas consecutivas, na ordem dada."""
+    trechos = []
+    for pagina in paginas:
+        if trechos and pagina == trechos[-1][1] + 1:
+            trechos[-1] = (trechos[-1][0], pagina)
+        else:
+            trechos.append((pagina, pagina))
+    return trechos
+
+
+# ==============================
+# MOTORES DE UNIÃO
+# ==============================
+
+def escolher_motor(paginas: int) -> str:
+    """Motor do modo automático: PyMuPDF acima de PAGINAS_MOTOR_RAPIDO páginas no resultado."""
+    return 'pymupdf' if paginas > PAGINAS_MOTOR_RAPIDO else 'pypdf2'
+
+
+def _adicionar_sumario_pypdf2(writer: PdfWriter, sumario: list) -> None:
+    """Grava marcadores no formato do get_toc (nível, título, página base 1) no writer."""
+    pais = {0: None}
+    for nivel, titulo, pagina in sumario:
+        pais[nivel] = writer.add_outline_item(titulo, pagina - 1 if pagina > 0 else None, parent=pais[nivel - 1])
+
+
+def _unir_pypdf2(documentos, selecoes, marcadores, copiado) -> bytes:
+    writer = PdfWriter()
+    for indice, (documento, paginas) in enumerate(zip(documentos, selecoes)):
+        deslocamento = len(writer.pages)
+        with documento.trava:
+            # Com seleção, o PyPDF2 importaria marcadores sem destino e apontaria
+            # para a última cópia de uma página repetida: o sumário é refeito
+            # com o mesmo remapeamento do motor PyMuPDF
+            writer.append(documento.leitor, pages=paginas, import_outline=marcadores and paginas is None)
+        if marcadores and paginas is not None:
+            with TRAVA_MUPDF:
+                sumario = documento.documento.get_toc(simple=True)
+            _adicionar_sumario_pypdf2(writer, _sumario_selecao(sumario, paginas, deslocamento))
+        copiado(indice)
+
+    saida = io.BytesIO()
+    writer.write(saida)
+    return saida.getvalue()
+
+
+def _sumario_selecao(sumario: list, paginas: Optional[List[int]], deslocamento: int) -> list:
+    """
+    Marcadores de um documento levados às páginas que ele ocupa no resultado.
+
+    Marcadores de páginas fora da seleção são descartados; os níveis são
+    ajustados para que o sumário continue válido sem eles.
+    """
+    if paginas is None:
+        posicoes = None
+    else:
+        posicoes = {}
+        for posicao, pagina in enumerate(paginas):
+            posicoes.setdefault(pagina, posicao)
+
+    ajustado = []
+    for nivel, titulo, pagina in sumario:
+        if pagina > 0 and posicoes is not None:
+            if pagina - 1 not in posicoes:
+                continue
+            pagina = posicoes[pagina - 1] + 1
+        nivel = min(nivel, ajustado[-1][0] + 1 if ajustado else 1)
+        ajustado.append([nivel, titulo, pagina + deslocamento if pagina > 0 else pagina])
+    return ajustado
+
+
+def _unir_pymupdf(documentos, selecoes, marcadores, copiado) -> bytes:
+    with TRAVA_MUPDF:
+        saida = fitz.open()
+        sumario = []
+        for indice, (documento, paginas) in enumerate(zip(documentos, selecoes)):
+            # O insert_pdf não copia o sumário: os marcadores de cada arquivo
+            # são deslocados para as páginas que ele ocupa no resultado
+            if marcadores:
+                sumario.extend(_sumario_selecao(documento.documento.get_toc(simple=True), paginas, saida.page_count))
+            if paginas is None:
+                saida.insert_pdf(documento.documento)
+            else:
+                # Cada trecho contíguo é uma chamada; os recursos compartilhados
+                # (fontes, imagens) entre trechos do mesmo arquivo são copiados uma vez
+                for inicio, fim in _trechos_contiguos(paginas):
+                    saida.insert_pdf(documento.documento, from_page=inicio, to_page=fim)
+            copiado(indice)
+
+        if sumario:
+            saida.set_toc(sumario)
+        return saida.tobytes(garbage=1)
+
+
+_MOTORES = {'pypdf2': _unir_pypdf2, 'pymupdf': _unir_pymupdf}
+
+
+def unir_pdfs(
+    documentos: List[DocumentoPdf],
+    motor: str = 'auto',
+    marcadores: bool = True,
+    ao_processar: Optional[Callable[[int], None]] = None,
+    paginas: Optional[List[Optional[List[int]]]] = None
+) -> Tuple[bytes, dict]:
+    """
+    Une os documentos, na ordem dada, em um único PDF gerado em memória.
+
+    Todos os trechos saem de uma única passada: cada documento é lido uma
+    vez, mesmo com várias páginas ou intervalos selecionados.
+
+    Args:
+        documentos: Documentos abertos com abrir_pdf
+        motor: 'pypdf2', 'pymupdf' ou 'auto' (ver MOTORES_UNIAO)
+        marcadores: Se os marcadores (sumário) de cada documento são preservados
+        ao_processar: Chamada com o índice de cada documento já copiado
+            (ex.: para uma barra de progresso)
+        paginas: Páginas de cada documento (interpretar_paginas), None para
+            o documento inteiro
+
+    Returns:
+        Tuple: (PDF unificado, informações: 'motor' usado, 'paginas' copiadas
+        e 'tempos' de cópia de cada documento e 'escrita' do arquivo final,
+        em segundos)
+    """
+    selecoes = paginas or [None] * len(documentos)
+    contagem = [documento.paginas if selecao is None else len(selecao)
+                for documento, selecao in zip(documentos, selecoes)]
+    if motor == 'auto':
+        motor = escolher_motor(sum(contagem))
+
+    tempos = []
+    inicio = time.perf_counter()
+
+    def copiado(indice):
+        # O tempo de ao_processar (ex.: atualizar a página) fica fora da medição
+        nonlocal inicio
+        tempos.append(time.perf_counter() - inicio)
+        if ao_processar is not None:
+            ao_processar(indice)
+        inicio = time.perf_counter()
+
+    dados = _MOTORES[motor](documentos, selecoes, marcadores, copiado)
+    return dados, {'motor': motor, 'paginas': contagem, 'tempos': tempos, 'escrita': time.perf_counter() - inicio}
@@ -0,0 +1,115 @@
+"""
+RASTERIZACAO.PY - Conversão de Páginas de PDF em Imagens
+========================================================
+Renderiza as páginas de um PDF (PNG ou JPEG) em um pool de processos. Cada
+worker recebe os bytes do documento uma única vez, ao iniciar, e o abre
+uma vez; as tarefas levam só os números das páginas. As imagens são
+entregues à medida que ficam prontas.
+
+Este módulo importa apenas o PyMuPDF, para que os workers iniciem rápido
+(sem carregar Streamlit, pandas ou Plotly).
+"""
+
+import threading
+from concurrent.futures import as_completed
+from typing import Optional
+
+import fitz  # PyMuPDF
+
+from paralelismo import cpus_disponiveis, criar_pool_processos
+
+# O MuPDF não pode ser usado por duas threads ao mesmo tempo, e cada sessão
+# do Streamlit roda em uma thread
+TRAVA_MUPDF = threading.Lock()
+
+ESPACOS_COR = {
+    'rgb': "RGB (colorido)",
+    'cinza': "Tons de cinza",
+    'cmyk': "CMYK (impressão, só JPEG)",
+}
+_COLORSPACES = {'rgb': fitz.csRGB, 'cinza': fitz.csGRAY, 'cmyk': fitz.csCMYK}
+
+DPI_PADRAO = 72  # resolução do page.get_pixmap() sem argumentos
+
+# Documentos com menos páginas são renderizados no próprio processo:
+# iniciar o pool custaria mais do que renderizá-las
+PAGINAS_MINIMAS_PARALELO = 8
+
+# Documento aberto em cada worker pelo initializer
+_documento_worker = {}
+
+
+def _abrir_documento_worker(dados: bytes) -> None:
+    _documento_worker['documento'] = fitz.open(stream=dados, filetype='pdf')
+
+
+def _renderizar(documento, pagina: int, dpi: int, cor: str, formato: str, qualidade: int) -> bytes:
+    pixmap = documento[pagina].get_pixmap(dpi=dpi, colorspace=_COLORSPACES[cor], alpha=False)
+    if formato == 'jpeg':
+        return pixmap.tobytes('jpeg', jpg_quality=qualidade)
+    return pixmap.tobytes('png')
+
+
+def _renderizar_lote(paginas: list, dpi: int, cor: str, formato: str, qualidade: int) -> list:
+    documento = _documento_worker['documento']
+    return [(pagina, _renderizar(documento, pagina, dpi, cor, formato, qualidade)) for pagina in paginas]
+
+
+def rasterizar_pdf(
+    dados: bytes,
+    dpi: int = DPI_PADRAO,
+    cor: str = 'rgb',
+    formato: str = 'png',
+    qualidade: int = 90,
+    max_workers: Optional[int] = None
+):
+    """
+    Renderiza todas as páginas de um PDF, entregando cada imagem assim que fica pronta.
+
+    As páginas são divididas em lotes pequenos (vários por worker), o que
+    equilibra a carga entre páginas simples e pesadas sem uma troca de
+    mensagens por página.
+
+    Args:
+        dados: Bytes do PDF
+        dpi: Resolução das imagens
+        cor: Espaço de cor (ver ESPACOS_COR); PNG não aceita 'cmyk'
+        formato: 'png' ou 'jpeg'
+        qualidade: Qualidade do JPEG (1 a 100)
+        max_workers: Processos em paralelo (padrão: um por CPU)
+
+    Yields:
+        Tuple: (índice da página, base 0; bytes da imagem), na ordem em que
+        as páginas terminam
+
+    Raises:
+        ValueError: Se o espaço de cor não puder ser gravado no formato
+    """
+    if formato == 'png' and cor == 'cmyk':
+        raise ValueError("PNG não aceita CMYK; use RGB, tons de cinza ou JPEG")
+
+    with TRAVA_MUPDF:
+        documento = fitz.open(stream=dados, filetype='pdf')
+        total = documento.page_count
+
+    workers = min(max_workers or cpus_disponiveis(), total)
+    try:
+        if workers <= 1 or total < PAGINAS_MINIMAS_PARALELO:
+            # A trava é liberada entre as páginas: quem consome pode usar o MuPDF
+            for pagina in range(total):
+                with TRAVA_MUPDF:
+                    imagem = _renderizar(documento, pagina, dpi, cor, formato, qualidade)
+                yield pagina, imagem
+            return
+    finally:
+        with TRAVA_MUPDF:
+            documento.close()
+
+    tamanho_lote = max(1, min(16, total // (workers * 4)))
+    lotes = [list(range(inicio, min(inicio + tamanho_lote, total))) for inicio in range(0, total, tamanho_lote)]
+    with criar_pool_processos(workers, initializer=_abrir_documento_worker, initargs=(dados,)) as pool:
+        futuros = {pool.submit(_renderizar_lote, lote, dpi, cor, formato, qualidade) for lote in lotes}
+        for futuro in as_completed(futuros):
+            futuros.discard(futuro)
+            yield from futuro.result()
+